@@ -1,7 +1,7 @@
 import os
 from typing import List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic import field_validator, ValidationInfo
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,6 +36,26 @@ class Settings(BaseSettings):
     max_file_size: int = 100 * 1024 * 1024  # 100MB
     allowed_video_extensions: List[str] = [".mp4", ".avi", ".mov", ".mkv", ".webm"]
     upload_directory: str = "uploads"
+    upload_chunk_min_size: int = 64 * 1024  # Starting chunk size; slow clients stay here
+    upload_chunk_max_size: int = 8 * 1024 * 1024  # Ceiling for fast clients; direct uploads copy their spooled body in chunks of this size
+    upload_chunk_target_seconds: float = 0.05  # Chunk size adapts so each chunk takes about this long
+    upload_metrics_history: int = 100  # Recent uploads kept for /api/uploads/metrics
+    resumable_upload_max_size: int = 10 * 1024 * 1024 * 1024  # 10GB for resumable upload sessions
+    upload_session_ttl_hours: float = 24.0  # Idle resumable uploads are discarded after this
+    metadata_probe_concurrency: int = 2  # Background OpenCV metadata probes running at once
+    metadata_cache_size: int = 1024  # Probed metadata entries kept by content hash
+    video_stream_chunk_size: int = 1024 * 1024  # Read size when streaming without zero-copy support
+    thumbnail_concurrency: int = 1  # Poster/sprite generations running at once
+    thumbnail_poster_width: int = 640  # Poster frames are scaled down to at most this width
+    thumbnail_sprite_tile_width: int = 160  # Width of each preview frame in the sprite sheet
+    thumbnail_sprite_tiles: int = 20  # Preview frames per sprite sheet
+    thumbnail_sprite_columns: int = 5
+    thumbnail_jpeg_quality: int = 80
+    thumbnail_cache_max_age: int = 86400  # Seconds browsers may cache posters and sprites
+    ground_truth_index_cache_size: int = 64  # Test sessions whose ground truth index stays in memory
+    validation_match_mode: str = "greedy"  # 'greedy' or 'hungarian' (optimal) assignment
+    validation_require_class: bool = False  # Detections only match ground truth of the same class
+    validation_iou_threshold: Optional[float] = None  # Minimum bounding-box IoU for a match; None ignores boxes
     
     # Logging settings
     log_level: str = "INFO"
@@ -61,6 +81,41 @@ class Settings(BaseSettings):
     max_page_size: int = 1000
     request_timeout: int = 30
     
+    # Ground truth generation settings
+    ground_truth_batch_size: int = 1000  # Rows per multi-row INSERT
+    ground_truth_commit_per_batch: bool = True  # False = single commit per video
+    ground_truth_inference_batch_size: int = 8  # Sampled frames per YOLO call
+    ground_truth_confidence_threshold: float = 0.5
+    ground_truth_frame_stride: int = 5  # Analyse every Nth frame
+    ground_truth_sample_interval_seconds: Optional[float] = None  # Overrides frame stride when set
+    ground_truth_seek_stride_threshold: int = 30  # Seek instead of grab() for strides this large
+    ground_truth_executor: str = "thread"  # 'thread' (in API process) or 'process' (worker pool)
+    ground_truth_workers: int = 2
+    ground_truth_model: str = "yolov8n.pt"  # Model variant used for ground truth
+    
+    # Inference result cache (per-frame detections keyed by video content hash)
+    inference_cache_enabled: bool = True
+    inference_cache_dir: str = "cache/inference"
+    
+    # Model registry settings
+    model_registry_memory_budget_mb: int = 1024  # Resident models beyond this are evicted LRU
+    model_warmup_on_startup: bool = False  # Load and warm the ground truth model in the background at startup
+    
+    # Video processing queue settings
+    processing_queue_concurrency: int = 2  # Jobs running at once
+    processing_queue_poll_interval: float = 2.0  # Seconds between checks for runnable jobs
+    processing_max_attempts: int = 3
+    processing_retry_base_delay: float = 5.0  # Seconds, doubled after each failed attempt
+    processing_lease_seconds: float = 60.0  # A running job whose owner stops renewing this long is requeued
+    
+    # Detection event ingestion settings
+    detection_batch_max_events: int = 5000  # Largest array accepted by /api/detection-events/batch
+    detection_ingest_durability: str = "sync"  # "sync" commits per request; "buffered" acks before a group commit
+    detection_flush_interval_ms: int = 50  # Buffered mode: longest an acked event waits to be written
+    detection_flush_max_events: int = 500  # Buffered mode: flush early once this many events are waiting
+    detection_buffer_max_events: int = 50000  # Buffered mode: submits are refused (503) beyond this
+    ingest_stream_credits: int = 32  # Unacknowledged messages a streaming ingest client may have in flight
+    
     @field_validator('cors_origins', mode='before')
     def parse_cors_origins(cls, v):
         if isinstance(v, str):
@@ -86,6 +141,47 @@ class Settings(BaseSettings):
             raise ValueError('Maximum file size must be positive')
         return v
     
+    @field_validator('ground_truth_batch_size', 'ground_truth_inference_batch_size', 'ground_truth_frame_stride',
+                     'ground_truth_workers', 'processing_queue_concurrency', 'processing_max_attempts',
+                     'metadata_probe_concurrency', 'metadata_cache_size',
+                     'upload_chunk_min_size', 'upload_chunk_max_size', 'upload_metrics_history',
+                     'video_stream_chunk_size', 'thumbnail_concurrency', 'thumbnail_poster_width',
+                     'thumbnail_sprite_tile_width', 'thumbnail_sprite_tiles', 'thumbnail_sprite_columns',
+                     'ground_truth_index_cache_size', 'detection_batch_max_events',
+                     'detection_flush_interval_ms', 'detection_flush_max_events', 'detection_buffer_max_events',
+                     'ingest_stream_credits', 'processing_lease_seconds')
+    def validate_positive(cls, v, info: ValidationInfo):
+        if v <= 0:
+            raise ValueError(f'{info.field_name} must be positive')
+        return v
+    
+    @field_validator('ground_truth_executor')
+    def validate_ground_truth_executor(cls, v):
+        valid_modes = ['thread', 'process']
+        if v.lower() not in valid_modes:
+            raise ValueError(f'Ground truth executor must be one of: {", ".join(valid_modes)}')
+        return v.lower()
+    
+    @field_validator('validation_match_mode')
+    def validate_match_mode(cls, v):
+        valid_modes = ['greedy', 'hungarian']
+        if v.lower() not in valid_modes:
+            raise ValueError(f'Validation match mode must be one of: {", ".join(valid_modes)}')
+        return v.lower()
+    
+    @field_validator('detection_ingest_durability')
+    def validate_ingest_durability(cls, v):
+        valid_modes = ['sync', 'buffered']
+        if v.lower() not in valid_modes:
+            raise ValueError(f'Detection ingest durability must be one of: {", ".join(valid_modes)}')
+        return v.lower()
+    
+    @field_validator('validation_iou_threshold')
+    def validate_iou_threshold(cls, v):
+        if v is not None and not 0 <= v <= 1:
+            raise ValueError('IoU threshold must be between 0 and 1')
+        return v
+    
     @field_validator('database_pool_size', 'database_max_overflow')
     def validate_positive_integers(cls, v):
         if v < 0:
@@ -125,6 +221,7 @@ def create_directories(settings: Settings) -> None:
     """Create necessary directories"""
     directories = [
         settings.upload_directory,
+        settings.inference_cache_dir,
         "logs",
         "data"
     ]
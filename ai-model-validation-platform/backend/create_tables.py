@@ -2,13 +2,16 @@
 """
 Create database tables
 """
-from database import engine, Base
+from database import engine, Base, upgrade_schema
 from models import User, Project, Video, GroundTruthObject, TestSession, DetectionEvent, AuditLog
 
 def create_tables():
     """Create all database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    added = upgrade_schema(engine)
+    if added:
+        print(f"Added columns to existing tables: {', '.join(added)}")
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
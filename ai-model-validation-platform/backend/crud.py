@@ -1,7 +1,10 @@
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import uuid
 
-from models import Project, Video, TestSession, DetectionEvent, GroundTruthObject, AuditLog
+from models import Project, Video, TestSession, DetectionEvent, GroundTruthObject, AuditLog, VideoProcessingJob
 from schemas import (
     ProjectCreate, ProjectUpdate,
     TestSessionCreate,
@@ -73,12 +76,21 @@ def delete_project(db: Session, project_id: str, user_id: str = "anonymous") ->
             )
         ).delete(synchronize_session=False)
         
+        # Delete processing jobs for videos in this project
+        db.query(VideoProcessingJob).filter(
+            VideoProcessingJob.video_id.in_(
+                db.query(Video.id).filter(Video.project_id == project_id)
+            )
+        ).delete(synchronize_session=False)
+        
         # Delete videos for this project (file cleanup should be handled separately)
         videos_to_delete = db.query(Video).filter(Video.project_id == project_id).all()
+        project_video_ids = [video.id for video in videos_to_delete]
         for video in videos_to_delete:
-            # Clean up physical files if they exist
+            # Clean up physical files if they exist and no other project's video shares them
             import os
-            if video.file_path and os.path.exists(video.file_path):
+            if video.file_path and os.path.exists(video.file_path) and \
+                    count_video_file_references(db, video.file_path, exclude_video_ids=project_video_ids) == 0:
                 try:
                     os.remove(video.file_path)
                 except OSError:
@@ -97,11 +109,13 @@ def delete_project(db: Session, project_id: str, user_id: str = "anonymous") ->
         raise e
 
 # Video CRUD
-def create_video(db: Session, project_id: str, filename: str, file_path: str = None, file_size: int = None) -> Video:
+def create_video(db: Session, project_id: str, filename: str, file_path: str = None, file_size: int = None,
+                 file_hash: str = None) -> Video:
     db_video = Video(
         filename=filename,
         file_path=file_path or f"/uploads/{filename}",
         file_size=file_size,
+        file_hash=file_hash,
         project_id=project_id
     )
     db.add(db_video)
@@ -118,6 +132,36 @@ def get_videos(db: Session, project_id: str = None, skip: int = 0, limit: int =
 def get_video(db: Session, video_id: str) -> Optional[Video]:
     return db.query(Video).filter(Video.id == video_id).first()
 
+def get_video_by_hash(db: Session, file_hash: str) -> Optional[Video]:
+    """Existing video with identical content, preferring one whose ground truth is already generated"""
+    return db.query(Video).filter(Video.file_hash == file_hash).order_by(
+        Video.ground_truth_generated.desc(), Video.created_at
+    ).first()
+
+def count_video_file_references(db: Session, file_path: str, exclude_video_ids: Iterable[str] = ()) -> int:
+    """Number of videos whose record points at file_path (deduplicated uploads share one file)"""
+    query = db.query(Video).filter(Video.file_path == file_path)
+    exclude_video_ids = list(exclude_video_ids)
+    if exclude_video_ids:
+        query = query.filter(~Video.id.in_(exclude_video_ids))
+    return query.count()
+
+def update_video_metadata(db: Session, video_id: str, metadata: Optional[dict], metadata_status: str) -> Optional[Video]:
+    """Store probed duration/fps/resolution and mark the video's metadata as ready or failed"""
+    db_video = get_video(db, video_id)
+    if db_video:
+        if metadata:
+            db_video.duration = metadata.get("duration")
+            db_video.fps = metadata.get("fps")
+            db_video.resolution = metadata.get("resolution")
+        db_video.metadata_status = metadata_status
+        db.commit()
+        db.refresh(db_video)
+    return db_video
+
+def get_videos_pending_metadata(db: Session) -> List[Video]:
+    return db.query(Video).filter(Video.metadata_status == "pending").all()
+
 def update_video_status(db: Session, video_id: str, status: str, duration: float = None) -> Optional[Video]:
     db_video = get_video(db, video_id)
     if db_video:
@@ -129,6 +173,31 @@ def update_video_status(db: Session, video_id: str, status: str, duration: float
     return db_video
 
 # Ground Truth CRUD
+def copy_ground_truth_objects(db: Session, source_video_id: str, target_video_id: str,
+                              batch_size: int = 1000, commit: bool = True) -> int:
+    """Copy a video's ground truth to another video in multi-row batches. Returns rows copied."""
+    query = db.query(GroundTruthObject).filter(
+        GroundTruthObject.video_id == source_video_id
+    ).order_by(GroundTruthObject.timestamp)
+    
+    copied = 0
+    batch = []
+    for obj in query.yield_per(batch_size):
+        batch.append({
+            "timestamp": obj.timestamp,
+            "class_label": obj.class_label,
+            "bounding_box": obj.bounding_box,
+            "confidence": obj.confidence
+        })
+        if len(batch) >= batch_size:
+            copied += bulk_create_ground_truth_objects(db, target_video_id, batch, commit=False)
+            batch = []
+    copied += bulk_create_ground_truth_objects(db, target_video_id, batch, commit=False)
+    
+    if commit:
+        db.commit()
+    return copied
+
 def create_ground_truth_object(db: Session, video_id: str, timestamp: float, 
                               class_label: str, bounding_box: dict, confidence: float) -> GroundTruthObject:
     db_object = GroundTruthObject(
@@ -143,9 +212,158 @@ def create_ground_truth_object(db: Session, video_id: str, timestamp: float,
     db.refresh(db_object)
     return db_object
 
+def bulk_create_ground_truth_objects(db: Session, video_id: str, detections: Iterable[dict],
+                                     commit: bool = True) -> int:
+    """
+    Insert a batch of ground truth detections with a single multi-row INSERT.
+    Returns the number of rows written. Objects are not refreshed.
+    """
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "video_id": video_id,
+            "timestamp": detection["timestamp"],
+            "class_label": detection["class_label"],
+            "bounding_box": detection["bounding_box"],
+            "confidence": detection["confidence"]
+        }
+        for detection in detections
+    ]
+    if not rows:
+        return 0
+
+    db.execute(insert(GroundTruthObject), rows)
+    if commit:
+        db.commit()
+    return len(rows)
+
 def get_ground_truth_objects(db: Session, video_id: str) -> List[GroundTruthObject]:
     return db.query(GroundTruthObject).filter(GroundTruthObject.video_id == video_id).all()
 
+def get_ground_truth_rows(db: Session, video_id: str) -> List[Tuple]:
+    """(id, timestamp, class_label, bounding_box) for a video in time order, without ORM objects"""
+    return db.query(
+        GroundTruthObject.id, GroundTruthObject.timestamp,
+        GroundTruthObject.class_label, GroundTruthObject.bounding_box
+    ).filter(GroundTruthObject.video_id == video_id).order_by(GroundTruthObject.timestamp).all()
+
+# Video Processing Job CRUD
+def enqueue_processing_job(db: Session, video_id: str, priority: int = 0, max_attempts: int = 3) -> VideoProcessingJob:
+    db_job = VideoProcessingJob(
+        video_id=video_id,
+        priority=priority,
+        max_attempts=max_attempts,
+        next_attempt_at=datetime.now(timezone.utc)
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_processing_job(db: Session, job_id: str) -> Optional[VideoProcessingJob]:
+    return db.query(VideoProcessingJob).filter(VideoProcessingJob.id == job_id).first()
+
+def get_active_processing_job(db: Session, video_id: str) -> Optional[VideoProcessingJob]:
+    """Latest queued or running job for a video"""
+    return db.query(VideoProcessingJob).filter(
+        VideoProcessingJob.video_id == video_id,
+        VideoProcessingJob.status.in_(["queued", "running"])
+    ).order_by(VideoProcessingJob.created_at.desc()).first()
+
+def claim_next_processing_job(db: Session, owner: Optional[str] = None,
+                              lease_seconds: float = 60.0) -> Optional[VideoProcessingJob]:
+    """
+    Atomically move the highest-priority runnable job from 'queued' to 'running'.
+    Uses SKIP LOCKED on databases that support it so several dispatchers can share the table.
+    The claimant holds a lease on the job that it must renew before it expires.
+    """
+    db_job = db.query(VideoProcessingJob).filter(
+        VideoProcessingJob.status == "queued",
+        VideoProcessingJob.next_attempt_at <= datetime.now(timezone.utc)
+    ).order_by(
+        VideoProcessingJob.priority.desc(),
+        VideoProcessingJob.created_at,
+        VideoProcessingJob.id
+    ).with_for_update(skip_locked=True).first()
+    
+    if db_job:
+        db_job.status = "running"
+        db_job.attempts += 1
+        db_job.owner = owner
+        db_job.lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        db.commit()
+        db.refresh(db_job)
+    return db_job
+
+def renew_processing_job_leases(db: Session, owner: str, job_ids: Iterable[str], lease_seconds: float) -> int:
+    """Extend the leases an owner holds on its running jobs"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    count = db.query(VideoProcessingJob).filter(
+        VideoProcessingJob.id.in_(job_ids),
+        VideoProcessingJob.owner == owner,
+        VideoProcessingJob.status == "running"
+    ).update(
+        {VideoProcessingJob.lease_expires_at: datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def update_processing_job_checkpoint(db: Session, job_id: str, last_frame: int, commit: bool = True) -> None:
+    db.query(VideoProcessingJob).filter(VideoProcessingJob.id == job_id).update(
+        {VideoProcessingJob.last_frame: last_frame}, synchronize_session=False
+    )
+    if commit:
+        db.commit()
+
+def complete_processing_job(db: Session, job_id: str) -> Optional[VideoProcessingJob]:
+    db_job = get_processing_job(db, job_id)
+    if db_job:
+        db_job.status = "completed"
+        db_job.error = None
+        db_job.owner = None
+        db_job.lease_expires_at = None
+        db.commit()
+    return db_job
+
+def fail_processing_job(db: Session, job_id: str, error: str, retry_base_delay: float) -> Optional[VideoProcessingJob]:
+    """Requeue a failed job with exponential backoff, or mark it failed once attempts are exhausted"""
+    db_job = get_processing_job(db, job_id)
+    if db_job:
+        db_job.error = error
+        db_job.owner = None
+        db_job.lease_expires_at = None
+        if db_job.attempts < db_job.max_attempts:
+            delay = retry_base_delay * (2 ** (db_job.attempts - 1))
+            db_job.status = "queued"
+            db_job.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        else:
+            db_job.status = "failed"
+        db.commit()
+    return db_job
+
+def requeue_running_processing_jobs(db: Session) -> int:
+    """
+    Return 'running' jobs whose lease has expired to the queue, keeping their checkpoints.
+    Jobs held by a live process keep being renewed and are left alone.
+    """
+    count = db.query(VideoProcessingJob).filter(
+        VideoProcessingJob.status == "running",
+        or_(VideoProcessingJob.lease_expires_at.is_(None),
+            VideoProcessingJob.lease_expires_at < datetime.now(timezone.utc))
+    ).update(
+        {VideoProcessingJob.status: "queued", VideoProcessingJob.owner: None,
+         VideoProcessingJob.lease_expires_at: None},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def count_pending_processing_jobs(db: Session) -> int:
+    return db.query(VideoProcessingJob).filter(VideoProcessingJob.status.in_(["queued", "running"])).count()
+
 # Test Session CRUD
 def create_test_session(db: Session, test_session: TestSessionCreate, user_id: str) -> TestSession:
     db_session = TestSession(**test_session.model_dump())
@@ -163,14 +381,41 @@ def get_test_sessions(db: Session, project_id: str = None, skip: int = 0, limit:
 def get_test_session(db: Session, session_id: str) -> Optional[TestSession]:
     return db.query(TestSession).filter(TestSession.id == session_id).first()
 
+def complete_test_session(db: Session, session_id: str) -> Optional[TestSession]:
+    db_session = get_test_session(db, session_id)
+    if db_session and db_session.status != "completed":
+        db_session.status = "completed"
+        db_session.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(db_session)
+    return db_session
+
 # Detection Event CRUD
-def create_detection_event(db: Session, detection: DetectionEventSchema) -> DetectionEvent:
+def create_detection_event(db: Session, detection: DetectionEventSchema,
+                           ground_truth_match_id: Optional[str] = None) -> DetectionEvent:
     db_detection = DetectionEvent(**detection.model_dump())
+    if ground_truth_match_id is not None:
+        db_detection.ground_truth_match_id = ground_truth_match_id
     db.add(db_detection)
     db.commit()
     db.refresh(db_detection)
     return db_detection
 
+def bulk_create_detection_events(db: Session, events: Iterable[dict], commit: bool = True) -> List[str]:
+    """
+    Insert a batch of detection events with a single multi-row INSERT.
+    Returns the generated ids in input order. Objects are not refreshed.
+    """
+    rows = [{"id": str(uuid.uuid4()), **event} for event in events]
+    if not rows:
+        return []
+
+    # render_nulls keeps rows with missing optional fields in the same executemany group
+    db.execute(insert(DetectionEvent).execution_options(render_nulls=True), rows)
+    if commit:
+        db.commit()
+    return [row["id"] for row in rows]
+
 def get_detection_events(db: Session, test_session_id: str) -> List[DetectionEvent]:
     return db.query(DetectionEvent).filter(DetectionEvent.test_session_id == test_session_id).all()
 
@@ -49,6 +49,64 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Columns added to existing tables since their first release, with the value to backfill
+# into rows that predate them (None leaves them NULL). create_all() only creates missing
+# tables, so upgrade_schema() adds these in place on databases created earlier.
+ADDED_COLUMNS = {
+    "videos": {
+        "file_hash": None,
+        "metadata_status": "ready",  # Older uploads had their metadata extracted inline
+    },
+    "detection_events": {
+        "bounding_box": None,
+    },
+    "video_processing_jobs": {
+        "owner": None,
+        "lease_expires_at": None,  # Running jobs without a lease are requeued on the next start
+    },
+}
+
+def upgrade_schema(bind=None) -> list:
+    """
+    Add columns from ADDED_COLUMNS that an existing database is missing (idempotent).
+
+    Call after Base.metadata.create_all() with the models imported. Each column is added
+    with ALTER TABLE ... ADD COLUMN, backfilled, and given its index. Returns the
+    "table.column" names that were added.
+    """
+    from sqlalchemy import inspect, text
+
+    bind = bind or engine
+    added = []
+    for table_name, columns in ADDED_COLUMNS.items():
+        inspector = inspect(bind)
+        if not inspector.has_table(table_name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        table = Base.metadata.tables[table_name]
+        for column_name, backfill in columns.items():
+            if column_name in existing:
+                continue
+            column = table.columns[column_name]
+            column_type = column.type.compile(dialect=bind.dialect)
+            try:
+                with bind.begin() as connection:
+                    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+                    if backfill is not None:
+                        connection.execute(text(f"UPDATE {table_name} SET {column_name} = :value"),
+                                           {"value": backfill})
+                    for index in table.indexes:
+                        if [indexed.name for indexed in index.columns] == [column_name]:
+                            index.create(connection, checkfirst=True)
+            except Exception:
+                # Another process starting at the same time may have added it first
+                if column_name in {c["name"] for c in inspect(bind).get_columns(table_name)}:
+                    continue
+                raise
+            logger.info(f"Added column {table_name}.{column_name} to existing database")
+            added.append(f"{table_name}.{column_name}")
+    return added
+
 def get_database_health() -> dict:
     """Check database connectivity and return health status"""
     try:
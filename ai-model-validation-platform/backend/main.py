@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy import func, select, delete
@@ -9,6 +9,10 @@ from pydantic import ValidationError
 import uvicorn
 import logging
 import os
+import re
+import asyncio
+import hashlib
+import time
 import aiofiles
 import tempfile
 import uuid
@@ -17,28 +21,50 @@ from contextlib import asynccontextmanager
 from config import settings, setup_logging, create_directories, validate_environment
 from socketio_server import sio, create_socketio_app
 
-from database import SessionLocal, engine
+from database import SessionLocal, engine, upgrade_schema
 from models import Base, Project, Video, TestSession, DetectionEvent
 from schemas import (
     ProjectCreate, ProjectResponse, ProjectUpdate,
     VideoUploadResponse, GroundTruthResponse,
+    UploadSessionCreate, UploadSessionResponse,
     TestSessionCreate, TestSessionResponse,
-    DetectionEvent as DetectionEventSchema, ValidationResult
+    DetectionEvent as DetectionEventSchema, DetectionEventBatch, ValidationResult
 )
 
 from crud import (
     create_project, get_projects, get_project, update_project, delete_project,
-    create_video, get_videos,
-    create_test_session, get_test_sessions,
+    create_video, get_video, get_videos, get_video_by_hash, count_video_file_references,
+    copy_ground_truth_objects,
+    create_test_session, get_test_sessions, complete_test_session,
     create_detection_event
 )
 # Import Socket.IO integration
 from socketio_server import sio, create_socketio_app
 
 from services.ground_truth_service import GroundTruthService
+from services.processing_queue import VideoProcessingQueue
+from services.upload_sessions import (
+    upload_sessions, parse_content_range, UploadSessionNotFound, InvalidUploadRange
+)
+from services.inference_cache import hash_file
+from services.metadata_probe import metadata_prober
+from services.upload_throughput import UploadStats, upload_metrics
+from services.video_streaming import VideoFileResponse, RangeNotSatisfiable, make_etag, etag_matches
+from services.ground_truth_index import ground_truth_indexes
+from services.session_metrics import session_metrics
+from services.detection_writer import detection_writer, DetectionBufferFull
+from services.detection_ingest import (
+    ingest_detection_events, detection_event_error, session_results, emit_session_metrics,
+    DetectionBatchTooLarge, InvalidDetectionBatch
+)
+from services.ingest_stream import IngestNamespace
+from services.thumbnails import (
+    video_thumbnailer, thumbnail_key, POSTER_FILENAME, SPRITE_FILENAME
+)
 # from services.validation_service import ValidationService  # Temporarily disabled
 
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
 app = FastAPI(
     title=settings.app_name,
@@ -57,6 +83,39 @@ create_directories(settings)
 # Validate environment configuration
 validate_environment(settings)
 
+# Direct video uploads, checked against settings.max_file_size before their body is read
+UPLOAD_PATH = re.compile(r"/api/projects/[^/]+/videos")
+# Multipart framing around the file (boundaries, part headers)
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """
+    Refuse a video upload whose declared Content-Length is over the limit with 413.
+
+    This runs before Starlette parses the multipart form, which spools the whole body to
+    disk before the endpoint is called, so an oversized upload costs no disk I/O. Uploads
+    without a Content-Length are still capped while the endpoint streams them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and UPLOAD_PATH.fullmatch(scope["path"]):
+            declared = dict(scope["headers"]).get(b"content-length", b"")
+            if declared.isdigit() and int(declared) > settings.max_file_size + UPLOAD_FORM_OVERHEAD:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": f"File size exceeds {settings.max_file_size // (1024 * 1024)}MB limit"},
+                    headers={"Connection": "close"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Added before CORS so refusals still carry CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS configuration from settings
 allowed_origins = settings.cors_origins
 
@@ -71,55 +130,181 @@ app.add_middleware(
 )
 
 ground_truth_service = GroundTruthService()
+processing_queue = VideoProcessingQueue(ground_truth_service)
 # validation_service = ValidationService()  # Temporarily disabled
 
-# Security utilities
-ALLOWED_VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+@app.on_event("startup")
+async def start_processing_queue():
+    """Resume interrupted ground truth jobs and metadata probes, and start dispatching queued jobs"""
+    if settings.model_warmup_on_startup:
+        # Load the ground truth model off the request path so the first job doesn't pay for it.
+        # No-op in process mode, where each pool worker warms its own model
+        ground_truth_service.warm_up(background=True)
+    await processing_queue.start()
+    await metadata_prober.resume_pending()
+    await detection_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown_ground_truth_service():
+    """Stop the queue and ground truth workers so process-pool children don't outlive the API"""
+    await processing_queue.stop()
+    # Buffered detection events are only durable once flushed
+    await detection_writer.stop()
+    ground_truth_service.shutdown()
 
-def extract_video_metadata(file_path: str) -> Optional[dict]:
+# Security utilities
+def find_duplicate_video(db: Session, file_hash: str) -> Optional[Video]:
     """
-    Extract video metadata using OpenCV.
+    Find an existing video with byte-identical content whose file is still on disk.
     
     Args:
-        file_path: Path to the video file
+        db: Database session
+        file_hash: SHA-256 hex digest of the uploaded content
         
     Returns:
-        dict: Video metadata including duration and resolution, or None if extraction fails
+        Video: The video to share a file (and ground truth) with, or None
     """
+    existing = get_video_by_hash(db, file_hash)
+    if existing and existing.file_path and os.path.exists(existing.file_path):
+        return existing
+    return None
+
+def sync_and_rename(temp_file_path: str, final_file_path: str) -> None:
+    """fsync a fully written temp file and atomically move it into place (blocking)"""
+    fd = os.open(temp_file_path, os.O_RDWR)
     try:
-        import cv2
-        
-        cap = cv2.VideoCapture(file_path)
-        if not cap.isOpened():
-            logger.warning(f"Could not open video file: {file_path}")
-            return None
-        
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        # Calculate duration
-        duration = frame_count / fps if fps > 0 else None
-        
-        cap.release()
-        
-        metadata = {
-            "duration": duration,
-            "fps": fps,
-            "resolution": f"{width}x{height}",
-            "width": width,
-            "height": height,
-            "frame_count": int(frame_count)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.rename(temp_file_path, final_file_path)
+
+def copy_duplicate_ground_truth(source_video_id: str, target_video_id: str) -> int:
+    """
+    Copy ground truth from a video with identical content and mark the target completed.
+    
+    Blocking and uses its own session, so it can run in a worker thread. Returns rows copied.
+    """
+    db = SessionLocal()
+    try:
+        copied = copy_ground_truth_objects(db, source_video_id, target_video_id, commit=False)
+        video = get_video(db, target_video_id)
+        video.status = "completed"
+        video.ground_truth_generated = True
+        db.commit()
+        return copied
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def register_uploaded_video(db: Session, project_id: str, original_filename: str, temp_file_path: str,
+                            final_file_path: str, file_size: int, file_hash: str, priority: int = 0) -> dict:
+    """
+    Turn a fully written temp file into a video record and queue its processing.
+    
+    Shared by direct and resumable uploads. Byte-identical content already on disk is
+    reused instead of stored again; otherwise the temp file is synced and atomically
+    renamed to final_file_path. The temp file is consumed either way. The fsync and
+    rename run in a worker thread and metadata is probed in the background, so the
+    event loop stays free.
+    
+    Returns:
+        dict: Upload response body
+    """
+    duplicate_of = find_duplicate_video(db, file_hash)
+    
+    if duplicate_of is not None:
+        # Byte-identical content is already stored - share its file instead of keeping a copy
+        os.unlink(temp_file_path)
+        final_file_path = duplicate_of.file_path
+        logger.info(f"Upload {original_filename} duplicates video {duplicate_of.id}, reusing {final_file_path}")
+    else:
+        # Atomically move temp file to final location (prevents partial uploads)
+        try:
+            # Ensure all data is written to disk before it becomes visible
+            await asyncio.to_thread(sync_and_rename, temp_file_path, final_file_path)
+        except OSError as move_error:
+            # Clean up on move failure
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+            logger.error(f"Failed to move uploaded file: {move_error}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save uploaded file"
+            )
+    
+    # Metadata comes from an identical video or the probe cache when possible; otherwise it
+    # is probed in the background so upload latency is bounded by the transfer alone
+    video_metadata = None
+    if duplicate_of is not None and duplicate_of.metadata_status == "ready":
+        video_metadata = {
+            'duration': duplicate_of.duration,
+            'fps': duplicate_of.fps,
+            'resolution': duplicate_of.resolution
         }
+    else:
+        video_metadata = metadata_prober.cached(file_hash)
+    
+    # Create database record with actual file size and metadata
+    video_record = create_video(
+        db=db, 
+        project_id=project_id, 
+        filename=original_filename, 
+        file_size=file_size,  # Use actual bytes written
+        file_path=final_file_path,
+        file_hash=file_hash
+    )
+    
+    # Update video record with metadata
+    if video_metadata:
+        video_record.duration = video_metadata.get('duration')
+        video_record.fps = video_metadata.get('fps')
+        video_record.resolution = video_metadata.get('resolution')
+        video_record.metadata_status = "ready"
+        db.commit()
+        db.refresh(video_record)
+    else:
+        metadata_prober.schedule(video_record.id, final_file_path, file_hash)
+    
+    # Poster and sprite are keyed by content, so duplicates reuse the original's images
+    video_thumbnailer.schedule(thumbnail_key(video_record), final_file_path)
+    
+    if duplicate_of is not None and duplicate_of.ground_truth_generated:
+        # Ground truth for identical content is identical - copy it instead of reprocessing.
+        # A long clip has tens of thousands of rows, so the copy runs in a worker thread;
+        # end this session's read transaction first so it doesn't hold the database
+        source_video_id, video_id = duplicate_of.id, video_record.id
+        db.rollback()
+        copied = await asyncio.to_thread(copy_duplicate_ground_truth, source_video_id, video_id)
+        db.refresh(video_record)
+        logger.info(f"Copied {copied} ground truth objects from video {source_video_id} to {video_id}")
         
-        logger.info(f"Extracted video metadata: {metadata}")
-        return metadata
-        
+        return {
+            "video_id": video_id,
+            "filename": original_filename,
+            "status": "uploaded",
+            "duplicate_of": source_video_id,
+            "metadata_status": video_record.metadata_status,
+            "message": "Video uploaded successfully. Reused ground truth from identical video."
+        }
+    
+    # Queue durable background processing for ground truth generation
+    try:
+        processing_queue.enqueue(db, video_record.id, priority=priority)
     except Exception as e:
-        logger.error(f"Failed to extract video metadata from {file_path}: {str(e)}")
-        return None
+        logger.warning(f"Could not queue ground truth processing: {str(e)}")
+    
+    logger.info(f"Successfully uploaded video {original_filename} ({file_size} bytes) to {final_file_path}")
+    
+    return {
+        "video_id": video_record.id,
+        "filename": original_filename,
+        "status": "uploaded",
+        "duplicate_of": duplicate_of.id if duplicate_of is not None else None,
+        "metadata_status": video_record.metadata_status,
+        "message": "Video uploaded successfully. Processing queued."
+    }
 
 def generate_secure_filename(original_filename: str) -> tuple[str, str]:
     """
@@ -144,10 +329,11 @@ def generate_secure_filename(original_filename: str) -> tuple[str, str]:
     original_path = Path(original_filename)
     file_extension = original_path.suffix.lower()
     
-    if file_extension not in ALLOWED_VIDEO_EXTENSIONS:
+    allowed_extensions = [ext.lower() for ext in settings.allowed_video_extensions]
+    if file_extension not in allowed_extensions:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file format. Only {', '.join(ALLOWED_VIDEO_EXTENSIONS)} files are allowed."
+            detail=f"Invalid file format. Only {', '.join(allowed_extensions)} files are allowed."
         )
     
     # Generate secure UUID-based filename
@@ -367,6 +553,7 @@ async def delete_project_endpoint(
 async def upload_video(
     project_id: str,
     file: UploadFile = File(...),
+    priority: int = 0,
     db: Session = Depends(get_db)
 ):
     temp_file_path = None
@@ -383,6 +570,10 @@ async def upload_video(
                 detail=f"Project not found: {project_id}"
             )
         
+        # End the read transaction so the pooled connection isn't held while the body
+        # streams to disk; the session reconnects when the video record is created
+        db.rollback()
+        
         # Setup paths for chunked upload with temp file
         upload_dir = settings.upload_directory
         os.makedirs(upload_dir, exist_ok=True)
@@ -392,16 +583,27 @@ async def upload_video(
         import tempfile
         temp_fd, temp_file_path = tempfile.mkstemp(suffix=file_extension, dir=upload_dir)
         
-        # MEMORY OPTIMIZED: Chunked upload with size validation and progress tracking
-        # Uses smaller chunks (64KB) for better memory efficiency while maintaining good performance
-        chunk_size = 64 * 1024  # 64KB chunks - optimal balance of memory usage and I/O performance
-        max_file_size = 100 * 1024 * 1024  # 100MB limit
+        # Chunked copy with size validation and progress tracking. Starlette has already
+        # spooled the multipart body to a local temp file, so this is a disk-to-disk copy:
+        # use the largest configured chunk, and record its speed as a local copy rather than
+        # as the client's upload throughput (resumable ranges measure the network)
+        max_file_size = settings.max_file_size
+        max_file_size_mb = max_file_size // (1024 * 1024)
+        chunk_size = settings.upload_chunk_max_size
+        upload_stats = UploadStats(file.filename, kind="local_copy")
         bytes_written = 0
+        next_progress_log = 10 * 1024 * 1024
+        # Hash while streaming so duplicates are detected without a second read of the file
+        content_hash = hashlib.sha256()
         
         try:
-            with os.fdopen(temp_fd, 'wb') as temp_file:
+            # Write through aiofiles so disk writes run on its thread pool, not the event loop
+            os.close(temp_fd)
+            async with aiofiles.open(temp_file_path, 'wb') as temp_file:
                 # Process file in chunks without loading entire file into memory
                 while True:
+                    chunk_started = time.perf_counter()
+                    
                     # Read chunk asynchronously
                     chunk = await file.read(chunk_size)
                     if not chunk:
@@ -412,19 +614,24 @@ async def upload_video(
                     if bytes_written > max_file_size:
                         raise HTTPException(
                             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                            detail="File size exceeds 100MB limit"
+                            detail=f"File size exceeds {max_file_size_mb}MB limit"
                         )
                     
-                    # Write chunk to temporary file
-                    temp_file.write(chunk)
+                    # Write chunk to temporary file and hash it in parallel (hashlib releases the GIL)
+                    await asyncio.gather(
+                        temp_file.write(chunk),
+                        asyncio.to_thread(content_hash.update, chunk)
+                    )
+                    
+                    chunk_seconds = time.perf_counter() - chunk_started
+                    upload_stats.add_chunk(len(chunk), chunk_seconds)
                     
                     # Log progress for large files (every 10MB) without memory overhead
-                    if bytes_written % (10 * 1024 * 1024) == 0:
+                    if bytes_written >= next_progress_log:
                         logger.info(f"Upload progress for {file.filename}: {bytes_written / (1024 * 1024):.1f}MB written")
+                        next_progress_log += 10 * 1024 * 1024
                 
-                # Ensure all data is written to disk
-                temp_file.flush()
-                os.fsync(temp_file.fileno())
+                await temp_file.flush()
         
         except Exception as upload_error:
             # Clean up temporary file on upload error
@@ -441,57 +648,13 @@ async def upload_video(
                 detail="Empty file not allowed"
             )
         
-        # Atomically move temp file to final location (prevents partial uploads)
-        try:
-            os.rename(temp_file_path, final_file_path)
-            temp_file_path = None  # File successfully moved
-        except OSError as move_error:
-            # Clean up on move failure
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-            logger.error(f"Failed to move uploaded file: {move_error}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to save uploaded file"
-            )
-        
-        # Extract video metadata
-        video_metadata = extract_video_metadata(final_file_path)
+        upload_metrics.record(upload_stats)
         
-        # Create database record with actual file size and metadata
-        video_record = create_video(
-            db=db, 
-            project_id=project_id, 
-            filename=file.filename, 
-            file_size=bytes_written,  # Use actual bytes written
-            file_path=final_file_path
+        return await register_uploaded_video(
+            db, project_id, file.filename, temp_file_path, final_file_path,
+            bytes_written, content_hash.hexdigest(), priority
         )
         
-        # Update video record with metadata
-        if video_metadata:
-            video_record.duration = video_metadata.get('duration')
-            video_record.resolution = video_metadata.get('resolution')
-            db.commit()
-            db.refresh(video_record)
-        
-        # Start background processing for ground truth generation
-        import asyncio
-        try:
-            # Create a task for ground truth processing
-            asyncio.create_task(ground_truth_service.process_video_async(video_record.id, final_file_path))
-            logger.info(f"Started ground truth processing for video {video_record.id}")
-        except Exception as e:
-            logger.warning(f"Could not start ground truth processing: {str(e)}")
-        
-        logger.info(f"Successfully uploaded video {file.filename} ({bytes_written} bytes) to {final_file_path}")
-        
-        return {
-            "video_id": video_record.id,
-            "filename": file.filename,
-            "status": "uploaded",
-            "message": "Video uploaded successfully. Processing started."
-        }
-        
     except HTTPException:
         # Clean up any remaining temp files on HTTP exceptions
         if temp_file_path and os.path.exists(temp_file_path):
@@ -513,6 +676,124 @@ async def upload_video(
             detail="Failed to upload video"
         )
 
+# Resumable upload endpoints
+def get_upload_session_or_404(upload_id: str):
+    try:
+        return upload_sessions.get(upload_id)
+    except UploadSessionNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+
+@app.post("/api/projects/{project_id}/uploads", response_model=UploadSessionResponse,
+          status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    project_id: str,
+    upload: UploadSessionCreate,
+    db: Session = Depends(get_db)
+):
+    """Start a resumable upload. Bytes are then sent with PUT /api/uploads/{upload_id}."""
+    secure_filename, _ = generate_secure_filename(upload.filename)
+    
+    project = get_project(db=db, project_id=project_id, user_id="anonymous")
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project not found: {project_id}"
+        )
+    
+    if upload.total_size > settings.resumable_upload_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds {settings.resumable_upload_max_size // (1024 * 1024)}MB limit"
+        )
+    
+    session = upload_sessions.create(project_id, upload.filename, secure_filename, upload.total_size)
+    return session.to_dict()
+
+@app.get("/api/uploads/metrics")
+async def get_upload_metrics():
+    """
+    Recent uploads: network throughput of resumable ranges, and the local copy speed of
+    direct uploads (whose body the framework spools before the endpoint runs)
+    """
+    return {
+        "summary": upload_metrics.summary(),
+        "recent": upload_metrics.recent()
+    }
+
+@app.put("/api/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_session_range(upload_id: str, request: Request):
+    """
+    Write one byte range of a resumable upload.
+    
+    The range is given by a 'Content-Range: bytes start-end/total' header (end inclusive)
+    and the raw bytes are the request body. Ranges may be sent in any order and in
+    parallel; a range is only recorded once all of its bytes have arrived.
+    """
+    session = get_upload_session_or_404(upload_id)
+    
+    try:
+        start, end, total = parse_content_range(request.headers.get("content-range"))
+        if total is not None and total != session.total_size:
+            raise InvalidUploadRange(f"Content-Range total {total} does not match upload size {session.total_size}")
+        await upload_sessions.write_range(session, start, end, request.stream())
+    except InvalidUploadRange as e:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=str(e)
+        )
+    
+    return session.to_dict()
+
+@app.get("/api/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(upload_id: str):
+    """Report received and missing byte ranges so an interrupted client can resume"""
+    return get_upload_session_or_404(upload_id).to_dict()
+
+@app.post("/api/uploads/{upload_id}/complete", response_model=VideoUploadResponse)
+async def complete_upload_session(
+    upload_id: str,
+    priority: int = 0,
+    db: Session = Depends(get_db)
+):
+    """Finalize a fully received upload into a video, exactly like a direct upload"""
+    session = get_upload_session_or_404(upload_id)
+    
+    missing = session.missing_ranges()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {len(missing)} byte ranges missing, first at offset {missing[0][0]}"
+        )
+    
+    try:
+        # Ranges may have arrived in any order, so hash the assembled file in one pass
+        file_hash = await asyncio.to_thread(hash_file, session.data_path)
+        final_file_path = secure_join_path(settings.upload_directory, session.stored_filename)
+        response = await register_uploaded_video(
+            db, session.project_id, session.filename, session.data_path, final_file_path,
+            session.total_size, file_hash, priority
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to finalize upload {upload_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to finalize upload"
+        )
+    
+    upload_sessions.discard(session)
+    return response
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str):
+    """Abandon a resumable upload and free its disk space"""
+    upload_sessions.discard(get_upload_session_or_404(upload_id))
+    return {"message": "Upload session deleted"}
+
 @app.get("/api/projects/{project_id}/videos")
 async def get_project_videos(
     project_id: str,
@@ -548,6 +829,7 @@ async def get_project_videos(
                 v.status,
                 v.created_at,
                 v.duration,
+                v.metadata_status,
                 v.file_size,
                 v.ground_truth_generated,
                 COALESCE(gtc.detection_count, 0) as detection_count
@@ -567,9 +849,11 @@ async def get_project_videos(
                 "status": row.status,
                 "created_at": row.created_at,
                 "duration": row.duration,
+                "metadata_status": row.metadata_status,
                 "file_size": row.file_size,
                 "ground_truth_generated": bool(row.ground_truth_generated),
-                "detectionCount": int(row.detection_count or 0)
+                "detectionCount": int(row.detection_count or 0),
+                "poster_url": f"/api/videos/{row.id}/poster"
             }
             for row in videos_with_counts
         ]
@@ -609,10 +893,16 @@ async def delete_video(
             # Phase 1: Prepare file path and validate file existence
             file_path_to_delete = video.file_path if video.file_path and os.path.exists(video.file_path) else None
             
+            # Deduplicated uploads share one file - keep it while other videos reference it
+            if file_path_to_delete and count_video_file_references(db, file_path_to_delete, exclude_video_ids=[video.id]):
+                logger.info(f"Keeping shared video file {file_path_to_delete} still used by other videos")
+                file_path_to_delete = None
+            
             # Phase 2: Delete physical file FIRST (if exists) to prevent orphans
             if file_path_to_delete:
                 try:
                     os.remove(file_path_to_delete)
+                    video_thumbnailer.discard(thumbnail_key(video))
                     logger.info(f"Successfully deleted video file: {file_path_to_delete}")
                 except OSError as file_error:
                     # File deletion failed - abort entire operation to prevent inconsistency
@@ -633,6 +923,7 @@ async def delete_video(
             
             # Phase 4: Commit transaction only after all operations succeed
             db.commit()
+            ground_truth_indexes.invalidate_video(video_id)
             logger.info(f"Successfully deleted video {video_id} and associated file")
             
         except HTTPException:
@@ -659,22 +950,111 @@ async def delete_video(
             detail="Failed to delete video"
         )
 
-@app.get("/api/videos/{video_id}/ground-truth", response_model=GroundTruthResponse)
-async def get_ground_truth(
+@app.api_route("/api/videos/{video_id}/stream", methods=["GET", "HEAD"])
+async def stream_video(
     video_id: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    # Ground truth service temporarily disabled
-    logger.info(f"Ground truth service temporarily disabled for video {video_id}")
-    # Return fallback response
+    """Stream a stored video with HTTP Range and ETag support for scrubbing in the review UI"""
+    from crud import get_video
+    video = get_video(db=db, video_id=video_id)
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    file_path, file_hash = video.file_path, video.file_hash
+    # Don't hold a pooled connection while the file streams
+    db.rollback()
+
+    if not file_path or not os.path.isfile(file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video file not found"
+        )
+
+    etag = make_etag(file_path, file_hash)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    try:
+        return VideoFileResponse(file_path, request.headers, etag, method=request.method)
+    except RangeNotSatisfiable as e:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": str(e), "ETag": etag}
+        )
+
+async def get_video_thumbnails(db: Session, video_id: str) -> tuple[str, dict]:
+    """Thumbnail key and sprite manifest for a video, generating them if still missing"""
+    from crud import get_video
+    video = get_video(db=db, video_id=video_id)
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    key, file_path = thumbnail_key(video), video.file_path
+    db.rollback()
+
+    manifest = video_thumbnailer.manifest(key)
+    if manifest is None and file_path and os.path.isfile(file_path):
+        manifest = await video_thumbnailer.ensure(key, file_path)
+    if manifest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnails not available for this video"
+        )
+    return key, manifest
+
+def thumbnail_image_response(request: Request, key: str, filename: str) -> Response:
+    """Serve a generated image; its content never changes for a key so caches may keep it"""
+    path = video_thumbnailer.path(key, filename)
+    etag = f'"{key}-{filename}"'
+    cache_control = f"public, max-age={settings.thumbnail_cache_max_age}"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag, "Cache-Control": cache_control})
+    return VideoFileResponse(path, {}, etag, method=request.method, media_type="image/jpeg",
+                             cache_control=cache_control)
+
+@app.get("/api/videos/{video_id}/thumbnails")
+async def get_video_thumbnail_manifest(video_id: str, db: Session = Depends(get_db)):
+    """Poster and sprite URLs plus the sprite layout for hover scrubbing"""
+    _, manifest = await get_video_thumbnails(db, video_id)
     return {
         "video_id": video_id,
-        "objects": [],
-        "total_detections": 0,
-        "status": "pending", 
-        "message": "Ground truth processing temporarily disabled - requires ML dependencies"
+        "poster_url": f"/api/videos/{video_id}/poster",
+        "sprite_url": f"/api/videos/{video_id}/sprite",
+        "sprite": manifest
     }
 
+@app.api_route("/api/videos/{video_id}/poster", methods=["GET", "HEAD"])
+async def get_video_poster(video_id: str, request: Request, db: Session = Depends(get_db)):
+    key, _ = await get_video_thumbnails(db, video_id)
+    return thumbnail_image_response(request, key, POSTER_FILENAME)
+
+@app.api_route("/api/videos/{video_id}/sprite", methods=["GET", "HEAD"])
+async def get_video_sprite(video_id: str, request: Request, db: Session = Depends(get_db)):
+    key, _ = await get_video_thumbnails(db, video_id)
+    return thumbnail_image_response(request, key, SPRITE_FILENAME)
+
+@app.get("/api/videos/{video_id}/ground-truth", response_model=GroundTruthResponse)
+async def get_ground_truth(
+    video_id: str,
+    db: Session = Depends(get_db)
+):
+    video = get_video(db=db, video_id=video_id)
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found"
+        )
+    
+    # Committed batches are readable while the video is still processing
+    return await asyncio.to_thread(ground_truth_service.get_ground_truth, video_id)
+
 # Test Execution endpoints
 @app.post("/api/test-sessions", response_model=TestSessionResponse)
 async def create_test(
@@ -691,7 +1071,15 @@ async def create_test(
                 detail="Project not found"
             )
         
-        return create_test_session(db=db, test_session=test_session, user_id="anonymous")
+        session_record = create_test_session(db=db, test_session=test_session, user_id="anonymous")
+        
+        # Build the session's ground truth index now so per-event validation never reads the table
+        try:
+            await asyncio.to_thread(ground_truth_indexes.load, db, session_record.id)
+        except Exception as e:
+            logger.warning(f"Could not build ground truth index for session {session_record.id}: {str(e)}")
+        
+        return session_record
     except HTTPException:
         raise
     except Exception as e:
@@ -719,39 +1107,64 @@ async def receive_detection(
     """Receive detection events from Raspberry Pi"""
     try:
         # Validate detection data
-        if detection.confidence is not None and (detection.confidence < 0 or detection.confidence > 1):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Confidence must be between 0 and 1"
-            )
-        
-        if detection.timestamp < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Timestamp must be non-negative"
-            )
+        error = detection_event_error(detection)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
         
-        # Store the detection event
-        detection_record = create_detection_event(db=db, detection=detection)
+        buffered = detection_writer.active
+        if buffered:
+            # Claim buffer room before scoring, so a full buffer refuses the event before it is counted
+            detection_writer.reserve(1)
+        submitted = False
+        try:
+            # Score against the session's ground truth before storing, so the row carries its result
+            ground_truth_match_id = None
+            accumulator = await session_metrics.get_async(db, detection.test_session_id)
+            if accumulator is not None:
+                detection.validation_result, ground_truth_match_id = accumulator.record(
+                    detection.timestamp, detection.class_label, detection.bounding_box
+                )
+            
+            # Store the detection event, or hand it to the write-behind buffer in buffered mode
+            if buffered:
+                detection_id = str(uuid.uuid4())
+                detection_writer.submit([{
+                    "id": detection_id, **detection.model_dump(), "ground_truth_match_id": ground_truth_match_id
+                }], reserved=True)
+                submitted = True
+            else:
+                detection_id = create_detection_event(
+                    db=db, detection=detection, ground_truth_match_id=ground_truth_match_id
+                ).id
+        except Exception:
+            # The event may have been counted without being stored; rebuild from the table next time
+            session_metrics.discard(detection.test_session_id)
+            raise
+        finally:
+            if buffered and not submitted:
+                detection_writer.release(1)
         
         # Emit real-time detection event via Socket.IO
         await sio.emit('detection_event', {
-            "id": detection_record.id,
+            "id": detection_id,
             "sessionId": detection.test_session_id,
             "timestamp": detection.timestamp,
             "classLabel": detection.class_label,
             "confidence": detection.confidence,
             "validationResult": detection.validation_result or "PENDING"
         }, room=f"test_session_{detection.test_session_id}")
+        if accumulator is not None:
+            await emit_session_metrics(accumulator)
         
-        # Return success response (validation service disabled)
         return {
-            "detection_id": detection_record.id,
-            "validation_result": None,
-            "status": "processed"
+            "detection_id": detection_id,
+            "validation_result": detection.validation_result,
+            "status": "accepted" if buffered else "processed"
         }
     except HTTPException:
         raise
+    except DetectionBufferFull as e:
+        raise buffer_full_error(e)
     except Exception as e:
         logger.error(f"Detection event error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -759,31 +1172,67 @@ async def receive_detection(
             detail="Failed to process detection event"
         )
 
+def buffer_full_error(error: DetectionBufferFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "1"}
+    )
+
+@app.post("/api/detection-events/batch")
+async def receive_detection_batch(
+    batch: DetectionEventBatch,
+    db: Session = Depends(get_db)
+):
+    """
+    Receive many detection events in one request: validated together, stored with a
+    single multi-row INSERT and commit, and announced with one Socket.IO message per session.
+    The batch is rejected as a whole if any event is invalid.
+    """
+    try:
+        return await ingest_detection_events(db, batch.events)
+    except DetectionBatchTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidDetectionBatch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except DetectionBufferFull as e:
+        raise buffer_full_error(e)
+    except Exception as e:
+        logger.error(f"Detection batch error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process detection events"
+        )
+
+@app.get("/api/detection-events/buffer")
+async def get_detection_buffer_stats():
+    """Write-behind buffer state: durability mode, pending events and flush statistics"""
+    return detection_writer.stats()
+
 # Validation Results endpoint
 @app.get("/api/test-sessions/{session_id}/results", response_model=ValidationResult)
 async def get_test_results(
     session_id: str,
     db: Session = Depends(get_db)
 ):
-    # Validation service temporarily disabled
-    # results = validation_service.get_session_results(session_id)
-    # if not results:
-    #     raise HTTPException(status_code=404, detail="Test session not found")
-    # return results
-    
-    # Return mock validation results for testing
-    return {
-        "session_id": session_id,
-        "accuracy": 94.2,
-        "precision": 92.5,
-        "recall": 95.8,
-        "f1_score": 94.1,
-        "total_detections": 150,
-        "true_positives": 142,
-        "false_positives": 8,
-        "false_negatives": 6,
-        "status": "completed"
-    }
+    """Current metrics for a session; served from memory while the session is active"""
+    accumulator = await session_metrics.get_async(db, session_id)
+    if accumulator is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test session not found")
+    return session_results(accumulator)
+
+@app.post("/api/test-sessions/{session_id}/complete", response_model=ValidationResult)
+async def complete_test(
+    session_id: str,
+    db: Session = Depends(get_db)
+):
+    """Close a session: unmatched ground truth becomes final false negatives"""
+    if not complete_test_session(db, session_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test session not found")
+    accumulator = await session_metrics.get_async(db, session_id)
+    accumulator.close()
+    await emit_session_metrics(accumulator)
+    return session_results(accumulator)
 
 # Dashboard endpoints
 @app.get("/api/dashboard/stats")
@@ -836,6 +1285,9 @@ async def get_dashboard_stats(
 async def health_check():
     return {"status": "healthy"}
 
+# Streaming detection ingest for Raspberry Pi clients
+sio.register_namespace(IngestNamespace())
+
 # Create the combined FastAPI + Socket.IO ASGI app
 socketio_app = create_socketio_app(app)
 
@@ -32,9 +32,11 @@ class Video(Base):
     filename = Column(String, nullable=False, index=True)  # Index for search
     file_path = Column(String, nullable=False)
     file_size = Column(Integer)
+    file_hash = Column(String(64), index=True)  # SHA-256 of the content, used to deduplicate uploads
     duration = Column(Float)  # in seconds
     fps = Column(Float)
     resolution = Column(String)
+    metadata_status = Column(String, default="pending", index=True)  # pending, ready or failed
     status = Column(String, default="uploaded", index=True)  # Index for status filtering
     ground_truth_generated = Column(Boolean, default=False, index=True)  # Index for filtering
     project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -43,6 +45,7 @@ class Video(Base):
 
     project = relationship("Project", back_populates="videos")
     ground_truth_objects = relationship("GroundTruthObject", back_populates="video", cascade="all, delete-orphan")
+    processing_jobs = relationship("VideoProcessingJob", back_populates="video", cascade="all, delete-orphan")
 
     # Composite index for common queries
     __table_args__ = (
@@ -69,6 +72,30 @@ class GroundTruthObject(Base):
         Index('idx_gt_video_class', 'video_id', 'class_label'),
     )
 
+class VideoProcessingJob(Base):
+    __tablename__ = "video_processing_jobs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    video_id = Column(String(36), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String, default="queued", nullable=False, index=True)  # 'queued', 'running', 'completed', 'failed'
+    priority = Column(Integer, default=0, nullable=False)  # Higher runs first
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)  # Retry backoff
+    last_frame = Column(Integer, default=0, nullable=False)  # Checkpoint: last fully persisted frame
+    owner = Column(String)  # Queue instance running the job
+    lease_expires_at = Column(DateTime(timezone=True))  # Renewed by the owner's heartbeat while running
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    video = relationship("Video", back_populates="processing_jobs")
+
+    # Composite index for claiming the next runnable job
+    __table_args__ = (
+        Index('idx_job_status_priority', 'status', 'priority', 'next_attempt_at'),
+    )
+
 class TestSession(Base):
     __tablename__ = "test_sessions"
 
@@ -100,6 +127,7 @@ class DetectionEvent(Base):
     timestamp = Column(Float, nullable=False, index=True)  # Index for temporal queries
     confidence = Column(Float, index=True)  # Index for confidence-based filtering
     class_label = Column(String, index=True)  # Index for filtering by detection type
+    bounding_box = Column(JSON)  # {"x": 0, "y": 0, "width": 100, "height": 100}, optional
     validation_result = Column(String, index=True)  # Index for filtering by validation result ('TP', 'FP', 'FN')
     ground_truth_match_id = Column(String(36), ForeignKey("ground_truth_objects.id", ondelete="SET NULL"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
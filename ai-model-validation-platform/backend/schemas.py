@@ -52,6 +52,7 @@ class VideoBase(BaseModel):
 class VideoResponse(VideoBase):
     id: str
     status: str
+    metadata_status: Optional[str] = None
     ground_truth_generated: bool
     project_id: str
     created_at: datetime
@@ -64,6 +65,23 @@ class VideoUploadResponse(BaseModel):
     filename: str
     status: str
     message: str
+    duplicate_of: Optional[str] = None  # Existing video with identical content, if any
+    metadata_status: Optional[str] = None  # 'pending' until duration/fps/resolution are probed
+
+# Resumable upload schemas
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(gt=0)
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    project_id: str
+    filename: str
+    total_size: int
+    bytes_received: int
+    received_ranges: List[List[int]]  # Inclusive [start, end] byte ranges
+    missing_ranges: List[List[int]]
+    complete: bool
 
 # Ground Truth schemas
 class GroundTruthObject(BaseModel):
@@ -81,6 +99,8 @@ class GroundTruthResponse(BaseModel):
     objects: List[GroundTruthObject]
     total_detections: int
     status: str
+    progress: Optional[Dict[str, Any]] = None  # Live counters while this process generates it
+    last_frame: Optional[int] = None  # Checkpoint of the video's queued or running job
 
 # Test Session schemas
 class TestSessionBase(BaseModel):
@@ -115,6 +135,7 @@ class DetectionEvent(BaseModel):
     timestamp: float
     confidence: Optional[float] = None
     class_label: Optional[str] = Field(None, alias="classLabel")
+    bounding_box: Optional[Dict[str, float]] = Field(None, alias="boundingBox")
     validation_result: Optional[str] = Field(None, alias="validationResult")
     
     class Config:
@@ -129,6 +150,9 @@ class DetectionEventResponse(DetectionEvent):
     class Config:
         from_attributes = True
 
+class DetectionEventBatch(BaseModel):
+    events: List[DetectionEvent]
+
 # Validation Result schemas
 class ValidationMetrics(BaseModel):
     true_positives: int
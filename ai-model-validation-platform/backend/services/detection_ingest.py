@@ -0,0 +1,134 @@
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import bulk_create_detection_events
+from schemas import DetectionEvent as DetectionEventSchema
+from socketio_server import sio
+from services.detection_writer import detection_writer
+from services.session_metrics import SessionMetricsAccumulator, session_metrics
+
+logger = logging.getLogger(__name__)
+
+class DetectionBatchTooLarge(ValueError):
+    pass
+
+class InvalidDetectionBatch(ValueError):
+    """One or more events failed validation; `errors` names each by index"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors[:10]))
+        self.errors = errors
+
+def detection_event_error(detection: DetectionEventSchema) -> Optional[str]:
+    """Reason a detection event is rejected, or None if it is valid"""
+    if detection.confidence is not None and (detection.confidence < 0 or detection.confidence > 1):
+        return "Confidence must be between 0 and 1"
+    if detection.timestamp < 0:
+        return "Timestamp must be non-negative"
+    return None
+
+def session_results(accumulator: SessionMetricsAccumulator) -> dict:
+    """ValidationResult body from running metrics; rates are percentages"""
+    metrics = accumulator.snapshot()
+    return {
+        "session_id": metrics["session_id"],
+        "accuracy": round(metrics["accuracy"] * 100, 1),
+        "precision": round(metrics["precision"] * 100, 1),
+        "recall": round(metrics["recall"] * 100, 1),
+        "f1_score": round(metrics["f1_score"] * 100, 1),
+        "total_detections": metrics["total_detections"],
+        "true_positives": metrics["true_positives"],
+        "false_positives": metrics["false_positives"],
+        "false_negatives": metrics["false_negatives"],
+        "status": metrics["status"]
+    }
+
+async def emit_session_metrics(accumulator: SessionMetricsAccumulator):
+    """Push the session's current metrics to its Socket.IO room"""
+    await sio.emit('session_metrics', {
+        "sessionId": accumulator.session_id,
+        **session_results(accumulator)
+    }, room=f"test_session_{accumulator.session_id}")
+
+async def ingest_detection_events(db: Session, events: List[DetectionEventSchema]) -> Dict:
+    """
+    Validate, score and store a batch of detection events, then announce them.
+
+    Events are validated together and the batch is rejected as a whole if any is invalid.
+    Rows are written with a single multi-row INSERT and commit (or handed to the write-behind
+    buffer in buffered mode), and each session's room gets one detection_events message and
+    one metrics update. Shared by the batch endpoint and the streaming ingest namespace.
+
+    Raises:
+        DetectionBatchTooLarge: More than detection_batch_max_events events
+        InvalidDetectionBatch: Any event is invalid; nothing is stored
+        DetectionBufferFull: Buffered mode and the buffer is at capacity
+    """
+    if len(events) > settings.detection_batch_max_events:
+        raise DetectionBatchTooLarge(f"Batch exceeds {settings.detection_batch_max_events} events")
+    errors = [f"Event {i}: {error}" for i, error in enumerate(map(detection_event_error, events)) if error]
+    if errors:
+        raise InvalidDetectionBatch(errors)
+
+    session_ids = list(dict.fromkeys(event.test_session_id for event in events))
+    buffered = detection_writer.active
+    if buffered:
+        # Claim buffer room before scoring, so a full buffer refuses the batch before it is counted
+        detection_writer.reserve(len(events))
+    submitted = False
+    try:
+        accumulators = {session_id: await session_metrics.get_async(db, session_id) for session_id in session_ids}
+        rows = []
+        for event in events:
+            accumulator = accumulators[event.test_session_id]
+            ground_truth_match_id = None
+            if accumulator is not None:
+                event.validation_result, ground_truth_match_id = accumulator.record(
+                    event.timestamp, event.class_label, event.bounding_box
+                )
+            rows.append({"id": str(uuid.uuid4()), **event.model_dump(),
+                         "ground_truth_match_id": ground_truth_match_id})
+        if buffered:
+            detection_writer.submit(rows, reserved=True)
+            submitted = True
+        else:
+            bulk_create_detection_events(db, rows)
+        detection_ids = [row["id"] for row in rows]
+    except Exception:
+        # Events may have been counted without being stored; rebuild from the table next time
+        for session_id in session_ids:
+            session_metrics.discard(session_id)
+        raise
+    finally:
+        if buffered and not submitted:
+            detection_writer.release(len(events))
+
+    by_session = {session_id: [] for session_id in session_ids}
+    for detection_id, event in zip(detection_ids, events):
+        by_session[event.test_session_id].append({
+            "id": detection_id,
+            "timestamp": event.timestamp,
+            "classLabel": event.class_label,
+            "confidence": event.confidence,
+            "validationResult": event.validation_result or "PENDING"
+        })
+    for session_id, session_events in by_session.items():
+        await sio.emit('detection_events', {
+            "sessionId": session_id,
+            "events": session_events
+        }, room=f"test_session_{session_id}")
+        if accumulators[session_id] is not None:
+            await emit_session_metrics(accumulators[session_id])
+
+    return {
+        "detections": [
+            {"detection_id": detection_id, "validation_result": event.validation_result}
+            for detection_id, event in zip(detection_ids, events)
+        ],
+        "count": len(detection_ids),
+        "status": "accepted" if buffered else "processed"
+    }
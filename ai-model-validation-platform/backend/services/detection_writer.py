@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from config import settings
+from database import SessionLocal
+from crud import bulk_create_detection_events
+
+logger = logging.getLogger(__name__)
+
+class DetectionBufferFull(Exception):
+    """The write-behind buffer is at capacity; the client should retry shortly"""
+    pass
+
+class DetectionWriteBuffer:
+    """
+    Write-behind buffer for detection events, used when detection_ingest_durability is 'buffered'.
+
+    Events are acknowledged once they are in this bounded in-process buffer. A background
+    flusher group-commits them with one multi-row INSERT every `flush_interval_ms`, or as
+    soon as `flush_max_events` are waiting, so an event is durable at most about one
+    interval after its ack. Anything still buffered is flushed on shutdown; a crash loses
+    at most that window. When the buffer is full, submits are refused instead of growing
+    without bound.
+    """
+
+    def __init__(self, max_events: Optional[int] = None, flush_interval_ms: Optional[int] = None,
+                 flush_max_events: Optional[int] = None):
+        self.max_events = max_events or settings.detection_buffer_max_events
+        self.flush_interval = (flush_interval_ms or settings.detection_flush_interval_ms) / 1000.0
+        self.flush_max_events = flush_max_events or settings.detection_flush_max_events
+        self._pending: Deque[dict] = deque()
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps rows in arrival order
+        self._running = False
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def active(self) -> bool:
+        """Whether events should go through the buffer (buffered mode with the flusher running)"""
+        return self._running and settings.detection_ingest_durability == "buffered"
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def reserve(self, count: int):
+        """
+        Claim room for `count` events ahead of submit(rows, reserved=True).
+
+        Callers reserve before scoring events, so a full buffer refuses them before anything
+        is counted. A reservation that is not submitted must be given back with release().
+        """
+        with self._lock:
+            if len(self._pending) + self._reserved + count > self.max_events:
+                raise DetectionBufferFull(f"Detection buffer full ({self.max_events} events)")
+            self._reserved += count
+
+    def release(self, count: int):
+        """Give back an unused reservation"""
+        with self._lock:
+            self._reserved = max(0, self._reserved - count)
+
+    def submit(self, rows: List[dict], reserved: bool = False):
+        """Queue detection event rows (with ids already assigned) for the next group commit"""
+        with self._lock:
+            if reserved:
+                self._reserved = max(0, self._reserved - len(rows))
+            elif len(self._pending) + self._reserved + len(rows) > self.max_events:
+                raise DetectionBufferFull(f"Detection buffer full ({self.max_events} events)")
+            self._pending.extend(rows)
+            ready = len(self._pending) >= self.flush_max_events
+        if ready and self._wakeup is not None:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write everything buffered so far (blocking, safe from any thread). Returns rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft()
+                             for _ in range(min(self.flush_max_events, len(self._pending)))]
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def _write(self, rows: List[dict]) -> int:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            try:
+                bulk_create_detection_events(db, rows)
+                written = len(rows)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Group commit of {len(rows)} detection events failed, retrying one by one: {str(e)}")
+                written = self._write_individually(db, rows)
+        finally:
+            db.close()
+        self.written += written
+        self.flushes += 1
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        return written
+
+    def _write_individually(self, db, rows: List[dict]) -> int:
+        """Isolate the rows that can't be stored so the rest of the batch still lands"""
+        # Imported here: session metrics flushes this buffer before rebuilding from the table
+        from services.session_metrics import session_metrics
+
+        written = 0
+        for row in rows:
+            try:
+                bulk_create_detection_events(db, [row])
+                written += 1
+            except Exception as e:
+                db.rollback()
+                self.dropped += 1
+                # The event was already counted; let the session's metrics rebuild from stored rows
+                session_metrics.discard(row["test_session_id"])
+                logger.error(f"Dropped detection event {row['id']}: {str(e)}")
+        return written
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._running:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self._running = False
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        written = await asyncio.to_thread(self.flush)
+        if written:
+            logger.info(f"Flushed {written} buffered detection events on shutdown")
+
+    async def _flush_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error(f"Error flushing detection events: {str(e)}", exc_info=True)
+
+    def stats(self) -> Dict:
+        return {
+            "durability": settings.detection_ingest_durability,
+            "active": self.active,
+            "pending": len(self._pending),
+            "reserved": self._reserved,
+            "capacity": self.max_events,
+            "flush_interval_ms": round(self.flush_interval * 1000),
+            "flush_max_events": self.flush_max_events,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+# Shared write-behind buffer for the API process
+detection_writer = DetectionWriteBuffer()
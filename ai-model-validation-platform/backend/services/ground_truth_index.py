@@ -0,0 +1,169 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import get_test_session, get_ground_truth_rows
+from services.temporal_matcher import TemporalMatcher
+from services.matching_engine import normalize_label, pairwise_iou
+
+logger = logging.getLogger(__name__)
+
+class GroundTruthIndex:
+    """
+    Ground truth for one test session in compact, time-ordered arrays.
+
+    Timestamps back a TemporalMatcher; class labels are stored as small integer codes into
+    `class_names` and bounding boxes as an (N, 4) float array of x, y, width, height (NaN
+    where a row has no box), so per-event lookups never touch the database or ORM objects.
+    """
+
+    def __init__(self, session_id: str, video_id: str, tolerance_ms: int, rows: Sequence[Tuple]):
+        self.session_id = session_id
+        self.video_id = video_id
+        self.tolerance_seconds = (tolerance_ms if tolerance_ms is not None else 100) / 1000.0
+
+        rows = sorted(rows, key=lambda row: row[1])
+        self.ids: List[str] = [row[0] for row in rows]
+        self.matcher = TemporalMatcher([row[1] for row in rows])
+
+        labels = [normalize_label(row[2]) for row in rows]
+        self.class_names: List[str] = sorted({label for label in labels if label is not None})
+        self._codes = {name: code for code, name in enumerate(self.class_names)}
+        self.class_codes = np.array([self._codes.get(label, -1) for label in labels], dtype=np.int32)
+
+        self.boxes = np.full((len(rows), 4), np.nan, dtype=np.float64)
+        for i, row in enumerate(rows):
+            box = row[3]
+            if box:
+                self.boxes[i] = (box.get("x", np.nan), box.get("y", np.nan),
+                                 box.get("width", np.nan), box.get("height", np.nan))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.matcher.sorted_timestamps
+
+    def class_code(self, class_label: Optional[str]) -> int:
+        """Code for a label, or -2 if no ground truth object has it (never equal to a stored code)"""
+        return self._codes.get(normalize_label(class_label), -2)
+
+    def window(self, timestamp: float) -> Tuple[int, int]:
+        """[lo, hi) positions of ground truth within the session tolerance of a timestamp"""
+        lo, hi = self.matcher.windows([timestamp], self.tolerance_seconds)
+        return int(lo[0]), int(hi[0])
+
+    def has_match(self, timestamp: float, class_label: Optional[str] = None,
+                  bounding_box: Optional[dict] = None, require_class: bool = False,
+                  iou_threshold: Optional[float] = None) -> bool:
+        """Whether any ground truth within tolerance satisfies the class and IoU constraints"""
+        lo, hi = self.window(timestamp)
+        if hi <= lo:
+            return False
+        eligible = np.ones(hi - lo, dtype=bool)
+        if require_class:
+            eligible &= self.class_codes[lo:hi] == self.class_code(class_label)
+        if iou_threshold is not None:
+            if not bounding_box:
+                return False
+            box = np.array([[bounding_box.get("x", np.nan), bounding_box.get("y", np.nan),
+                             bounding_box.get("width", np.nan), bounding_box.get("height", np.nan)]])
+            iou = pairwise_iou(np.repeat(box, hi - lo, axis=0), self.boxes[lo:hi])
+            eligible &= np.nan_to_num(iou, nan=-1.0) >= iou_threshold
+        return bool(eligible.any())
+
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.class_codes.nbytes + self.boxes.nbytes
+
+class GroundTruthIndexCache:
+    """
+    LRU cache of GroundTruthIndex by test session.
+
+    Indexes are built when a session starts (or on first use) with one column query, and
+    dropped when the video's ground truth changes so the next lookup rebuilds them.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or settings.ground_truth_index_cache_size
+        self._indexes: "OrderedDict[str, GroundTruthIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on invalidation so an index built from rows read before it isn't cached
+        self._video_versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[GroundTruthIndex]:
+        """Cached index for a session, without touching the database"""
+        with self._lock:
+            index = self._indexes.get(session_id)
+            if index is None:
+                self.misses += 1
+                return None
+            self._indexes.move_to_end(session_id)
+            self.hits += 1
+            return index
+
+    def load(self, db: Session, session_id: str) -> Optional[GroundTruthIndex]:
+        """Cached index for a session, building it from the database on a miss"""
+        index = self.get(session_id)
+        if index is not None:
+            return index
+
+        test_session = get_test_session(db, session_id)
+        if not test_session:
+            return None
+        video_id = str(test_session.video_id)
+        with self._lock:
+            version = self._video_versions.get(video_id, 0)
+        rows = get_ground_truth_rows(db, video_id)
+        index = GroundTruthIndex(session_id, video_id, test_session.tolerance_ms, rows)
+
+        with self._lock:
+            if self._video_versions.get(video_id, 0) != version:
+                return index  # Ground truth changed while building - serve it but don't cache it
+            self._indexes[session_id] = index
+            self._indexes.move_to_end(session_id)
+            while len(self._indexes) > self.max_sessions:
+                evicted, _ = self._indexes.popitem(last=False)
+                logger.debug(f"Evicted ground truth index for session {evicted}")
+        logger.info(f"Built ground truth index for session {session_id}: {len(index)} objects")
+        return index
+
+    def invalidate_session(self, session_id: str):
+        with self._lock:
+            self._indexes.pop(session_id, None)
+
+    def invalidate_video(self, video_id: str) -> int:
+        """Drop indexes of every session on a video whose ground truth changed"""
+        with self._lock:
+            self._video_versions[video_id] = self._video_versions.get(video_id, 0) + 1
+            stale = [sid for sid, index in self._indexes.items() if index.video_id == video_id]
+            for session_id in stale:
+                del self._indexes[session_id]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} ground truth indexes for video {video_id}")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._indexes),
+                "max_sessions": self.max_sessions,
+                "objects": sum(len(index) for index in self._indexes.values()),
+                "bytes": sum(index.nbytes() for index in self._indexes.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+# Shared ground truth indexes for the API process
+ground_truth_indexes = GroundTruthIndexCache()
@@ -1,48 +1,76 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
 import os
+import time
 import logging
 from sqlalchemy.orm import Session
 
-# Optional ML dependencies - make them optional for Docker environments without ML packages
-try:
-    from ultralytics import YOLO
-    import torch
-    ML_AVAILABLE = True
-except ImportError as e:
-    YOLO = None
-    torch = None
-    ML_AVAILABLE = False
-    logging.warning(f"ML dependencies not available: {e}. Using fallback mode.")
-
 logger = logging.getLogger(__name__)
 
+from config import settings
 from database import SessionLocal
-from crud import create_ground_truth_object, update_video_status, get_video
+from crud import (
+    bulk_create_ground_truth_objects, update_video_status, get_video,
+    get_active_processing_job, update_processing_job_checkpoint
+)
 from schemas import GroundTruthResponse, GroundTruthObject as GroundTruthObjectSchema
+from services.model_registry import ML_AVAILABLE, model_registry
+from services.inference_cache import inference_cache, hash_file, model_version
+
+def _batch_frames(frame_stream: Iterable[Tuple[int, List[Dict[str, Any]]]],
+                  size: int) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Group (frame_number, detections) into batches of about `size` detections.
+    
+    Batches always end on a frame boundary so the last frame number of a batch is
+    a safe resume checkpoint once the batch is committed.
+    """
+    batch: List[Dict[str, Any]] = []
+    last_frame = None
+    for frame_number, frame_detections in frame_stream:
+        batch.extend(frame_detections)
+        last_frame = frame_number
+        if len(batch) >= size:
+            yield last_frame, batch
+            batch = []
+            last_frame = None
+    if last_frame is not None:
+        yield last_frame, batch
+
+# Per-process service instance used by process-pool workers (model loaded once per worker)
+_worker_service: Optional["GroundTruthService"] = None
+
+def _init_worker():
+    """Process-pool initializer: build the worker's service and load its model once"""
+    global _worker_service
+    _worker_service = GroundTruthService(executor_mode="inline")
+    if _worker_service.ml_available:
+        model_registry.warm_up(_worker_service.model_name, background=False)
+    logger.info(f"Ground truth worker {os.getpid()} ready (ML available: {_worker_service.ml_available})")
+
+def _process_video_in_worker(video_id: str, video_file_path: str,
+                             job_id: Optional[str] = None, start_frame: int = 0) -> bool:
+    """Entry point for video jobs submitted to the process pool"""
+    if _worker_service is None:
+        _init_worker()
+    return _worker_service._process_video(video_id, video_file_path, job_id=job_id, start_frame=start_frame)
 
 class GroundTruthService:
-    def __init__(self):
+    def __init__(self, executor_mode: Optional[str] = None, model_name: Optional[str] = None):
         self.ml_available = ML_AVAILABLE
-        self.model = None
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.model_name = model_name or settings.ground_truth_model
+        self._model_override = None
+        self.executor_mode = executor_mode or settings.ground_truth_executor
+        self.executor = self._create_executor()
+        self._progress: Dict[str, Dict[str, Any]] = {}
         
-        if self.ml_available:
-            try:
-                # Configure torch to allow unsafe loading for YOLO models
-                torch.serialization.add_safe_globals(['ultralytics.nn.tasks.DetectionModel'])
-                
-                # Load YOLOv8 model
-                self.model = YOLO('yolov8n.pt')  # Using nano version for speed
-                logger.info("YOLO model loaded successfully")
-            except Exception as e:
-                logger.warning(f"Failed to load YOLO model: {e}. Using fallback mode.")
-                self.ml_available = False
-        else:
-            logger.warning("ML dependencies not available. Using fallback mode.")
+        # The YOLO model itself is loaded lazily through the shared model registry,
+        # so constructing the service (and importing main) stays fast
         
         # Class mapping for VRU detection
         self.vru_classes = {
@@ -53,6 +81,7 @@ class GroundTruthService:
             5: 'bus',
             7: 'truck'
         }
+        self._vru_class_ids = np.array(sorted(self.vru_classes), dtype=np.int64)
         
         # Driver behavior classes (would need custom trained model)
         self.driver_behavior_classes = {
@@ -63,38 +92,104 @@ class GroundTruthService:
             4: 'aggressive'
         }
     
-    async def process_video_async(self, video_id: str, video_file_path: str):
-        """Process video asynchronously to generate ground truth"""
+    @property
+    def model(self):
+        """Detection model, loaded from the model registry on first use (None if unavailable)"""
+        if self._model_override is not None:
+            return self._model_override
+        if not self.ml_available:
+            return None
+        return model_registry.get(self.model_name)
+    
+    @model.setter
+    def model(self, value):
+        self._model_override = value
+    
+    def warm_up(self, background: bool = True):
+        """
+        Load the model and run a dummy inference ahead of the first video.
+        
+        Does nothing in 'process' mode: inference runs in the pool workers, which warm
+        their own model in _init_worker, so a copy here would only hold memory.
+        """
+        if self.executor_mode == "process":
+            return None
+        if self.ml_available:
+            return model_registry.warm_up(self.model_name, background=background)
+        return None
+    
+    def _create_executor(self) -> Optional[Executor]:
+        """
+        Create the pool that runs video jobs.
+        
+        'process' runs jobs in separate worker processes so decoding and post-processing
+        do not compete with the API for the GIL; each worker loads the model once and
+        pulls jobs from the pool's call queue. 'thread' keeps jobs in this process and
+        'inline' (used inside workers) creates no pool at all.
+        """
+        workers = settings.ground_truth_workers
+        if self.executor_mode == "process":
+            return ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        if self.executor_mode == "thread":
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ground-truth")
+        return None
+    
+    async def process_video_async(self, video_id: str, video_file_path: str,
+                                  job_id: Optional[str] = None, start_frame: int = 0) -> bool:
+        """Process video asynchronously to generate ground truth. Returns True on success."""
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(self.executor, self._process_video, video_id, video_file_path)
+        if self.executor_mode == "process":
+            return await loop.run_in_executor(
+                self.executor, _process_video_in_worker, video_id, video_file_path, job_id, start_frame
+            )
+        return await loop.run_in_executor(
+            self.executor, partial(self._process_video, video_id, video_file_path,
+                                   job_id=job_id, start_frame=start_frame)
+        )
+    
+    def shutdown(self, wait: bool = False):
+        """Stop the worker pool, cancelling jobs that have not started"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
     
-    def _process_video(self, video_id: str, video_file_path: str):
-        """Process video synchronously using YOLO for ground truth generation"""
+    def _process_video(self, video_id: str, video_file_path: str,
+                       job_id: Optional[str] = None, start_frame: int = 0) -> bool:
+        """
+        Process video synchronously using YOLO for ground truth generation.
+        
+        When run for a queued job, each committed batch also records the job's last
+        processed frame, and start_frame resumes after a previously saved checkpoint.
+        Returns True on success and False if processing failed.
+        """
         db = SessionLocal()
         
         try:
             # Update video status to processing
             update_video_status(db, video_id, "processing")
             
+            # Only the ML flag is checked here: the model itself is loaded on a cache miss,
+            # so replaying cached detections never touches the registry
             if not self.ml_available:
                 logger.warning(f"ML not available. Skipping ground truth generation for video {video_id}")
                 # Update video status to indicate ML is not available
                 update_video_status(db, video_id, "ml_unavailable")
-                return
+                return True
             
-            # Process video with YOLO  
-            detections = self._extract_detections(video_file_path)
-            
-            # Store ground truth objects in database
-            for detection in detections:
-                create_ground_truth_object(
-                    db=db,
-                    video_id=video_id,
-                    timestamp=detection["timestamp"],
-                    class_label=detection["class_label"],
-                    bounding_box=detection["bounding_box"],
-                    confidence=detection["confidence"]
-                )
+            # Stream detections from YOLO straight into batched multi-row inserts so
+            # memory stays flat and committed batches are queryable while processing
+            progress = {"frames_processed": 0, "total_frames": 0, "detections": 0}
+            self._progress[video_id] = progress
+            if start_frame:
+                logger.info(f"Resuming ground truth generation for video {video_id} after frame {start_frame}")
+            frame_stream = self._iter_frame_detections(video_file_path, progress=progress, start_frame=start_frame)
+            self._store_detections(db, video_id, frame_stream, job_id=job_id)
+            if progress.get("model_unavailable"):
+                update_video_status(db, video_id, "ml_unavailable")
+                return True
             
             # Update video status and mark ground truth as generated
             video = get_video(db, video_id)
@@ -102,75 +197,287 @@ class GroundTruthService:
                 video.status = "completed"
                 video.ground_truth_generated = True
                 db.commit()
+            return True
             
         except Exception as e:
             print(f"Error processing video {video_id}: {str(e)}")
+            db.rollback()
             update_video_status(db, video_id, "failed")
+            return False
         finally:
+            self._progress.pop(video_id, None)
             db.close()
     
+    def _store_detections(self, db: Session, video_id: str,
+                          frame_stream: Iterable[Tuple[int, List[Dict[str, Any]]]],
+                          job_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Persist streamed (frame_number, detections) in batches of about
+        settings.ground_truth_batch_size rows and report ingest throughput.
+        If job_id is given, the job checkpoint is committed together with each batch.
+        """
+        batch_size = settings.ground_truth_batch_size
+        commit_per_batch = settings.ground_truth_commit_per_batch
+        
+        rows_written = 0
+        batches = 0
+        start_time = time.perf_counter()
+        
+        for last_frame, batch in _batch_frames(frame_stream, batch_size):
+            rows_written += bulk_create_ground_truth_objects(db, video_id, batch, commit=False)
+            if job_id:
+                update_processing_job_checkpoint(db, job_id, last_frame, commit=False)
+            if commit_per_batch:
+                db.commit()
+            batches += 1
+        
+        if not commit_per_batch:
+            db.commit()
+        
+        elapsed = time.perf_counter() - start_time
+        rows_per_second = rows_written / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Stored {rows_written} ground truth objects for video {video_id} "
+            f"in {batches} batches ({elapsed:.2f}s, {rows_per_second:.0f} rows/sec)"
+        )
+        
+        return {
+            "rows": rows_written,
+            "batches": batches,
+            "seconds": elapsed,
+            "rows_per_second": rows_per_second
+        }
+    
     def _extract_detections(self, video_path: str) -> List[Dict[str, Any]]:
-        """Extract detections from video using YOLO"""
-        if not self.ml_available or not self.model:
-            logger.warning("ML not available. Returning empty detections.")
+        """Extract all detections from video using YOLO (materialized list)"""
+        try:
+            return [
+                detection
+                for _, frame_detections in self._iter_frame_detections(video_path)
+                for detection in frame_detections
+            ]
+        except Exception:
             return []
+    
+    def _iter_frame_detections(self, video_path: str, progress: Optional[Dict[str, Any]] = None,
+                               start_frame: int = 0) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Stream detections from video using YOLO, one sampled frame at a time.
         
-        detections = []
+        Yields (frame_number, detections) as each frame is processed so callers can
+        persist results incrementally instead of holding the whole video in memory.
+        If a progress dict is supplied it is updated in place, with model_unavailable set
+        when the model cannot be loaded. Frames up to and including start_frame (1-based)
+        are skipped.
+        """
+        if not self.ml_available:
+            logger.warning("ML not available. Returning empty detections.")
+            return
         
+        cap = cv2.VideoCapture(video_path)
+        cache_writer = None
         try:
-            # Open video
-            cap = cv2.VideoCapture(video_path)
             fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = 0
+            if progress is not None:
+                progress["total_frames"] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            # Identical content + model + sampling means identical detections, so replay
+            # cached results without loading the model or decoding a single frame
+            cache_key = self._inference_cache_key(video_path, fps)
+            if cache_key:
+                cached_frames = inference_cache.read(cache_key)
+                if cached_frames is not None:
+                    logger.info(f"Using cached detections for {video_path}")
+                    yield from self._replay_cached_frames(cached_frames, progress, start_frame)
+                    return
             
-                frame_count += 1
-
-                # Process every 5th frame for efficiency
-                if frame_count % 5 != 0:
-                    continue
-
-                # Calculate timestamp in seconds
-                timestamp = (frame_count - 1) / fps
-                
-                # Run YOLO inference
-                results = self.model(frame, verbose=False)
-
-                # Process detections
-                if boxes is not None:
-                    for box in boxes:
-                        # Get class ID and confidence
-                        class_id = int(box.cls.cpu().numpy()[0])
-                        confidence = float(box.conf.cpu().numpy()[0])
-                        
-                        # Only process VRU-related classes with high confidence
-                        if class_id in self.vru_classes and confidence > 0.5:
-                            # Get bounding box coordinates
-                            x1, y1, x2, y2 = box.xyxy.cpu().numpy()[0]
-                            
-                            detection = {
-                                "timestamp": timestamp,
-                                "class_label": self.vru_classes[class_id],
-                                "bounding_box": {
-                                    "x": float(x1),
-                                    "y": float(y1),
-                                    "width": float(x2 - x1),
-                                    "height": float(y2 - y1)
-                                },
-                                "confidence": confidence
-                            }
-                            detections.append(detection)
-        
-            cap.release()
-            return detections
+            model = self.model
+            if model is None:
+                logger.warning("ML not available. Returning empty detections.")
+                if progress is not None:
+                    progress["model_unavailable"] = True
+                return
+            
+            # Only a full pass produces a complete cache entry
+            if cache_key and start_frame == 0:
+                cache_writer = inference_cache.writer(cache_key)
+            
+            for frame_number, frame_detections in self._iter_model_detections(cap, fps, model, progress, start_frame):
+                if cache_writer is not None:
+                    cache_writer.write(frame_number, frame_detections)
+                yield frame_number, frame_detections
+            
+            if cache_writer is not None:
+                cache_writer.commit()
+                cache_writer = None
             
         except Exception as e:
             logger.error(f"Error processing video {video_path}: {e}")
+            raise
+        finally:
+            if cache_writer is not None:
+                cache_writer.abort()
+            cap.release()
+    
+    def _iter_model_detections(self, cap, fps: float, model, progress: Optional[Dict[str, Any]],
+                               start_frame: int) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Run the model over sampled frames of an open capture, one batch per call"""
+        batch_size = settings.ground_truth_inference_batch_size
+        pending_frames = []
+        
+        for frame_number, timestamp, frame in self._iter_sampled_frames(cap, fps, start_frame):
+            pending_frames.append((frame_number, timestamp, frame))
+            
+            # Run YOLO once per batch of sampled frames
+            if len(pending_frames) >= batch_size:
+                yield from self._run_inference_batch(model, pending_frames, progress)
+                pending_frames = []
+        
+        if pending_frames:
+            yield from self._run_inference_batch(model, pending_frames, progress)
+    
+    def _inference_cache_key(self, video_path: str, fps: float) -> Optional[str]:
+        """Cache key for this video under the current model and sampling settings, or None if caching is off"""
+        if not settings.inference_cache_enabled:
+            return None
+        try:
+            file_hash = hash_file(video_path)
+        except OSError as e:
+            logger.warning(f"Could not hash {video_path} for the inference cache: {e}")
+            return None
+        stride = self._get_frame_stride(fps if fps and fps > 0 else 30.0)
+        return inference_cache.make_key(
+            file_hash, self.model_name, model_version(self.model_name),
+            stride, settings.ground_truth_confidence_threshold
+        )
+    
+    def _replay_cached_frames(self, cached_frames: Iterable[Tuple[int, List[Dict[str, Any]]]],
+                              progress: Optional[Dict[str, Any]],
+                              start_frame: int) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        for frame_number, frame_detections in cached_frames:
+            if frame_number <= start_frame:
+                continue
+            if progress is not None:
+                progress["frames_processed"] = frame_number
+                progress["detections"] = progress.get("detections", 0) + len(frame_detections)
+            yield frame_number, frame_detections
+    
+    def _get_frame_stride(self, fps: float) -> int:
+        """Sampling stride in frames, from settings (seconds-based interval wins if configured)"""
+        interval_seconds = settings.ground_truth_sample_interval_seconds
+        if interval_seconds:
+            return max(1, int(round(interval_seconds * fps)))
+        return settings.ground_truth_frame_stride
+    
+    def _iter_sampled_frames(self, cap, fps: float, start_frame: int = 0) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        Yield (frame_number, timestamp, frame) for every stride-th frame of an open capture.
+        
+        Skipped frames are only demuxed with cap.grab() rather than decoded, and for large
+        strides the capture seeks straight to the next sampled frame, so decode cost scales
+        with the number of frames analysed. Frame numbers are 1-based and timestamps are
+        derived from the exact frame index. Sampling resumes after start_frame when given.
+        """
+        if not fps or fps <= 0:
+            logger.warning("Video reports no frame rate, assuming 30 fps for timestamps")
+            fps = 30.0
+        
+        stride = self._get_frame_stride(fps)
+        use_seek = stride >= settings.ground_truth_seek_stride_threshold
+        
+        # 0-based index of the next frame the decoder will return
+        position = 0
+        target = stride - 1
+        if start_frame > 0:
+            # Next sampled frame after the checkpoint, on the same stride grid as a fresh run
+            target = ((start_frame // stride) + 1) * stride - 1
+            if not cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame):
+                return
+            position = start_frame
+        
+        while True:
+            if use_seek and target > position:
+                if not cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                    return
+                position = target
+            else:
+                while position < target:
+                    if not cap.grab():
+                        return
+                    position += 1
+            
+            ret, frame = cap.read()
+            if not ret:
+                return
+            position += 1
+            
+            yield target + 1, target / fps, frame
+            target += stride
+    
+    def _run_inference_batch(self, model, pending_frames: List[Tuple[int, float, np.ndarray]],
+                             progress: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Run YOLO on a batch of (frame_number, timestamp, frame) and split results back out per frame"""
+        results = model([frame for _, _, frame in pending_frames], verbose=False)
+        
+        for (frame_number, timestamp, _), result in zip(pending_frames, results):
+            frame_detections = self._boxes_to_detections(result.boxes, timestamp)
+            
+            if progress is not None:
+                progress["frames_processed"] = frame_number
+                progress["detections"] = progress.get("detections", 0) + len(frame_detections)
+            
+            yield frame_number, frame_detections
+    
+    def _boxes_to_detections(self, boxes, timestamp: float) -> List[Dict[str, Any]]:
+        """
+        Convert YOLO boxes for one frame into VRU detection dicts.
+        
+        Class, confidence and coordinate tensors are moved to numpy once per frame
+        and filtered with a single mask instead of per-box transfers and branches.
+        """
+        if boxes is None or len(boxes) == 0:
             return []
+        
+        class_ids = boxes.cls.cpu().numpy().astype(np.int64)
+        confidences = boxes.conf.cpu().numpy()
+        coordinates = boxes.xyxy.cpu().numpy()
+        
+        # Only keep VRU-related classes with high confidence
+        keep = np.isin(class_ids, self._vru_class_ids) & (confidences > settings.ground_truth_confidence_threshold)
+        if not keep.any():
+            return []
+        
+        class_ids = class_ids[keep]
+        confidences = confidences[keep]
+        coordinates = coordinates[keep]
+        widths = coordinates[:, 2] - coordinates[:, 0]
+        heights = coordinates[:, 3] - coordinates[:, 1]
+        
+        return [
+            {
+                "timestamp": timestamp,
+                "class_label": self.vru_classes[class_id],
+                "bounding_box": {
+                    "x": x1,
+                    "y": y1,
+                    "width": width,
+                    "height": height
+                },
+                "confidence": confidence
+            }
+            for class_id, confidence, (x1, y1), width, height in zip(
+                class_ids.tolist(),
+                confidences.tolist(),
+                coordinates[:, :2].tolist(),
+                widths.tolist(),
+                heights.tolist()
+            )
+        ]
+    
+    def get_progress(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Get live processing progress for a video, or None if it is not being processed"""
+        progress = self._progress.get(video_id)
+        return dict(progress) if progress is not None else None
     
     def get_ground_truth(self, video_id: str) -> GroundTruthResponse:
         """Get ground truth data for a video"""
@@ -191,11 +498,22 @@ class GroundTruthService:
                 for obj in objects
             ]
             
+            # Objects committed so far are returned while processing is still running.
+            # Process-pool workers track progress in their own process, so the job's
+            # checkpoint and the video status are what this process can see of them
+            video = get_video(db, video_id)
+            job = get_active_processing_job(db, video_id)
+            progress = self.get_progress(video_id)
+            processing = (progress is not None or job is not None
+                          or (video is not None and video.status == "processing"))
+            
             return GroundTruthResponse(
                 video_id=video_id,
                 objects=ground_truth_objects,
                 total_detections=len(ground_truth_objects),
-                status="completed"
+                status="processing" if processing else "completed",
+                progress=progress,
+                last_frame=job.last_frame if job else None
             )
             
         finally:
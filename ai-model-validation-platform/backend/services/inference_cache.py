@@ -0,0 +1,135 @@
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB reads while hashing
+
+# (path, size, mtime) -> sha256, so a file is only hashed once per process while unchanged
+_file_hashes: Dict[Tuple[str, int, float], str] = {}
+_file_hashes_lock = threading.Lock()
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """SHA-256 of a file's contents, read in chunks so large videos never sit in memory"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    file_hash = digest.hexdigest()
+
+    with _file_hashes_lock:
+        _file_hashes[memo_key] = file_hash
+    return file_hash
+
+def model_version(model_name: str) -> str:
+    """
+    Version tag for a model's weights.
+
+    Local weight files are identified by size and mtime so retrained weights under the
+    same name don't reuse stale results; named variants fall back to the ultralytics version.
+    """
+    if os.path.exists(model_name):
+        stat = os.stat(model_name)
+        return f"{stat.st_size}-{int(stat.st_mtime)}"
+    try:
+        return importlib.metadata.version("ultralytics")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+class InferenceCache:
+    """
+    Content-addressed on-disk cache of per-frame detection results.
+
+    Entries are keyed by the video's SHA-256 plus model name/version, sampling stride and
+    confidence threshold, so the same clip uploaded to another project (or reprocessed
+    after a crash) skips inference entirely. Each entry is an NDJSON file with one
+    {"frame": n, "detections": [...]} line per sampled frame. Entries are written to a
+    temporary file and renamed into place only once the whole video has been processed,
+    so a partially processed video never produces a truncated entry.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or settings.inference_cache_dir
+
+    def make_key(self, file_hash: str, model_name: str, version: str, stride: int,
+                 confidence_threshold: float) -> str:
+        key_source = json.dumps(
+            [file_hash, os.path.basename(model_name), version, stride, confidence_threshold]
+        )
+        return hashlib.sha256(key_source.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.ndjson")
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._entry_path(key))
+
+    def read(self, key: str) -> Optional[Iterator[Tuple[int, List[Dict[str, Any]]]]]:
+        """Return an iterator of (frame_number, detections) for a cached entry, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            f = open(path, "r")
+        except FileNotFoundError:
+            return None
+        return self._iter_entry(f)
+
+    def _iter_entry(self, f) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        with f:
+            for line in f:
+                record = json.loads(line)
+                yield record["frame"], record["detections"]
+
+    def writer(self, key: str) -> "InferenceCacheWriter":
+        return InferenceCacheWriter(self._entry_path(key))
+
+    def invalidate(self, key: str) -> bool:
+        try:
+            os.remove(self._entry_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+class InferenceCacheWriter:
+    """Streams frames into a temporary file and publishes it atomically on commit()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        self._file = os.fdopen(fd, "w")
+
+    def write(self, frame_number: int, detections: List[Dict[str, Any]]):
+        self._file.write(json.dumps({"frame": frame_number, "detections": detections}))
+        self._file.write("\n")
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+# Shared cache instance
+inference_cache = InferenceCache()
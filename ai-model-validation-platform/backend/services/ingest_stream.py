@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, Optional
+
+import socketio
+from pydantic import ValidationError
+
+from config import settings
+from database import SessionLocal
+from schemas import DetectionEvent as DetectionEventSchema
+from services.detection_writer import DetectionBufferFull
+from services.detection_ingest import (
+    ingest_detection_events, DetectionBatchTooLarge, InvalidDetectionBatch
+)
+
+logger = logging.getLogger(__name__)
+
+INGEST_NAMESPACE = "/ingest"
+
+class IngestNamespace(socketio.AsyncNamespace):
+    """
+    Persistent detection event channel for Raspberry Pi clients (Socket.IO namespace /ingest).
+
+    A client connects once and streams `events` messages ({"seq": n, "events": [...]}) over
+    the same connection instead of making one HTTP request per event. Flow control is
+    credit based: `hello` grants the client a window of `ingest_stream_credits` messages, each
+    message spends one credit, and its ack returns it once the batch has been stored (or
+    accepted by the write-behind buffer). A client therefore never has more than the window
+    in flight, and a slow database slows the client down instead of queueing without bound.
+
+    Every message is acknowledged with {"seq", "credit", ...} plus either the per-event
+    results of the batch endpoint or {"error", "retry"}; `retry` is true when resending the
+    same message later can succeed. Retryable errors caused by load rather than by the
+    message (out of credit, a full write buffer) also carry "busy": true, so clients can
+    retry those indefinitely while capping retries of everything else.
+    """
+
+    def __init__(self, namespace: str = INGEST_NAMESPACE, credits: Optional[int] = None):
+        super().__init__(namespace)
+        self.credits = credits or settings.ingest_stream_credits
+        self._available: Dict[str, int] = {}
+
+    async def on_connect(self, sid, environ, auth=None):
+        self._available[sid] = self.credits
+        logger.info(f"Ingest client {sid} connected")
+
+    async def on_disconnect(self, sid):
+        self._available.pop(sid, None)
+        logger.info(f"Ingest client {sid} disconnected")
+
+    async def on_hello(self, sid, data=None):
+        """Handshake: tells the client its window and the largest batch per message"""
+        return {
+            "credit": self._available.get(sid, 0),
+            "max_events": settings.detection_batch_max_events
+        }
+
+    async def on_events(self, sid, data):
+        seq = data.get("seq") if isinstance(data, dict) else None
+        if self._available.get(sid, 0) <= 0:
+            # Out of credit: the message was not processed and no credit is returned
+            return {"seq": seq, "credit": 0, "error": "No credit available", "retry": True, "busy": True}
+        self._available[sid] -= 1
+        try:
+            return {"seq": seq, **await self._ingest(data)}
+        finally:
+            if sid in self._available:
+                self._available[sid] += 1
+
+    async def _ingest(self, data) -> Dict:
+        try:
+            events = [DetectionEventSchema.model_validate(event) for event in data["events"]]
+        except (KeyError, TypeError, ValidationError) as e:
+            return {"credit": 1, "error": f"Malformed events message: {str(e)}", "retry": False}
+
+        db = SessionLocal()
+        try:
+            result = await ingest_detection_events(db, events)
+            return {"credit": 1, **result}
+        except (DetectionBatchTooLarge, InvalidDetectionBatch) as e:
+            return {"credit": 1, "error": str(e), "retry": False}
+        except DetectionBufferFull as e:
+            return {"credit": 1, "error": str(e), "retry": True, "busy": True}
+        except Exception as e:
+            logger.error(f"Streaming ingest error: {str(e)}", exc_info=True)
+            return {"credit": 1, "error": "Failed to process detection events", "retry": True}
+        finally:
+            db.close()
@@ -0,0 +1,252 @@
+import importlib.util
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from services.temporal_matcher import TemporalMatcher, UNMATCHED
+
+SCIPY_AVAILABLE = importlib.util.find_spec("scipy") is not None
+if SCIPY_AVAILABLE:
+    from scipy.optimize import linear_sum_assignment
+else:
+    linear_sum_assignment = None
+
+MATCH_MODES = ("greedy", "hungarian")
+
+def boxes_to_array(boxes: Iterable[Optional[dict]]) -> np.ndarray:
+    """(N, 4) array of x, y, width, height from bounding box dicts; NaN where a box is missing"""
+    rows = [
+        (box.get("x", np.nan), box.get("y", np.nan), box.get("width", np.nan), box.get("height", np.nan))
+        if box else (np.nan, np.nan, np.nan, np.nan)
+        for box in boxes
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+def pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise IoU of two (N, 4) x/y/width/height arrays. Missing boxes give NaN."""
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    intersection = inter_w * inter_h
+    union = a[:, 2] * a[:, 3] + b[:, 2] * b[:, 3] - intersection
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(union > 0, intersection / union, 0.0) * np.where(np.isnan(union), np.nan, 1.0)
+
+def normalize_label(label: Optional[str]) -> Optional[str]:
+    return label.strip().lower() if label else None
+
+class MatchingEngine:
+    """
+    Matches detections to ground truth by time, optionally requiring class agreement and a
+    minimum bounding-box IoU, with greedy or optimal (Hungarian) assignment.
+
+    Without class or IoU constraints greedy matching is delegated to TemporalMatcher and is
+    identical to the original validation loop. With constraints, every (detection, ground
+    truth) pair inside the tolerance windows is generated at once and class/IoU checks are
+    vectorized over all of them. Greedy then walks detections in order, each claiming the
+    eligible unclaimed object with the highest IoU (or, without IoU, the first in list
+    order). Hungarian mode maximizes the number of matches, preferring higher IoU (or
+    smaller time offset), and is solved per connected group of overlapping candidates so
+    long sessions decompose into many tiny assignment problems.
+    """
+
+    def __init__(self, gt_timestamps: Sequence[float], gt_class_labels: Optional[Sequence[Optional[str]]] = None,
+                 gt_boxes: Optional[np.ndarray] = None):
+        self.temporal = TemporalMatcher(gt_timestamps)
+        order = self.temporal.order
+        size = len(order)
+
+        labels = [normalize_label(label) for label in gt_class_labels] if gt_class_labels is not None else [None] * size
+        self.class_names: List[str] = sorted({label for label in labels if label is not None})
+        self._codes = {name: code for code, name in enumerate(self.class_names)}
+        codes = np.array([self._codes.get(label, -1) for label in labels], dtype=np.int64)
+        # Sorted-position views so candidate windows index them directly
+        self.sorted_class_codes = codes[order] if size else codes
+        boxes = gt_boxes if gt_boxes is not None else np.full((size, 4), np.nan)
+        self.sorted_boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)[order]
+
+    @classmethod
+    def from_objects(cls, ground_truth_objects: Sequence[Any]) -> "MatchingEngine":
+        """Build from GroundTruthObject rows (timestamp, class_label, bounding_box)"""
+        return cls(
+            [obj.timestamp for obj in ground_truth_objects],
+            [getattr(obj, "class_label", None) for obj in ground_truth_objects],
+            boxes_to_array(getattr(obj, "bounding_box", None) for obj in ground_truth_objects)
+        )
+
+    def __len__(self) -> int:
+        return len(self.temporal)
+
+    def class_codes_for(self, labels: Sequence[Optional[str]]) -> np.ndarray:
+        """Codes in this engine's vocabulary; unknown or missing labels get -2 and never agree"""
+        return np.array([self._codes.get(normalize_label(label), -2) for label in labels], dtype=np.int64)
+
+    def candidate_pairs(self, detection_timestamps: Sequence[float], tolerance: float):
+        """All (detection index, sorted ground truth position) pairs within tolerance"""
+        lo, hi = self.temporal.windows(detection_timestamps, tolerance)
+        counts = hi - lo
+        detections = np.repeat(np.arange(len(lo)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(lo, counts) + offsets
+        return detections, positions
+
+    def match(self, detection_timestamps: Sequence[float], tolerance: float,
+              detection_class_labels: Optional[Sequence[Optional[str]]] = None,
+              detection_boxes: Optional[np.ndarray] = None, require_class: bool = False,
+              iou_threshold: Optional[float] = None, mode: str = "greedy") -> np.ndarray:
+        """
+        Assign detections to ground truth.
+
+        Returns:
+            np.ndarray: Ground truth list index matched by each detection, or -1 (false positive)
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown matching mode '{mode}', expected one of {MATCH_MODES}")
+        timestamps = np.asarray(detection_timestamps, dtype=np.float64)
+        if mode == "greedy" and not require_class and iou_threshold is None:
+            return self.temporal.match(timestamps, tolerance)
+
+        detections, positions = self.candidate_pairs(timestamps, tolerance)
+        eligible = np.ones(len(detections), dtype=bool)
+        if require_class:
+            labels = detection_class_labels if detection_class_labels is not None else [None] * len(timestamps)
+            eligible &= self.sorted_class_codes[positions] == self.class_codes_for(labels)[detections]
+        iou = None
+        if iou_threshold is not None:
+            boxes = detection_boxes if detection_boxes is not None else np.full((len(timestamps), 4), np.nan)
+            boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+            iou = pairwise_iou(boxes[detections], self.sorted_boxes[positions])
+            eligible &= np.nan_to_num(iou, nan=-1.0) >= iou_threshold
+            iou = iou[eligible]
+        detections, positions = detections[eligible], positions[eligible]
+        list_indices = self.temporal.order[positions]
+
+        if mode == "greedy":
+            matches = self._greedy(len(timestamps), detections, list_indices, iou)
+        else:
+            if iou is not None:
+                cost = 1.0 - iou
+            else:
+                cost = np.abs(self.temporal.sorted_timestamps[positions] - timestamps[detections]) / max(tolerance, 1e-12)
+            matches = self._hungarian(len(timestamps), detections, list_indices, cost)
+        return np.asarray(matches, dtype=np.int64)
+
+    def _greedy(self, num_detections: int, detections: np.ndarray, list_indices: np.ndarray,
+                iou: Optional[np.ndarray]) -> List[int]:
+        # Each detection's candidates in preference order: highest IoU, then earliest in list
+        if iou is not None:
+            order = np.lexsort((list_indices, -iou, detections))
+        else:
+            order = np.lexsort((list_indices, detections))
+        matches = [UNMATCHED] * num_detections
+        claimed = bytearray(len(self.temporal))
+        for d, g in zip(detections[order].tolist(), list_indices[order].tolist()):
+            if matches[d] == UNMATCHED and not claimed[g]:
+                matches[d] = g
+                claimed[g] = 1
+        return matches
+
+    def _hungarian(self, num_detections: int, detections: np.ndarray, list_indices: np.ndarray,
+                   cost: np.ndarray) -> List[int]:
+        matches = [UNMATCHED] * num_detections
+        if len(detections) == 0:
+            return matches
+
+        # Connected groups of the bipartite candidate graph (ground truth nodes offset by D)
+        parent = list(range(num_detections + len(self.temporal)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        det_list = detections.tolist()
+        gt_list = list_indices.tolist()
+        for d, g in zip(det_list, gt_list):
+            a, b = find(d), find(num_detections + g)
+            if a != b:
+                parent[a] = b
+
+        groups = {}
+        for pair, d in enumerate(det_list):
+            groups.setdefault(find(d), []).append(pair)
+
+        cost_list = cost.tolist()
+        for pairs in groups.values():
+            if len(pairs) == 1:
+                pair = pairs[0]
+                matches[det_list[pair]] = gt_list[pair]
+                continue
+            rows = sorted({det_list[p] for p in pairs})
+            cols = sorted({gt_list[p] for p in pairs})
+            row_of = {d: i for i, d in enumerate(rows)}
+            col_of = {g: j for j, g in enumerate(cols)}
+            # Ineligible pairs cost more than any full set of eligible ones, so the number of
+            # real matches is maximized first and match quality second
+            blocked = float(len(pairs) + 1)
+            matrix = np.full((len(rows), len(cols)), blocked)
+            for p in pairs:
+                matrix[row_of[det_list[p]], col_of[gt_list[p]]] = cost_list[p]
+            for i, j in zip(*solve_assignment(matrix)):
+                if matrix[i, j] < blocked:
+                    matches[rows[i]] = cols[j]
+        return matches
+
+def solve_assignment(cost: np.ndarray):
+    """Minimum-cost rectangular assignment; uses SciPy when installed"""
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    return _hungarian_assignment(cost)
+
+def _hungarian_assignment(cost: np.ndarray):
+    """O(n^2 m) Hungarian algorithm with potentials for an n x m cost matrix"""
+    transposed = cost.shape[0] > cost.shape[1]
+    matrix = cost.T if transposed else cost
+    n, m = matrix.shape
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    assigned_row = [0] * (m + 1)  # Column j (1-based) is assigned to row assigned_row[j]
+    way = [0] * (m + 1)
+    values = matrix.tolist()
+    for i in range(1, n + 1):
+        assigned_row[0] = i
+        j0 = 0
+        min_to = [float("inf")] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = assigned_row[j0]
+            delta = float("inf")
+            j1 = 0
+            row = values[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u[i0] - v[j]
+                    if reduced < min_to[j]:
+                        min_to[j] = reduced
+                        way[j] = j0
+                    if min_to[j] < delta:
+                        delta = min_to[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[assigned_row[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_to[j] -= delta
+            j0 = j1
+            if assigned_row[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            assigned_row[j0] = assigned_row[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    pairs = sorted((assigned_row[j] - 1, j - 1) for j in range(1, m + 1) if assigned_row[j])
+    rows = np.array([r for r, _ in pairs], dtype=np.int64)
+    cols = np.array([c for _, c in pairs], dtype=np.int64)
+    return (cols, rows) if transposed else (rows, cols)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from config import settings
+from database import SessionLocal
+from crud import update_video_metadata, get_videos_pending_metadata
+
+logger = logging.getLogger(__name__)
+
+def extract_video_metadata(file_path: str) -> Optional[dict]:
+    """
+    Extract video metadata using OpenCV.
+
+    Args:
+        file_path: Path to the video file
+
+    Returns:
+        dict: Video metadata including duration and resolution, or None if extraction fails
+    """
+    try:
+        import cv2
+
+        cap = cv2.VideoCapture(file_path)
+        if not cap.isOpened():
+            logger.warning(f"Could not open video file: {file_path}")
+            return None
+
+        # Get video properties
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Calculate duration
+        duration = frame_count / fps if fps > 0 else None
+
+        cap.release()
+
+        metadata = {
+            "duration": duration,
+            "fps": fps,
+            "resolution": f"{width}x{height}",
+            "width": width,
+            "height": height,
+            "frame_count": int(frame_count)
+        }
+
+        logger.info(f"Extracted video metadata: {metadata}")
+        return metadata
+
+    except Exception as e:
+        logger.error(f"Failed to extract video metadata from {file_path}: {str(e)}")
+        return None
+
+class VideoMetadataProber:
+    """
+    Fills in video duration/fps/resolution after upload instead of during it.
+
+    Uploads record the video with metadata_status 'pending' and schedule a probe; a
+    bounded number of probes run in worker threads and write their results back with
+    status 'ready' (or 'failed'). Results are cached by content hash so identical files
+    are only ever opened once, and pending probes are rescheduled after a restart.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, cache_size: Optional[int] = None):
+        self.concurrency = concurrency or settings.metadata_probe_concurrency
+        self.cache_size = cache_size or settings.metadata_cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def cached(self, file_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Previously probed metadata for this content, if any"""
+        if not file_hash:
+            return None
+        with self._cache_lock:
+            metadata = self._cache.get(file_hash)
+            if metadata is not None:
+                self._cache.move_to_end(file_hash)
+            return metadata
+
+    def remember(self, file_hash: Optional[str], metadata: Optional[Dict[str, Any]]):
+        if not file_hash or not metadata:
+            return
+        with self._cache_lock:
+            self._cache[file_hash] = metadata
+            self._cache.move_to_end(file_hash)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def probe(self, file_path: str, file_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Blocking probe that consults and fills the hash cache"""
+        metadata = self.cached(file_hash)
+        if metadata is None:
+            metadata = extract_video_metadata(file_path)
+            self.remember(file_hash, metadata)
+        return metadata
+
+    def schedule(self, video_id: str, file_path: str, file_hash: Optional[str] = None) -> asyncio.Task:
+        """Probe a video in the background and store the result on its record"""
+        task = asyncio.create_task(self._probe_and_store(video_id, file_path, file_hash))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _probe_and_store(self, video_id: str, file_path: str, file_hash: Optional[str]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            try:
+                metadata = await asyncio.to_thread(self.probe, file_path, file_hash)
+                await asyncio.to_thread(self._store, video_id, metadata)
+            except Exception as e:
+                logger.error(f"Metadata probe failed for video {video_id}: {str(e)}", exc_info=True)
+
+    def _store(self, video_id: str, metadata: Optional[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            update_video_metadata(db, video_id, metadata, "ready" if metadata else "failed")
+        finally:
+            db.close()
+
+    async def resume_pending(self) -> int:
+        """Reschedule probes for videos left pending by a previous process"""
+        db = SessionLocal()
+        try:
+            pending = [(video.id, video.file_path, video.file_hash) for video in get_videos_pending_metadata(db)]
+        finally:
+            db.close()
+
+        for video_id, file_path, file_hash in pending:
+            self.schedule(video_id, file_path, file_hash)
+        if pending:
+            logger.info(f"Rescheduled metadata probes for {len(pending)} videos")
+        return len(pending)
+
+    async def drain(self):
+        """Wait for all scheduled probes to finish"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+# Shared prober for the API process
+metadata_prober = VideoMetadataProber()
@@ -0,0 +1,146 @@
+import importlib.util
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional ML dependencies - only check they are installed here; the (slow) imports
+# happen the first time a model is actually needed
+ML_AVAILABLE = (
+    importlib.util.find_spec("ultralytics") is not None
+    and importlib.util.find_spec("torch") is not None
+)
+if not ML_AVAILABLE:
+    logging.warning("ML dependencies not available. Using fallback mode.")
+
+# Approximate resident size of YOLOv8 variants (fp32 weights) used when a model
+# can't report its own parameter size
+DEFAULT_MODEL_SIZES_MB = {
+    "yolov8n.pt": 13,
+    "yolov8s.pt": 45,
+    "yolov8m.pt": 104,
+    "yolov8l.pt": 175,
+    "yolov8x.pt": 275,
+}
+
+def load_yolo_model(name: str):
+    """Load a YOLO model by weights name or path"""
+    from ultralytics import YOLO
+    import torch
+
+    # Configure torch to allow unsafe loading for YOLO models
+    torch.serialization.add_safe_globals(['ultralytics.nn.tasks.DetectionModel'])
+    return YOLO(name)
+
+def estimate_model_size_mb(name: str, model: Any) -> float:
+    """Estimate memory held by a loaded model from its parameters, weights file or known variant size"""
+    try:
+        parameters = model.model.parameters()
+        size_bytes = sum(p.numel() * p.element_size() for p in parameters)
+        if size_bytes:
+            return size_bytes / (1024 * 1024)
+    except Exception:
+        pass
+    if os.path.exists(name):
+        return os.path.getsize(name) / (1024 * 1024)
+    return DEFAULT_MODEL_SIZES_MB.get(os.path.basename(name), 50)
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded detection models.
+
+    Models are loaded lazily on first use and kept resident in LRU order; when the
+    estimated total size exceeds the memory budget the least recently used models
+    are evicted. warm_up() can load a model and run a dummy inference in a
+    background thread so the cold-start cost is paid off the request path.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None,
+                 loader: Optional[Callable[[str], Any]] = None,
+                 size_estimator: Optional[Callable[[str, Any], float]] = None):
+        self.memory_budget_mb = memory_budget_mb if memory_budget_mb is not None else settings.model_registry_memory_budget_mb
+        self._loader = loader or load_yolo_model
+        self._size_estimator = size_estimator or estimate_model_size_mb
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, float] = {}
+        self._failed: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the named model, loading it on first use. Returns None if it cannot be loaded."""
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+            if name in self._failed:
+                return None
+
+            try:
+                model = self._loader(name)
+            except Exception as e:
+                logger.warning(f"Failed to load model {name}: {e}. Using fallback mode.")
+                self._failed[name] = str(e)
+                return None
+
+            size_mb = self._size_estimator(name, model)
+            self._evict_for(size_mb)
+            self._models[name] = model
+            self._sizes[name] = size_mb
+            logger.info(f"Loaded model {name} ({size_mb:.0f}MB, {self.resident_mb():.0f}MB resident)")
+            return model
+
+    def warm_up(self, name: str, background: bool = True) -> Optional[threading.Thread]:
+        """Load a model and run one dummy inference so the first real request is fast"""
+        if not background:
+            self._warm_up(name)
+            return None
+        thread = threading.Thread(target=self._warm_up, args=(name,), name=f"warm-up-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self, name: str):
+        model = self.get(name)
+        if model is None:
+            return
+        try:
+            model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+            logger.info(f"Model {name} warmed up")
+        except Exception as e:
+            logger.warning(f"Warm-up inference failed for model {name}: {e}")
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._models
+
+    def loaded_models(self) -> List[str]:
+        """Resident model names, least recently used first"""
+        with self._lock:
+            return list(self._models)
+
+    def resident_mb(self) -> float:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            self._sizes.pop(name, None)
+            return self._models.pop(name, None) is not None
+
+    def _evict_for(self, size_mb: float):
+        """Evict least recently used models until size_mb more fits in the budget"""
+        while self._models and self.resident_mb() + size_mb > self.memory_budget_mb:
+            name, _ = self._models.popitem(last=False)
+            self._sizes.pop(name, None)
+            logger.info(f"Evicted model {name} to stay within {self.memory_budget_mb}MB model budget")
+        if size_mb > self.memory_budget_mb:
+            logger.warning(f"Model of {size_mb:.0f}MB exceeds the {self.memory_budget_mb}MB model budget")
+
+# Shared registry for the process
+model_registry = ModelRegistry()
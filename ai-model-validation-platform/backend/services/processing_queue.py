@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional, Set, Tuple
+
+from config import settings
+from database import SessionLocal
+from crud import (
+    enqueue_processing_job, claim_next_processing_job, complete_processing_job,
+    fail_processing_job, requeue_running_processing_jobs, renew_processing_job_leases,
+    count_pending_processing_jobs, get_video
+)
+from services.ground_truth_index import ground_truth_indexes
+
+logger = logging.getLogger(__name__)
+
+class VideoProcessingQueue:
+    """
+    Durable, DB-backed queue for ground truth generation.
+
+    Jobs live in the video_processing_jobs table, so uploads survive restarts. A claimed
+    job is leased to this queue instance and the dispatcher renews the lease while it
+    runs; jobs whose lease expired (their process died) are requeued and resume from
+    their last checkpointed frame. Several API processes can share the table without
+    taking over each other's live jobs. A single dispatcher per instance claims jobs
+    by priority and runs at most `concurrency` of them at once; failures are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, ground_truth_service, concurrency: Optional[int] = None,
+                 poll_interval: Optional[float] = None):
+        self.ground_truth_service = ground_truth_service
+        self.concurrency = concurrency or settings.processing_queue_concurrency
+        self.poll_interval = poll_interval if poll_interval is not None else settings.processing_queue_poll_interval
+        self._running = False
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._active: Set[asyncio.Task] = set()
+        self._active_jobs: Set[str] = set()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = settings.processing_lease_seconds
+        self._last_heartbeat = 0.0
+
+    def enqueue(self, db, video_id: str, priority: int = 0) -> str:
+        """Persist a processing job for a video and wake the dispatcher. Returns the job id."""
+        job = enqueue_processing_job(
+            db, video_id, priority=priority, max_attempts=settings.processing_max_attempts
+        )
+        self.wake()
+        logger.info(f"Queued ground truth job {job.id} for video {video_id} (priority {priority})")
+        return job.id
+
+    def wake(self):
+        """Ask the dispatcher to look for runnable jobs now instead of at the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def depth(self) -> int:
+        """Number of queued or running jobs"""
+        db = SessionLocal()
+        try:
+            return count_pending_processing_jobs(db)
+        finally:
+            db.close()
+
+    async def start(self):
+        """Requeue jobs whose owner died and start dispatching"""
+        if self._running:
+            return
+
+        await asyncio.to_thread(self._heartbeat)
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Stop dispatching. Running jobs stay 'running' and are resumed once their lease expires."""
+        self._running = False
+        self.wake()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for task in list(self._active):
+            task.cancel()
+
+    async def _dispatch_loop(self):
+        while self._running:
+            try:
+                if time.monotonic() - self._last_heartbeat >= self.lease_seconds / 3:
+                    await asyncio.to_thread(self._heartbeat)
+                claimed = await self._claim_jobs()
+            except Exception as e:
+                logger.error(f"Error claiming ground truth jobs: {str(e)}", exc_info=True)
+                claimed = 0
+
+            if claimed == 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _heartbeat(self):
+        """Renew the leases on this instance's running jobs and requeue jobs whose lease expired"""
+        self._last_heartbeat = time.monotonic()
+        db = SessionLocal()
+        try:
+            renew_processing_job_leases(db, self.owner, list(self._active_jobs), self.lease_seconds)
+            requeued = requeue_running_processing_jobs(db)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted ground truth jobs")
+        finally:
+            db.close()
+
+    def _claim_next(self) -> Optional[Tuple[str, str, Optional[str], int]]:
+        """Claim the next runnable job; returns (job id, video id, file path, start frame)"""
+        db = SessionLocal()
+        try:
+            job = claim_next_processing_job(db, owner=self.owner, lease_seconds=self.lease_seconds)
+            if not job:
+                return None
+            video = get_video(db, job.video_id)
+            return job.id, job.video_id, video.file_path if video else None, job.last_frame
+        finally:
+            db.close()
+
+    async def _claim_jobs(self) -> int:
+        """Claim runnable jobs up to the concurrency limit and start them"""
+        claimed = 0
+        while self._running and len(self._active) < self.concurrency:
+            job_info = await asyncio.to_thread(self._claim_next)
+            if job_info is None:
+                break
+
+            self._active_jobs.add(job_info[0])
+            task = asyncio.create_task(self._run_job(*job_info), name=job_info[0])
+            self._active.add(task)
+            task.add_done_callback(self._job_finished)
+            claimed += 1
+        return claimed
+
+    def _job_finished(self, task: asyncio.Task):
+        self._active.discard(task)
+        self._active_jobs.discard(task.get_name())
+        # A slot freed up - let the dispatcher claim the next job immediately
+        self.wake()
+
+    async def _run_job(self, job_id: str, video_id: str, file_path: Optional[str], start_frame: int):
+        error = None
+        if not file_path:
+            error = "Video no longer exists"
+        else:
+            try:
+                succeeded = await self.ground_truth_service.process_video_async(
+                    video_id, file_path, job_id=job_id, start_frame=start_frame
+                )
+                if not succeeded:
+                    error = "Ground truth processing failed"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ground truth job {job_id} crashed: {str(e)}", exc_info=True)
+                error = str(e)
+            # Even failed attempts may have committed batches - rebuild affected session indexes
+            ground_truth_indexes.invalidate_video(video_id)
+
+        db = SessionLocal()
+        try:
+            if error is None:
+                complete_processing_job(db, job_id)
+                logger.info(f"Ground truth job {job_id} for video {video_id} completed")
+            else:
+                job = fail_processing_job(db, job_id, error, settings.processing_retry_base_delay)
+                if job and job.status == "queued":
+                    logger.warning(f"Ground truth job {job_id} failed (attempt {job.attempts}), retrying: {error}")
+                else:
+                    logger.error(f"Ground truth job {job_id} failed permanently: {error}")
+        finally:
+            db.close()
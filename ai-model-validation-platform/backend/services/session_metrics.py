@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import get_detection_events, get_test_session
+from services.ground_truth_index import GroundTruthIndex, ground_truth_indexes
+from services.detection_writer import detection_writer
+from services.matching_engine import boxes_to_array, pairwise_iou
+
+logger = logging.getLogger(__name__)
+
+class SessionMetricsAccumulator:
+    """
+    Running TP/FP counts for one test session, updated as each detection arrives.
+
+    Each event greedily claims the first unclaimed ground truth object within tolerance (the
+    highest-IoU one when IoU matching is on), exactly as batch greedy matching would in
+    arrival order. Claimed objects are tracked in place, so recording an event is a binary
+    search plus a short scan of the tolerance window, and metrics are O(1) to read. False
+    negatives are only final once the session is closed; until then they are reported as
+    the ground truth not (yet) matched.
+    """
+
+    def __init__(self, index: GroundTruthIndex, require_class: bool = False,
+                 iou_threshold: Optional[float] = None):
+        self.index = index
+        self.require_class = require_class
+        self.iou_threshold = iou_threshold
+        self.true_positives = 0
+        self.false_positives = 0
+        self.closed = False
+        self._final_false_negatives: Optional[int] = None
+        self._claimed = np.zeros(len(index), dtype=bool)
+        # next_free[i] points at or before the first unclaimed position >= i (path halving)
+        self._next_free = list(range(len(index) + 1))
+        self._lock = threading.Lock()
+
+    @property
+    def session_id(self) -> str:
+        return self.index.session_id
+
+    @property
+    def total_detections(self) -> int:
+        return self.true_positives + self.false_positives
+
+    def record(self, timestamp: float, class_label: Optional[str] = None,
+               bounding_box: Optional[dict] = None) -> Tuple[str, Optional[str]]:
+        """Score one detection. Returns ('TP' or 'FP', id of the claimed ground truth or None)."""
+        with self._lock:
+            position = self._claim(timestamp, class_label, bounding_box)
+            if position is None:
+                self.false_positives += 1
+                return "FP", None
+            self.true_positives += 1
+            return "TP", self.index.ids[position]
+
+    def _claim(self, timestamp: float, class_label: Optional[str], bounding_box: Optional[dict]) -> Optional[int]:
+        lo, hi = self.index.window(timestamp)
+        if hi <= lo:
+            return None
+
+        if not self.require_class and self.iou_threshold is None:
+            position = self._first_free(lo)
+            if position >= hi:
+                return None
+        else:
+            eligible = ~self._claimed[lo:hi]
+            if self.require_class:
+                eligible &= self.index.class_codes[lo:hi] == self.index.class_code(class_label)
+            iou = None
+            if self.iou_threshold is not None:
+                if not bounding_box:
+                    return None
+                box = boxes_to_array([bounding_box])
+                iou = np.nan_to_num(pairwise_iou(np.repeat(box, hi - lo, axis=0), self.index.boxes[lo:hi]), nan=-1.0)
+                eligible &= iou >= self.iou_threshold
+            candidates = np.flatnonzero(eligible)
+            if len(candidates) == 0:
+                return None
+            best = candidates[np.argmax(iou[candidates])] if iou is not None else candidates[0]
+            position = lo + int(best)
+
+        self._claimed[position] = True
+        self._next_free[position] = position + 1
+        return position
+
+    def _first_free(self, position: int) -> int:
+        next_free = self._next_free
+        while next_free[position] != position:
+            next_free[position] = next_free[next_free[position]]
+            position = next_free[position]
+        return position
+
+    def close(self):
+        """Finalize false negatives; later events are still counted but FN stays fixed"""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._final_false_negatives = len(self.index) - self.true_positives
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current metrics, O(1)"""
+        tp, fp = self.true_positives, self.false_positives
+        fn = self._final_false_negatives if self.closed else len(self.index) - tp
+        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+        f1_score = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
+        accuracy = tp / len(self.index) if len(self.index) > 0 else 0.0
+        return {
+            "session_id": self.session_id,
+            "true_positives": tp,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "precision": precision,
+            "recall": recall,
+            "f1_score": f1_score,
+            "accuracy": accuracy,
+            "total_detections": tp + fp,
+            "total_ground_truth": len(self.index),
+            "status": "completed" if self.closed else "running"
+        }
+
+class SessionMetricsRegistry:
+    """
+    Accumulators for running sessions, kept in an LRU next to the ground truth indexes.
+
+    An accumulator is rebuilt (by replaying the session's stored events) when it is first
+    needed after a restart or eviction, or when its ground truth index was invalidated.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or settings.ground_truth_index_cache_size
+        self._accumulators: "OrderedDict[str, SessionMetricsAccumulator]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rebuild_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, db: Session, session_id: str) -> Optional[SessionMetricsAccumulator]:
+        """Accumulator for a session, rebuilding it on a miss (blocking; use get_async from the event loop)"""
+        accumulator = self._cached(session_id)
+        if accumulator is not None:
+            return accumulator
+        return self._rebuild(db, session_id)
+
+    async def get_async(self, db: Session, session_id: str) -> Optional[SessionMetricsAccumulator]:
+        """Accumulator for a session; a rebuild (buffer flush plus event replay) runs in a worker thread"""
+        accumulator = self._cached(session_id)
+        if accumulator is not None:
+            return accumulator
+        return await asyncio.to_thread(self._rebuild, db, session_id)
+
+    def _cached(self, session_id: str) -> Optional[SessionMetricsAccumulator]:
+        with self._lock:
+            accumulator = self._accumulators.get(session_id)
+            if accumulator is not None:
+                self._accumulators.move_to_end(session_id)
+        if accumulator is not None and ground_truth_indexes.get(session_id) is accumulator.index:
+            return accumulator
+        return None
+
+    def _rebuild(self, db: Session, session_id: str) -> Optional[SessionMetricsAccumulator]:
+        with self._lock:
+            rebuild_lock = self._rebuild_locks.setdefault(session_id, threading.Lock())
+        # Concurrent misses for one session wait for a single rebuild instead of racing to replace it
+        with rebuild_lock:
+            accumulator = self._cached(session_id)
+            if accumulator is not None:
+                return accumulator
+            try:
+                return self._replay(db, session_id)
+            finally:
+                with self._lock:
+                    self._rebuild_locks.pop(session_id, None)
+
+    def _replay(self, db: Session, session_id: str) -> Optional[SessionMetricsAccumulator]:
+        index = ground_truth_indexes.load(db, session_id)
+        if index is None:
+            return None
+        accumulator = SessionMetricsAccumulator(index, require_class=settings.validation_require_class,
+                                                iou_threshold=settings.validation_iou_threshold)
+        # Buffered events must reach the table before it is replayed
+        detection_writer.flush()
+        events = get_detection_events(db, session_id)
+        for event in sorted(events, key=lambda e: (e.created_at is None, e.created_at)):
+            accumulator.record(event.timestamp, event.class_label, event.bounding_box)
+        test_session = get_test_session(db, session_id)
+        if test_session is not None and test_session.status == "completed":
+            accumulator.close()
+        if events:
+            logger.info(f"Rebuilt metrics for session {session_id} from {len(events)} stored events")
+
+        with self._lock:
+            self._accumulators[session_id] = accumulator
+            self._accumulators.move_to_end(session_id)
+            while len(self._accumulators) > self.max_sessions:
+                self._accumulators.popitem(last=False)
+        return accumulator
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._accumulators.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._accumulators.clear()
+
+# Shared session metrics for the API process
+session_metrics = SessionMetricsRegistry()
@@ -0,0 +1,133 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+UNMATCHED = -1
+
+class TemporalMatcher:
+    """
+    Greedy temporal matching of detections against ground truth in O((D + G) log G).
+
+    Semantics are identical to the original nested loop in ValidationService: detections are
+    taken in order, and each claims the first not-yet-claimed ground truth object (in list
+    order) with |gt.timestamp - detection.timestamp| <= tolerance. Ground truth timestamps are
+    sorted once so each detection's candidate window is found with a binary search; the first
+    unclaimed object inside the window is found with a "next free slot" union-find when the
+    ground truth is already in time order (the common case), or a min segment tree over list
+    positions when it is not.
+    """
+
+    def __init__(self, gt_timestamps: Sequence[float]):
+        self.timestamps = np.asarray(gt_timestamps, dtype=np.float64)
+        self.order = np.argsort(self.timestamps, kind="stable")
+        self.sorted_timestamps = self.timestamps[self.order]
+        self.in_time_order = bool(np.all(self.order == np.arange(len(self.order))))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def windows(self, detection_timestamps: Sequence[float], tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-detection [lo, hi) ranges of sorted ground truth within tolerance.
+
+        Binary search on t ± tolerance can disagree with the exact |gt - t| <= tolerance test by
+        an ulp at the edges, so the bounds are nudged until they agree with it exactly.
+        """
+        times = np.asarray(detection_timestamps, dtype=np.float64)
+        ts = self.sorted_timestamps
+        n = len(ts)
+        lo = np.searchsorted(ts, times - tolerance, side="left")
+        hi = np.searchsorted(ts, times + tolerance, side="right")
+
+        def within(positions):
+            return np.abs(ts[np.clip(positions, 0, max(n - 1, 0))] - times) <= tolerance
+
+        if n == 0:
+            return lo, hi
+        while True:
+            grow = (lo > 0) & within(lo - 1)
+            shrink = (lo < hi) & ~within(lo) & ~grow
+            if not (grow.any() or shrink.any()):
+                break
+            lo = lo - grow + shrink
+        while True:
+            grow = (hi < n) & within(hi)
+            shrink = (hi > lo) & ~within(hi - 1) & ~grow
+            if not (grow.any() or shrink.any()):
+                break
+            hi = hi + grow - shrink
+        return lo, np.maximum(hi, lo)
+
+    def has_match(self, timestamp: float, tolerance: float) -> bool:
+        """Whether any ground truth lies within tolerance of a single timestamp"""
+        lo, hi = self.windows([timestamp], tolerance)
+        return bool(hi[0] > lo[0])
+
+    def match(self, detection_timestamps: Sequence[float], tolerance: float) -> np.ndarray:
+        """
+        Greedily assign detections to ground truth.
+
+        Returns:
+            np.ndarray: Ground truth list index claimed by each detection, or -1 (false positive)
+        """
+        lo, hi = self.windows(detection_timestamps, tolerance)
+        if self.in_time_order:
+            return self._match_in_time_order(lo, hi)
+        return self._match_by_list_order(lo, hi)
+
+    def _match_in_time_order(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # next_free[i] points at or before the first unclaimed position >= i (path halving)
+        n = len(self.sorted_timestamps)
+        next_free = list(range(n + 1))
+        matches = np.full(len(lo), UNMATCHED, dtype=np.int64)
+        for d, (start, end) in enumerate(zip(lo.tolist(), hi.tolist())):
+            if start >= end:
+                continue
+            i = start
+            while next_free[i] != i:
+                next_free[i] = next_free[next_free[i]]
+                i = next_free[i]
+            if i < end:
+                matches[d] = i
+                next_free[i] = i + 1
+        return matches
+
+    def _match_by_list_order(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # Min segment tree over sorted positions holding each object's list index (claimed = n)
+        n = len(self.sorted_timestamps)
+        size = 1
+        while size < max(n, 1):
+            size *= 2
+        tree = [n] * (2 * size)
+        tree[size:size + n] = self.order.tolist()
+        for node in range(size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+        position_of = np.empty(n, dtype=np.int64)
+        position_of[self.order] = np.arange(n)
+        position_of = position_of.tolist()
+
+        matches = np.full(len(lo), UNMATCHED, dtype=np.int64)
+        for d, (start, end) in enumerate(zip(lo.tolist(), hi.tolist())):
+            if start >= end:
+                continue
+            best = n
+            left, right = start + size, end + size
+            while left < right:
+                if left & 1:
+                    best = min(best, tree[left])
+                    left += 1
+                if right & 1:
+                    right -= 1
+                    best = min(best, tree[right])
+                left //= 2
+                right //= 2
+            if best == n:
+                continue
+            matches[d] = best
+            node = position_of[best] + size
+            tree[node] = n
+            node //= 2
+            while node:
+                tree[node] = min(tree[2 * node], tree[2 * node + 1])
+                node //= 2
+        return matches
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Set
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+POSTER_FILENAME = "poster.jpg"
+SPRITE_FILENAME = "sprite.jpg"
+MANIFEST_FILENAME = "sprite.json"
+FAILED_MARKER = "failed"
+
+class UndecodableVideo(Exception):
+    """The video file opened but none of its frames could be decoded"""
+
+def generate_thumbnails(file_path: str, output_dir: str, poster_width: int, tile_width: int,
+                        tile_count: int, columns: int, jpeg_quality: int) -> Optional[Dict[str, Any]]:
+    """
+    Extract a poster frame and a sprite sheet of evenly spaced preview frames.
+
+    Frames are reached by seeking (the decoder starts from the nearest keyframe), so only
+    `tile_count + 1` frames are decoded regardless of clip length. Files are written to a
+    temporary name and renamed so readers never see a partial image.
+
+    Returns:
+        dict: Sprite layout (stored as the manifest), or None if the video can't be read
+        right now (OpenCV missing, file not openable, encoder failure)
+
+    Raises:
+        UndecodableVideo: The file opened but no frame could be decoded
+    """
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        logger.warning("OpenCV not available - skipping thumbnail generation")
+        return None
+
+    cap = cv2.VideoCapture(file_path)
+    if not cap.isOpened():
+        logger.warning(f"Could not open video file for thumbnails: {file_path}")
+        return None
+
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+        def read_frame(index: int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = cap.read()
+            return frame if ok else None
+
+        def resize(frame, width: int):
+            height, original_width = frame.shape[:2]
+            scaled_height = max(1, round(height * width / original_width))
+            return cv2.resize(frame, (width, scaled_height), interpolation=cv2.INTER_AREA)
+
+        # Poster: one second in (or 10% of short clips) skips black lead-in frames
+        poster_index = min(int(fps), frame_count // 10) if fps > 0 else 0
+        poster = read_frame(poster_index) if frame_count else None
+        if poster is None:
+            poster = read_frame(0)
+        if poster is None:
+            raise UndecodableVideo(f"No decodable frames for thumbnails: {file_path}")
+
+        tile_count = max(1, min(tile_count, frame_count or 1))
+        indices = [int(i * frame_count / tile_count) for i in range(tile_count)]
+        tiles, timestamps = [], []
+        for index in indices:
+            frame = read_frame(index)
+            if frame is None:
+                continue
+            tiles.append(resize(frame, tile_width))
+            timestamps.append(round(index / fps, 3) if fps > 0 else 0.0)
+        if not tiles:
+            tiles, timestamps = [resize(poster, tile_width)], [0.0]
+
+        tile_height = tiles[0].shape[0]
+        columns = min(columns, len(tiles))
+        rows = math.ceil(len(tiles) / columns)
+        sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+        for i, tile in enumerate(tiles):
+            row, column = divmod(i, columns)
+            tile = tile[:tile_height]
+            sheet[row * tile_height:row * tile_height + tile.shape[0],
+                  column * tile_width:(column + 1) * tile_width] = tile
+
+        encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        os.makedirs(output_dir, exist_ok=True)
+        for filename, image in ((POSTER_FILENAME, resize(poster, min(poster_width, poster.shape[1]))),
+                                (SPRITE_FILENAME, sheet)):
+            ok, encoded = cv2.imencode(".jpg", image, encode_params)
+            if not ok:
+                return None
+            _write_atomic(os.path.join(output_dir, filename), encoded.tobytes())
+
+        manifest = {
+            "columns": columns,
+            "rows": rows,
+            "tile_width": tile_width,
+            "tile_height": tile_height,
+            "timestamps": timestamps
+        }
+        _write_atomic(os.path.join(output_dir, MANIFEST_FILENAME), json.dumps(manifest).encode())
+        return manifest
+    finally:
+        cap.release()
+
+def _write_atomic(path: str, data: bytes):
+    # A unique temp file per writer, so concurrent generations of the same key can't interleave
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+class VideoThumbnailer:
+    """
+    Background stage that renders a poster frame and keyframe sprite for each upload.
+
+    Images live next to the uploads under `.thumbnails/<content hash>/`, so deduplicated
+    videos share them and a file is only ever decoded once. Generation runs in worker
+    threads with bounded concurrency; the endpoints generate on demand for videos that
+    predate this stage. Videos that open but can't be decoded get a marker instead of
+    being retried; other failures are retried on the next request.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or settings.thumbnail_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def root(self) -> str:
+        return os.path.join(settings.upload_directory, ".thumbnails")
+
+    def thumbnail_dir(self, key: str) -> str:
+        return os.path.join(self.root, os.path.basename(key))
+
+    def manifest(self, key: str) -> Optional[Dict[str, Any]]:
+        """Sprite layout if thumbnails exist for this key"""
+        try:
+            with open(os.path.join(self.thumbnail_dir(key), MANIFEST_FILENAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def has_failed(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.thumbnail_dir(key), FAILED_MARKER))
+
+    def path(self, key: str, filename: str) -> str:
+        return os.path.join(self.thumbnail_dir(key), filename)
+
+    def generate(self, key: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """Blocking generation that reuses existing thumbnails for the same content"""
+        manifest = self.manifest(key)
+        if manifest is not None or self.has_failed(key):
+            return manifest
+
+        output_dir = self.thumbnail_dir(key)
+        try:
+            manifest = generate_thumbnails(
+                file_path, output_dir,
+                poster_width=settings.thumbnail_poster_width,
+                tile_width=settings.thumbnail_sprite_tile_width,
+                tile_count=settings.thumbnail_sprite_tiles,
+                columns=settings.thumbnail_sprite_columns,
+                jpeg_quality=settings.thumbnail_jpeg_quality
+            )
+        except UndecodableVideo as e:
+            # Decoding the same content again won't go differently
+            logger.warning(str(e))
+            os.makedirs(output_dir, exist_ok=True)
+            open(os.path.join(output_dir, FAILED_MARKER), "w").close()
+            return None
+        if manifest is not None:
+            logger.info(f"Generated thumbnails for {file_path} in {output_dir}")
+        return manifest
+
+    async def ensure(self, key: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """Thumbnails for a video, generating them now if the background stage hasn't yet"""
+        manifest = self.manifest(key)
+        if manifest is not None or self.has_failed(key):
+            return manifest
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await asyncio.to_thread(self.generate, key, file_path)
+
+    def schedule(self, key: str, file_path: str) -> asyncio.Task:
+        """Generate thumbnails in the background"""
+        task = asyncio.create_task(self._generate_in_background(key, file_path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _generate_in_background(self, key: str, file_path: str):
+        try:
+            await self.ensure(key, file_path)
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for {file_path}: {str(e)}", exc_info=True)
+
+    def discard(self, key: str):
+        shutil.rmtree(self.thumbnail_dir(key), ignore_errors=True)
+
+    async def drain(self):
+        """Wait for all scheduled generation to finish"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+def thumbnail_key(video) -> str:
+    """Thumbnails are shared by content; videos uploaded before hashing fall back to their id"""
+    return video.file_hash or video.id
+
+# Shared thumbnailer for the API process
+video_thumbnailer = VideoThumbnailer()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import settings
+from services.upload_throughput import AdaptiveChunkSizer, UploadStats, upload_metrics
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+class UploadSessionNotFound(Exception):
+    pass
+
+class InvalidUploadRange(Exception):
+    pass
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """Parse 'bytes start-end/total' (end inclusive) into (start, end, total)"""
+    match = CONTENT_RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        raise InvalidUploadRange("Content-Range header must look like 'bytes start-end/total'")
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == "*" else int(match.group(3))
+    if end < start:
+        raise InvalidUploadRange("Content-Range end is before start")
+    return start, end, total
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent inclusive (start, end) ranges"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+class UploadSession:
+    """State of one resumable upload: target file, declared size and the byte ranges received so far"""
+
+    def __init__(self, upload_id: str, project_id: str, filename: str, stored_filename: str,
+                 total_size: int, created_at: float, session_dir: str):
+        self.upload_id = upload_id
+        self.project_id = project_id
+        self.filename = filename
+        self.stored_filename = stored_filename
+        self.total_size = total_size
+        self.created_at = created_at
+        self.session_dir = session_dir
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.session_dir, "data.part")
+
+    @property
+    def ranges_dir(self) -> str:
+        return os.path.join(self.session_dir, "ranges")
+
+    def received_ranges(self) -> List[Tuple[int, int]]:
+        ranges = []
+        for name in os.listdir(self.ranges_dir):
+            start, _, end = name.partition("-")
+            ranges.append((int(start), int(end)))
+        return merge_ranges(ranges)
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        missing = []
+        next_offset = 0
+        for start, end in self.received_ranges():
+            if start > next_offset:
+                missing.append((next_offset, start - 1))
+            next_offset = end + 1
+        if next_offset < self.total_size:
+            missing.append((next_offset, self.total_size - 1))
+        return missing
+
+    def bytes_received(self) -> int:
+        return sum(end - start + 1 for start, end in self.received_ranges())
+
+    def is_complete(self) -> bool:
+        return self.received_ranges() == [(0, self.total_size - 1)]
+
+    def to_dict(self) -> dict:
+        received = self.received_ranges()
+        return {
+            "upload_id": self.upload_id,
+            "project_id": self.project_id,
+            "filename": self.filename,
+            "total_size": self.total_size,
+            "bytes_received": sum(end - start + 1 for start, end in received),
+            "received_ranges": [list(r) for r in received],
+            "missing_ranges": [list(r) for r in self.missing_ranges()],
+            "complete": received == [(0, self.total_size - 1)]
+        }
+
+class UploadSessionStore:
+    """
+    Disk-backed resumable upload sessions.
+
+    Each session preallocates a sparse data file in the upload directory (so finalizing is
+    the same os.rename used by regular uploads) and records every fully written byte range
+    as an empty marker file. Ranges can therefore arrive in any order, in parallel requests
+    or from several API workers, and the received offsets survive restarts.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or os.path.join(settings.upload_directory, ".upload_sessions")
+
+    def create(self, project_id: str, filename: str, stored_filename: str, total_size: int) -> UploadSession:
+        if total_size <= 0:
+            raise InvalidUploadRange("Upload size must be positive")
+        self.cleanup_expired()
+
+        upload_id = str(uuid.uuid4())
+        session_dir = os.path.join(self.root, upload_id)
+        os.makedirs(os.path.join(session_dir, "ranges"))
+        session = UploadSession(upload_id, project_id, filename, stored_filename,
+                                total_size, time.time(), session_dir)
+
+        # Sparse preallocation: ranges are written in place at their final offsets
+        with open(session.data_path, "wb") as data_file:
+            data_file.truncate(total_size)
+
+        with open(os.path.join(session_dir, "session.json"), "w") as f:
+            json.dump({
+                "project_id": project_id,
+                "filename": filename,
+                "stored_filename": stored_filename,
+                "total_size": total_size,
+                "created_at": session.created_at
+            }, f)
+
+        logger.info(f"Created upload session {upload_id} for {filename} ({total_size} bytes)")
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        # Upload ids are UUIDs; reject anything else before touching the filesystem
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise UploadSessionNotFound(upload_id)
+
+        session_dir = os.path.join(self.root, upload_id)
+        try:
+            with open(os.path.join(session_dir, "session.json")) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            raise UploadSessionNotFound(upload_id)
+
+        return UploadSession(upload_id, state["project_id"], state["filename"], state["stored_filename"],
+                             state["total_size"], state["created_at"], session_dir)
+
+    async def write_range(self, session: UploadSession, start: int, end: int,
+                          chunks: AsyncIterator[bytes]) -> int:
+        """
+        Write an inclusive byte range from an async stream of chunks at its final offset.
+
+        The range is only recorded as received once every byte has been written and
+        synced, so an interrupted request leaves it missing and the client resends it.
+        """
+        if end >= session.total_size:
+            raise InvalidUploadRange(f"Range {start}-{end} exceeds upload size {session.total_size}")
+
+        expected = end - start + 1
+        received = 0
+        written = 0
+        # Request bodies arrive in small ASGI chunks; coalesce them into adaptively sized
+        # writes so fast clients make a few large pwrite calls instead of many tiny ones
+        buffer = bytearray()
+        chunk_sizer = AdaptiveChunkSizer()
+        range_stats = UploadStats(session.filename, kind="range")
+        last_flush = time.perf_counter()
+        fd = os.open(session.data_path, os.O_WRONLY)
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if received + len(chunk) > expected:
+                    raise InvalidUploadRange(f"Request body is longer than range {start}-{end}")
+                buffer += chunk
+                received += len(chunk)
+                if len(buffer) >= chunk_sizer.chunk_size or received == expected:
+                    await asyncio.to_thread(os.pwrite, fd, bytes(buffer), start + written)
+                    written += len(buffer)
+                    now = time.perf_counter()
+                    range_stats.add_chunk(len(buffer), now - last_flush)
+                    chunk_sizer.record(len(buffer), now - last_flush)
+                    last_flush = now
+                    buffer.clear()
+            if received != expected:
+                raise InvalidUploadRange(f"Received {received} bytes for a {expected} byte range")
+            await asyncio.to_thread(os.fsync, fd)
+        finally:
+            os.close(fd)
+
+        upload_metrics.record(range_stats)
+        open(os.path.join(session.ranges_dir, f"{start}-{end}"), "w").close()
+        return written
+
+    def discard(self, session: UploadSession):
+        shutil.rmtree(session.session_dir, ignore_errors=True)
+
+    def cleanup_expired(self, max_age_seconds: Optional[float] = None) -> int:
+        """Remove sessions older than the configured TTL. Returns the number removed."""
+        max_age_seconds = max_age_seconds if max_age_seconds is not None else settings.upload_session_ttl_hours * 3600
+        if not os.path.isdir(self.root):
+            return 0
+
+        removed = 0
+        cutoff = time.time() - max_age_seconds
+        for upload_id in os.listdir(self.root):
+            session_dir = os.path.join(self.root, upload_id)
+            try:
+                # The ranges directory is touched by every completed range, so it tracks activity
+                if os.path.getmtime(os.path.join(session_dir, "ranges")) < cutoff:
+                    shutil.rmtree(session_dir, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Removed {removed} expired upload sessions")
+        return removed
+
+# Shared session store
+upload_sessions = UploadSessionStore()
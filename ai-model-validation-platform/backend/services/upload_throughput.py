@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class AdaptiveChunkSizer:
+    """
+    Picks the next upload chunk size from observed throughput.
+
+    Each chunk should take roughly `target_seconds` to read and write: a slow client keeps
+    small chunks (bounded memory, responsive size checks) while a fast LAN client grows to
+    multi-MB chunks so per-chunk syscall and thread hand-off overhead stops dominating.
+    Sizes are powers of two between the configured minimum and maximum.
+    """
+
+    def __init__(self, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 target_seconds: Optional[float] = None, smoothing: float = 0.5):
+        self.min_size = min_size or settings.upload_chunk_min_size
+        self.max_size = max(self.min_size, max_size or settings.upload_chunk_max_size)
+        self.target_seconds = target_seconds or settings.upload_chunk_target_seconds
+        self.smoothing = smoothing
+        self.chunk_size = self.min_size
+        self._bytes_per_second: Optional[float] = None
+
+    def record(self, nbytes: int, seconds: float) -> int:
+        """Feed one chunk's size and duration; returns the chunk size to use next"""
+        if nbytes <= 0:
+            return self.chunk_size
+        rate = nbytes / max(seconds, 1e-6)
+        if self._bytes_per_second is None:
+            self._bytes_per_second = rate
+        else:
+            self._bytes_per_second = self.smoothing * rate + (1 - self.smoothing) * self._bytes_per_second
+
+        ideal = self._bytes_per_second * self.target_seconds
+        size = self.min_size
+        while size * 2 <= min(ideal, self.max_size):
+            size *= 2
+        self.chunk_size = size
+        return size
+
+class UploadStats:
+    """
+    Throughput bookkeeping for a single upload.
+
+    `kind` is 'range' for resumable ranges read off the request stream (network throughput)
+    and 'local_copy' for direct uploads, which are copied from the framework's spooled
+    temp file and so only measure local disk speed.
+    """
+
+    def __init__(self, filename: str, kind: str = "range"):
+        self.filename = filename
+        self.kind = kind
+        self.bytes = 0
+        self.chunks = 0
+        self.max_chunk_size = 0
+        self.io_seconds = 0.0
+        self._started = time.perf_counter()
+
+    def add_chunk(self, nbytes: int, seconds: float):
+        self.bytes += nbytes
+        self.chunks += 1
+        self.max_chunk_size = max(self.max_chunk_size, nbytes)
+        self.io_seconds += seconds
+
+    def finish(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self._started
+        return {
+            "filename": self.filename,
+            "kind": self.kind,
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "seconds": round(seconds, 4),
+            "throughput_mbps": round(self.bytes / (1024 * 1024) / seconds, 2) if seconds > 0 else 0.0,
+            "avg_chunk_size": self.bytes // self.chunks if self.chunks else 0,
+            "max_chunk_size": self.max_chunk_size,
+            "finished_at": time.time()
+        }
+
+class UploadMetrics:
+    """Recent per-upload throughput figures, kept in memory for the metrics endpoint"""
+
+    def __init__(self, history: Optional[int] = None):
+        self._recent = deque(maxlen=history or settings.upload_metrics_history)
+        self._lock = threading.Lock()
+
+    def record(self, stats: UploadStats) -> Dict[str, Any]:
+        entry = stats.finish()
+        with self._lock:
+            self._recent.append(entry)
+        logger.info(
+            f"Upload {entry['filename']} ({entry['kind']}): {entry['bytes'] / (1024 * 1024):.1f}MB in "
+            f"{entry['seconds']:.2f}s ({entry['throughput_mbps']:.1f}MB/s, {entry['chunks']} chunks, "
+            f"up to {entry['max_chunk_size'] // 1024}KB)"
+        )
+        return entry
+
+    def recent(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over recent uploads; throughput figures cover network transfers only"""
+        recent = self.recent()
+        network = [entry for entry in recent if entry["kind"] != "local_copy"]
+        network_bytes = sum(entry["bytes"] for entry in network)
+        network_seconds = sum(entry["seconds"] for entry in network)
+        return {
+            "uploads": len(recent),
+            "total_bytes": sum(entry["bytes"] for entry in recent),
+            "avg_throughput_mbps": round(network_bytes / (1024 * 1024) / network_seconds, 2) if network_seconds else 0.0,
+            "max_throughput_mbps": max((entry["throughput_mbps"] for entry in network), default=0.0)
+        }
+
+# Shared metrics for the API process
+upload_metrics = UploadMetrics()
@@ -4,43 +4,47 @@ from sqlalchemy.exc import SQLAlchemyError
 from database import SessionLocal
 from crud import get_ground_truth_objects, get_detection_events, get_test_session
 from schemas import ValidationResult, ValidationMetrics, DetectionEventResponse
+from config import settings
+from services.temporal_matcher import UNMATCHED
+from services.matching_engine import MatchingEngine, boxes_to_array
+from services.ground_truth_index import ground_truth_indexes
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ValidationService:
-    def __init__(self):
-        pass
+    def __init__(self, match_mode: Optional[str] = None, require_class: Optional[bool] = None,
+                 iou_threshold: Optional[float] = None):
+        # Matching rules default to Settings so the API and reports score sessions the same way
+        self.match_mode = match_mode or settings.validation_match_mode
+        self.require_class = require_class if require_class is not None else settings.validation_require_class
+        self.iou_threshold = iou_threshold if iou_threshold is not None else settings.validation_iou_threshold
     
-    def validate_detection(self, test_session_id: str, timestamp: float, confidence: float = None) -> str:
+    def validate_detection(self, test_session_id: str, timestamp: float, confidence: float = None,
+                           class_label: Optional[str] = None, bounding_box: Optional[dict] = None) -> str:
         """Validate a single detection against ground truth"""
-        db = SessionLocal()
         try:
-            # Get test session to find video and tolerance
-            test_session = get_test_session(db, test_session_id)
-            if not test_session:
+            # The session's ground truth index is normally built when the session starts,
+            # so this is an in-memory binary search rather than a table read
+            index = ground_truth_indexes.get(test_session_id)
+            if index is None:
+                db = SessionLocal()
+                try:
+                    index = ground_truth_indexes.load(db, test_session_id)
+                finally:
+                    db.close()
+            if index is None:
                 return "ERROR"
             
-            # Get ground truth for the video
-            ground_truth_objects = get_ground_truth_objects(db, str(test_session.video_id))
-            
-            # Find matching ground truth within tolerance
-            tolerance_seconds = test_session.tolerance_ms / 1000.0
-            
-            for gt_obj in ground_truth_objects:
-                time_diff = abs(gt_obj.timestamp - timestamp)
-                if time_diff <= tolerance_seconds:
-                    # Found a match - True Positive
-                    return "TP"
-            
-            # No match found - False Positive
-            return "FP"
+            # Any eligible ground truth within tolerance is a True Positive, otherwise a False Positive
+            matched = index.has_match(timestamp, class_label, bounding_box,
+                                      require_class=self.require_class, iou_threshold=self.iou_threshold)
+            return "TP" if matched else "FP"
             
         except Exception as e:
             logger.error(f"Error validating detection: {str(e)}", exc_info=True)
             return "ERROR"
-        finally:
-            db.close()
     
     def get_session_results(self, session_id: str) -> Optional[ValidationResult]:
         """Get comprehensive validation results for a test session"""
@@ -68,6 +72,7 @@ class ValidationService:
                     timestamp=event.timestamp,
                     confidence=event.confidence,
                     class_label=event.class_label,
+                    bounding_box=event.bounding_box,
                     validation_result=event.validation_result,
                     ground_truth_match_id=event.ground_truth_match_id,
                     created_at=event.created_at
@@ -93,32 +98,25 @@ class ValidationService:
         """Calculate precision, recall, F1, and accuracy metrics"""
         tolerance_seconds = tolerance_ms / 1000.0
         
-        # Count TP, FP, FN
-        true_positives = 0
-        false_positives = 0
-        
-        # Track which ground truth objects were detected
-        detected_gt_objects = set()
+        # Greedy by default: each detection claims the first unclaimed ground truth in tolerance,
+        # optionally restricted to the same class and a minimum box IoU
+        engine = MatchingEngine.from_objects(ground_truth_objects)
+        matches = engine.match(
+            [detection.timestamp for detection in detection_events],
+            tolerance_seconds,
+            detection_class_labels=[getattr(detection, "class_label", None) for detection in detection_events],
+            detection_boxes=boxes_to_array(getattr(detection, "bounding_box", None) for detection in detection_events)
+            if self.iou_threshold is not None else None,
+            require_class=self.require_class,
+            iou_threshold=self.iou_threshold,
+            mode=self.match_mode
+        )
         
-        for detection in detection_events:
-            is_match = False
-            
-            for i, gt_obj in enumerate(ground_truth_objects):
-                if i in detected_gt_objects:
-                    continue
-                    
-                time_diff = abs(gt_obj.timestamp - detection.timestamp)
-                if time_diff <= tolerance_seconds:
-                    true_positives += 1
-                    detected_gt_objects.add(i)
-                    is_match = True
-                    break
-            
-            if not is_match:
-                false_positives += 1
+        true_positives = int(np.count_nonzero(matches != UNMATCHED))
+        false_positives = len(detection_events) - true_positives
         
         # False negatives are ground truth objects that weren't detected
-        false_negatives = len(ground_truth_objects) - len(detected_gt_objects)
+        false_negatives = len(ground_truth_objects) - true_positives
         
         # Calculate metrics
         precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
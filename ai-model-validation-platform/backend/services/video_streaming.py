@@ -0,0 +1,174 @@
+import asyncio
+import mimetypes
+import os
+import re
+import uuid
+from email.utils import formatdate
+from typing import List, Optional, Tuple
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from config import settings
+
+RANGE_SPEC_PATTERN = re.compile(r"^(\d*)-(\d*)$")
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range_header(header: Optional[str], file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a 'bytes=...' Range header into inclusive (start, end) ranges clamped to the file.
+
+    Returns None when the header is absent or not a byte range (serve the whole file) and
+    raises RangeNotSatisfiable when no requested range overlaps the file. Overlapping and
+    adjacent ranges are merged so a response never repeats bytes.
+    """
+    if not header:
+        return None
+    unit, _, specs = header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+
+    ranges: List[Tuple[int, int]] = []
+    for spec in specs.split(","):
+        match = RANGE_SPEC_PATTERN.match(spec.strip())
+        if not match or match.group(0) == "-":
+            return None  # Malformed headers are ignored per RFC 9110
+        first, last = match.group(1), match.group(2)
+        if first == "":
+            # Suffix range: the final N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(file_size - length, 0), file_size - 1))
+            continue
+        start = int(first)
+        end = int(last) if last else file_size - 1
+        if end < start:
+            return None
+        if start < file_size:
+            ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges or file_size == 0:
+        raise RangeNotSatisfiable(f"bytes */{file_size}")
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def make_etag(file_path: str, file_hash: Optional[str] = None) -> str:
+    """Strong ETag from the content hash, or from size and mtime for files uploaded before hashing"""
+    if file_hash:
+        return f'"{file_hash}"'
+    stat = os.stat(file_path)
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match / If-Range value names this ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+class VideoFileResponse(Response):
+    """
+    Serves a stored video, whole or as byte ranges, without loading it into memory.
+
+    When the ASGI server offers the zero-copy send extension the open file is handed to it
+    directly (sendfile); otherwise only the requested bytes are read with pread in
+    worker threads, so seeking to the end of a multi-GB clip costs one bounded read.
+    """
+
+    def __init__(self, file_path: str, request_headers, etag: str, method: str = "GET",
+                 media_type: Optional[str] = None, chunk_size: Optional[int] = None,
+                 cache_control: str = "private, max-age=0, must-revalidate"):
+        self.file_path = file_path
+        self.send_body = method.upper() != "HEAD"
+        self.chunk_size = chunk_size or settings.video_stream_chunk_size
+        stat = os.stat(file_path)
+        self.file_size = stat.st_size
+        content_type = media_type or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+        super().__init__(status_code=200, media_type=None)
+        self.raw_headers = []
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": cache_control
+        }
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if if_range and if_range.strip() != etag:
+            range_header = None  # The client's partial copy is stale - send everything
+
+        self.ranges = parse_range_header(range_header, self.file_size)
+        self.boundary = None
+        self.parts: List[Tuple[bytes, int, int]] = []
+        if self.ranges is None:
+            self.parts = [(b"", 0, self.file_size - 1)]
+            headers["content-type"] = content_type
+            headers["content-length"] = str(self.file_size)
+        elif len(self.ranges) == 1:
+            start, end = self.ranges[0]
+            self.status_code = 206
+            self.parts = [(b"", start, end)]
+            headers["content-type"] = content_type
+            headers["content-range"] = f"bytes {start}-{end}/{self.file_size}"
+            headers["content-length"] = str(end - start + 1)
+        else:
+            self.status_code = 206
+            self.boundary = uuid.uuid4().hex
+            for start, end in self.ranges:
+                preamble = (
+                    f"--{self.boundary}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{self.file_size}\r\n\r\n"
+                ).encode("latin-1")
+                self.parts.append((preamble, start, end))
+            self.epilogue = f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+            length = sum(len(preamble) + end - start + 1 for preamble, start, end in self.parts)
+            length += 2 * (len(self.parts) - 1) + len(self.epilogue)
+            headers["content-type"] = f"multipart/byteranges; boundary={self.boundary}"
+            headers["content-length"] = str(length)
+
+        self.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.file_size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        # Unbuffered: the extension takes a file object, the fallback preads its descriptor
+        with open(self.file_path, "rb", buffering=0) as file:
+            for index, (preamble, start, end) in enumerate(self.parts):
+                if index > 0:
+                    preamble = b"\r\n" + preamble
+                if preamble:
+                    await send({"type": "http.response.body", "body": preamble, "more_body": True})
+                if zerocopy:
+                    await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": start,
+                                "count": end - start + 1, "more_body": True})
+                else:
+                    await self._send_range(file.fileno(), start, end, send)
+            epilogue = self.epilogue if self.boundary else b""
+            await send({"type": "http.response.body", "body": epilogue, "more_body": False})
+
+    async def _send_range(self, fd: int, start: int, end: int, send: Send):
+        position = start
+        while position <= end:
+            chunk = await asyncio.to_thread(os.pread, fd, min(self.chunk_size, end - position + 1), position)
+            if not chunk:
+                break  # File was truncated underneath us
+            position += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
@@ -3,14 +3,91 @@ Test configuration for London School TDD
 Provides comprehensive mocks for all external dependencies
 """
 import pytest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 import sys
 import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+@pytest.fixture
+def engine():
+    """Fresh in-memory database; StaticPool shares one connection so worker threads see the same data"""
+    from database import Base
+    import models  # noqa: F401 - registers the tables on Base.metadata
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Session factory bound to the test database, for patching a module's SessionLocal"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def api_db(session_factory):
+    """Serve the API's get_db dependency from the test database"""
+    from main import app, get_db
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield session_factory
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    """Store uploads under the test's temporary directory"""
+    from config import settings
+
+    path = str(tmp_path / "uploads")
+    with patch.object(settings, 'upload_directory', path):
+        yield path
+
+
+@pytest.fixture
+def background_uploads():
+    """Skip the metadata probe and thumbnails scheduled after an upload; they have their own tests"""
+    with patch('main.metadata_prober.schedule'), patch('main.video_thumbnailer.schedule'):
+        yield
+
+
+@pytest.fixture
+def validation_caches():
+    """Start and finish with empty ground truth indexes and session metrics"""
+    from services.ground_truth_index import ground_truth_indexes
+    from services.session_metrics import session_metrics
+
+    ground_truth_indexes.clear()
+    session_metrics.clear()
+    yield
+    ground_truth_indexes.clear()
+    session_metrics.clear()
+
+
 @pytest.fixture
 def mock_db_session():
     """Mock database session for London School TDD"""
@@ -0,0 +1,100 @@
+"""
+Batch detection event ingestion tests - one insert and commit, per-event results, aggregated emit
+"""
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video, TestSession, DetectionEvent
+from config import settings
+from crud import bulk_create_ground_truth_objects
+from main import app
+
+pytestmark = pytest.mark.usefixtures("validation_caches")
+
+
+@pytest.fixture
+def client(api_db):
+    with patch('main.sio.emit', new_callable=AsyncMock) as emit:
+        test_client = TestClient(app)
+        test_client.emit = emit
+        yield test_client
+
+
+def add_session(db, timestamps=(1.0, 2.0, 3.0)):
+    project = Project(name="Batch", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.flush()
+    bulk_create_ground_truth_objects(db, video.id, [
+        {"timestamp": t, "class_label": "person", "bounding_box": None, "confidence": 0.9}
+        for t in timestamps
+    ])
+    test_session = TestSession(name="Run", project_id=project.id, video_id=video.id, tolerance_ms=100)
+    db.add(test_session)
+    db.commit()
+    return test_session
+
+
+class TestDetectionBatch:
+    """POST /api/detection-events/batch"""
+
+    def test_batch_is_stored_scored_and_announced_once(self, db, client, engine):
+        first, second = add_session(db), add_session(db)
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        response = client.post("/api/detection-events/batch", json={"events": [
+            {"testSessionId": first.id, "timestamp": 1.0, "classLabel": "person"},
+            {"testSessionId": first.id, "timestamp": 1.01},
+            {"testSessionId": second.id, "timestamp": 2.0, "confidence": 0.8},
+        ]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 3
+        assert [d["validation_result"] for d in body["detections"]] == ["TP", "FP", "TP"]
+        stored = {row.id: row.validation_result for row in db.query(DetectionEvent).all()}
+        assert {d["detection_id"]: d["validation_result"] for d in body["detections"]} == stored
+        assert sum(s.lstrip().upper().startswith("INSERT INTO DETECTION_EVENTS") for s in statements) == 1
+        assert sum(s.strip().upper() == "COMMIT" for s in statements) <= 1
+
+        batches = [call for call in client.emit.call_args_list if call.args[0] == 'detection_events']
+        assert [len(call.args[1]["events"]) for call in batches] == [2, 1]
+        assert batches[0].kwargs["room"] == f"test_session_{first.id}"
+        metrics = [call for call in client.emit.call_args_list if call.args[0] == 'session_metrics']
+        assert len(metrics) == 2
+
+        results = client.get(f"/api/test-sessions/{first.id}/results").json()
+        assert results["true_positives"] == 1 and results["false_positives"] == 1
+
+    def test_invalid_event_rejects_whole_batch(self, db, client):
+        test_session = add_session(db)
+
+        response = client.post("/api/detection-events/batch", json={"events": [
+            {"testSessionId": test_session.id, "timestamp": 1.0},
+            {"testSessionId": test_session.id, "timestamp": -1.0},
+            {"testSessionId": test_session.id, "timestamp": 2.0, "confidence": 1.5},
+        ]})
+
+        assert response.status_code == 400
+        assert "Event 1" in response.json()["detail"] and "Event 2" in response.json()["detail"]
+        assert db.query(DetectionEvent).count() == 0
+
+    def test_batch_size_limit(self, db, client):
+        test_session = add_session(db)
+        events = [{"testSessionId": test_session.id, "timestamp": 1.0}] * 3
+
+        with patch.object(settings, 'detection_batch_max_events', 2):
+            response = client.post("/api/detection-events/batch", json={"events": events})
+
+        assert response.status_code == 413
@@ -0,0 +1,191 @@
+"""
+Detection write-behind buffer tests - group commit, bounded capacity, shutdown flush, buffered ingest
+"""
+import asyncio
+import uuid
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video, TestSession, DetectionEvent
+from config import settings
+from crud import bulk_create_ground_truth_objects
+from main import app
+from services.detection_writer import DetectionWriteBuffer, DetectionBufferFull
+from services.session_metrics import session_metrics
+
+pytestmark = pytest.mark.usefixtures("validation_caches")
+
+
+@pytest.fixture(autouse=True)
+def writer_db(session_factory):
+    """Group commits go to the test database"""
+    with patch('services.detection_writer.SessionLocal', session_factory):
+        yield
+
+
+def add_session(db):
+    project = Project(name="Buffered", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.flush()
+    bulk_create_ground_truth_objects(db, video.id, [
+        {"timestamp": t, "class_label": "person", "bounding_box": None, "confidence": 0.9}
+        for t in (1.0, 2.0)
+    ])
+    test_session = TestSession(name="Run", project_id=project.id, video_id=video.id, tolerance_ms=100)
+    db.add(test_session)
+    db.commit()
+    return test_session
+
+
+def rows(session_id, count, start=0.0):
+    return [{"id": str(uuid.uuid4()), "test_session_id": session_id, "timestamp": start + i,
+             "confidence": 0.9, "class_label": "person", "bounding_box": None,
+             "validation_result": "FP", "ground_truth_match_id": None}
+            for i in range(count)]
+
+
+def stored(db):
+    db.expire_all()
+    return db.query(DetectionEvent).count()
+
+
+class TestDetectionWriteBuffer:
+    """Buffered rows are written in group commits"""
+
+    def test_flush_writes_in_batches(self, db):
+        test_session = add_session(db)
+        buffer = DetectionWriteBuffer(max_events=100, flush_interval_ms=50, flush_max_events=4)
+
+        buffer.submit(rows(test_session.id, 10))
+        assert stored(db) == 0 and len(buffer) == 10
+
+        assert buffer.flush() == 10
+        assert stored(db) == 10
+        assert buffer.stats()["flushes"] == 3 and len(buffer) == 0
+
+    def test_capacity(self, db):
+        buffer = DetectionWriteBuffer(max_events=3, flush_interval_ms=50, flush_max_events=10)
+
+        buffer.submit(rows("session", 2))
+        with pytest.raises(DetectionBufferFull):
+            buffer.submit(rows("session", 2))
+        assert len(buffer) == 2
+
+    def test_reservations_count_against_capacity(self, db):
+        buffer = DetectionWriteBuffer(max_events=3, flush_interval_ms=50, flush_max_events=10)
+
+        buffer.reserve(2)
+        with pytest.raises(DetectionBufferFull):
+            buffer.reserve(2)
+        with pytest.raises(DetectionBufferFull):
+            buffer.submit(rows("session", 2))
+
+        buffer.submit(rows("session", 2), reserved=True)
+        assert len(buffer) == 2 and buffer.stats()["reserved"] == 0
+        buffer.reserve(1)
+        buffer.release(1)
+        buffer.submit(rows("session", 1))
+        assert len(buffer) == 3
+
+    def test_bad_row_does_not_lose_batch(self, db):
+        test_session = add_session(db)
+        buffer = DetectionWriteBuffer(max_events=100, flush_interval_ms=50, flush_max_events=10)
+        batch = rows(test_session.id, 3)
+        batch[2]["id"] = batch[0]["id"]  # Primary key collision
+
+        assert buffer.flush() == 0
+        buffer.submit(batch)
+
+        assert buffer.flush() == 2
+        assert stored(db) == 2 and buffer.dropped == 1
+
+    def test_background_flush_and_shutdown_flush(self, db):
+        test_session = add_session(db)
+
+        async def scenario():
+            buffer = DetectionWriteBuffer(max_events=100, flush_interval_ms=10, flush_max_events=50)
+            await buffer.start()
+            buffer.submit(rows(test_session.id, 3))
+            for _ in range(100):
+                if stored(db) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            flushed_in_background = stored(db)
+
+            buffer.flush_interval = 60.0  # Nothing else is written until shutdown
+            await asyncio.sleep(0.05)
+            buffer.submit(rows(test_session.id, 2, start=10.0))
+            await buffer.stop()
+            return flushed_in_background
+
+        assert asyncio.run(scenario()) == 3
+        assert stored(db) == 5
+
+
+class TestBufferedIngest:
+    """Detection endpoints ack before the group commit in buffered mode"""
+
+    @pytest.fixture
+    def buffer(self, api_db):
+        buffer = DetectionWriteBuffer(max_events=3, flush_interval_ms=50, flush_max_events=100)
+        buffer._running = True  # As if started by the app's startup hook
+        with patch('main.detection_writer', buffer), \
+             patch('services.detection_ingest.detection_writer', buffer), \
+             patch('services.session_metrics.detection_writer', buffer), \
+             patch.object(settings, 'detection_ingest_durability', 'buffered'), \
+             patch('main.sio.emit', new_callable=AsyncMock):
+            yield buffer
+
+    def test_acked_then_written(self, db, buffer):
+        test_session = add_session(db)
+        client = TestClient(app)
+
+        single = client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 1.0})
+        batch = client.post("/api/detection-events/batch", json={"events": [
+            {"testSessionId": test_session.id, "timestamp": 2.0},
+        ]})
+
+        assert single.json()["status"] == "accepted" and single.json()["validation_result"] == "TP"
+        assert batch.json()["status"] == "accepted"
+        assert stored(db) == 0
+        assert client.get("/api/detection-events/buffer").json()["pending"] == 2
+
+        buffer.flush()
+        ids = {row.id for row in db.query(DetectionEvent).all()}
+        assert ids == {single.json()["detection_id"], batch.json()["detections"][0]["detection_id"]}
+
+    def test_full_buffer_is_503(self, db, buffer):
+        test_session = add_session(db)
+        client = TestClient(app)
+        events = [{"testSessionId": test_session.id, "timestamp": 5.0}] * 3
+        assert client.post("/api/detection-events/batch", json={"events": events}).status_code == 200
+
+        response = client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 1.0})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        # Refused before scoring: running metrics are kept and nothing is flushed to rebuild them
+        assert len(buffer) == 3 and buffer.stats()["reserved"] == 0
+        results = client.get(f"/api/test-sessions/{test_session.id}/results").json()
+        assert results["total_detections"] == 3
+        assert len(buffer) == 3
+
+    def test_metrics_rebuild_flushes_buffer_first(self, db, buffer):
+        test_session = add_session(db)
+        client = TestClient(app)
+        client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 1.0})
+
+        session_metrics.clear()
+        results = client.get(f"/api/test-sessions/{test_session.id}/results").json()
+
+        assert results["true_positives"] == 1
+        assert len(buffer) == 0
@@ -0,0 +1,148 @@
+"""
+Ground truth index tests - per-session in-memory index, LRU eviction and invalidation
+"""
+import math
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video, TestSession
+from crud import bulk_create_ground_truth_objects
+from main import app
+from services import ground_truth_index
+from services.ground_truth_index import GroundTruthIndex, GroundTruthIndexCache, ground_truth_indexes
+from services.validation_service import ValidationService
+
+
+pytestmark = pytest.mark.usefixtures("validation_caches")
+
+
+@pytest.fixture(autouse=True)
+def validation_db(session_factory):
+    """ValidationService opens its sessions on the test database"""
+    with patch('services.validation_service.SessionLocal', session_factory):
+        yield
+
+
+def add_session(db, timestamps=(1.0, 2.0, 3.0), tolerance_ms=100):
+    project = Project(name="Index", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.flush()
+    bulk_create_ground_truth_objects(db, video.id, [
+        {"timestamp": t, "class_label": "person",
+         "bounding_box": {"x": 10, "y": 20, "width": 30, "height": 40}, "confidence": 0.9}
+        for t in timestamps
+    ])
+    test_session = TestSession(name="Run", project_id=project.id, video_id=video.id, tolerance_ms=tolerance_ms)
+    db.add(test_session)
+    db.commit()
+    return test_session
+
+
+class TestGroundTruthIndex:
+    """Compact arrays built from ground truth rows"""
+
+    def test_arrays(self):
+        rows = [
+            ("b", 2.0, "cyclist", None),
+            ("a", 1.0, "person", {"x": 1, "y": 2, "width": 3, "height": 4}),
+        ]
+
+        index = GroundTruthIndex("session", "video", 100, rows)
+
+        assert index.ids == ["a", "b"]
+        assert index.timestamps.tolist() == [1.0, 2.0]
+        assert [index.class_names[code] for code in index.class_codes] == ["person", "cyclist"]
+        assert index.class_code("truck") == -2
+        assert index.boxes[0].tolist() == [1, 2, 3, 4]
+        assert all(math.isnan(value) for value in index.boxes[1])
+        assert index.has_match(1.05) and not index.has_match(1.5)
+
+
+class TestGroundTruthIndexCache:
+    """Indexes are cached per session, evicted LRU and invalidated by video"""
+
+    def test_load_once_then_serve_from_memory(self, db):
+        test_session = add_session(db)
+        cache = GroundTruthIndexCache(max_sessions=4)
+
+        assert cache.get(test_session.id) is None
+        index = cache.load(db, test_session.id)
+        with patch.object(ground_truth_index, 'get_ground_truth_rows') as rows:
+            assert cache.load(db, test_session.id) is index
+        rows.assert_not_called()
+        assert cache.load(db, "missing") is None
+
+    def test_lru_eviction(self, db):
+        sessions = [add_session(db) for _ in range(3)]
+        cache = GroundTruthIndexCache(max_sessions=2)
+
+        cache.load(db, sessions[0].id)
+        cache.load(db, sessions[1].id)
+        cache.get(sessions[0].id)  # Most recently used
+        cache.load(db, sessions[2].id)
+
+        assert cache.get(sessions[1].id) is None
+        assert cache.get(sessions[0].id) is not None
+        assert cache.stats()["sessions"] == 2
+
+    def test_invalidate_video(self, db):
+        test_session = add_session(db)
+        cache = GroundTruthIndexCache(max_sessions=4)
+        assert len(cache.load(db, test_session.id)) == 3
+
+        bulk_create_ground_truth_objects(db, test_session.video_id, [
+            {"timestamp": 9.0, "class_label": "person", "bounding_box": None, "confidence": 0.5}
+        ])
+        assert cache.invalidate_video(test_session.video_id) == 1
+
+        assert len(cache.load(db, test_session.id)) == 4
+
+    def test_index_built_across_invalidation_is_not_cached(self, db):
+        test_session = add_session(db)
+        cache = GroundTruthIndexCache(max_sessions=4)
+        original_rows = ground_truth_index.get_ground_truth_rows
+
+        def rows_then_invalidate(session, video_id):
+            rows = original_rows(session, video_id)
+            cache.invalidate_video(video_id)
+            return rows
+
+        with patch.object(ground_truth_index, 'get_ground_truth_rows', side_effect=rows_then_invalidate):
+            assert cache.load(db, test_session.id) is not None
+        assert cache.get(test_session.id) is None
+
+
+class TestRealTimeValidation:
+    """validate_detection reads ground truth once per session"""
+
+    def test_validate_detection_uses_cached_index(self, db):
+        test_session = add_session(db)
+        service = ValidationService()
+
+        assert service.validate_detection(test_session.id, 2.05) == "TP"
+        with patch.object(ground_truth_index, 'get_ground_truth_rows') as rows:
+            assert service.validate_detection(test_session.id, 2.5) == "FP"
+        rows.assert_not_called()
+        assert service.validate_detection("missing", 1.0) == "ERROR"
+
+    def test_session_start_builds_index_and_video_delete_invalidates(self, api_db, db):
+        existing = add_session(db)
+        client = TestClient(app)
+
+        response = client.post("/api/test-sessions", json={
+            "name": "Live run", "project_id": existing.project_id, "video_id": existing.video_id
+        })
+
+        session_id = response.json()["id"]
+        assert ground_truth_indexes.get(session_id) is not None
+        assert client.delete(f"/api/videos/{existing.video_id}").status_code == 200
+        assert ground_truth_indexes.get(session_id) is None
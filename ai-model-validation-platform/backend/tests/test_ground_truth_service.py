@@ -0,0 +1,516 @@
+"""
+Ground truth service tests - batched persistence and detection extraction
+"""
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import Mock, patch
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video, GroundTruthObject
+from crud import bulk_create_ground_truth_objects
+from services.ground_truth_service import GroundTruthService, _batch_frames
+
+
+@pytest.fixture(autouse=True)
+def inference_cache_dir(tmp_path):
+    """Keep inference cache entries out of the working tree"""
+    cache_dir = str(tmp_path / "inference-cache")
+    with patch.object(settings, 'inference_cache_dir', cache_dir):
+        yield cache_dir
+
+
+@pytest.fixture
+def db_session(db):
+    project = Project(name="GT Project", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.commit()
+    db.video_id = video.id
+    return db
+
+
+@pytest.fixture
+def synthetic_video(tmp_path):
+    """Write a short 30 fps clip whose frames encode their own index"""
+    path = str(tmp_path / "synthetic.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for index in range(40):
+        frame = np.full((48, 64, 3), index * 5, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class FakeTensor:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class FakeBox:
+    def __init__(self, class_id, confidence, xyxy):
+        self.cls = FakeTensor([class_id])
+        self.conf = FakeTensor([confidence])
+        self.xyxy = FakeTensor([xyxy])
+
+
+class FakeBoxes(list):
+    """Iterable of per-box views that also exposes whole-frame arrays"""
+
+    def __init__(self, rows):
+        super().__init__(FakeBox(*row) for row in rows)
+        self.cls = FakeTensor([row[0] for row in rows])
+        self.conf = FakeTensor([row[1] for row in rows])
+        self.xyxy = FakeTensor(np.array([row[2] for row in rows], dtype=np.float32).reshape(-1, 4))
+
+
+class FakeYOLO:
+    """Returns one person, one low-confidence person and one unmapped class per frame"""
+
+    def __init__(self):
+        self.calls = 0
+        self.frames_seen = 0
+
+    def __call__(self, frames, verbose=False):
+        self.calls += 1
+        batch = frames if isinstance(frames, list) else [frames]
+        self.frames_seen += len(batch)
+        rows = [
+            (0, 0.9, [10, 20, 30, 60]),
+            (0, 0.3, [0, 0, 5, 5]),
+            (15, 0.95, [1, 1, 2, 2]),
+        ]
+        return [Mock(boxes=FakeBoxes(rows)) for _ in batch]
+
+
+@pytest.fixture
+def ml_service():
+    service = GroundTruthService()
+    service.ml_available = True
+    service.model = FakeYOLO()
+    return service
+
+
+def make_frames(count):
+    """One detection per sampled frame, frames numbered 5, 10, 15, ..."""
+    return [((i + 1) * 5, [detection]) for i, detection in enumerate(make_detections(count))]
+
+
+def make_detections(count):
+    return [
+        {
+            "timestamp": i / 30.0,
+            "class_label": "person",
+            "bounding_box": {"x": 1.0, "y": 2.0, "width": 10.0, "height": 20.0},
+            "confidence": 0.9
+        }
+        for i in range(count)
+    ]
+
+
+class TestBatchedGroundTruthPersistence:
+    """Ground truth rows are written with multi-row inserts"""
+
+    def test_batch_frames_ends_on_frame_boundaries(self):
+        frames = [(5, ["a", "b"]), (10, []), (15, ["c", "d", "e"]), (20, ["f"])]
+
+        assert list(_batch_frames(frames, 3)) == [(15, ["a", "b", "c", "d", "e"]), (20, ["f"])]
+        assert list(_batch_frames([(5, []), (10, [])], 3)) == [(10, [])]
+        assert list(_batch_frames([], 3)) == []
+
+    def test_bulk_create_inserts_all_rows(self, db_session):
+        written = bulk_create_ground_truth_objects(db_session, db_session.video_id, make_detections(25))
+
+        assert written == 25
+        stored = db_session.query(GroundTruthObject).filter(
+            GroundTruthObject.video_id == db_session.video_id
+        ).all()
+        assert len(stored) == 25
+        assert len({obj.id for obj in stored}) == 25
+        assert stored[0].bounding_box["width"] == 10.0
+
+    def test_bulk_create_empty_batch_is_noop(self):
+        mock_db = Mock()
+        assert bulk_create_ground_truth_objects(mock_db, "video", []) == 0
+        mock_db.execute.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_store_detections_commits_once_per_batch(self, db_session):
+        service = GroundTruthService()
+
+        with patch.object(settings, 'ground_truth_batch_size', 10), \
+                patch.object(settings, 'ground_truth_commit_per_batch', True), \
+                patch.object(db_session, 'commit', wraps=db_session.commit) as commit_spy:
+            stats = service._store_detections(db_session, db_session.video_id, make_frames(25))
+
+        assert stats["rows"] == 25
+        assert stats["batches"] == 3
+        assert commit_spy.call_count == 3
+        assert stats["rows_per_second"] >= 0
+
+    def test_store_detections_single_commit_per_video(self, db_session):
+        service = GroundTruthService()
+
+        with patch.object(settings, 'ground_truth_batch_size', 10), \
+                patch.object(settings, 'ground_truth_commit_per_batch', False), \
+                patch.object(db_session, 'commit', wraps=db_session.commit) as commit_spy:
+            stats = service._store_detections(db_session, db_session.video_id, make_frames(25))
+
+        assert stats["batches"] == 3
+        assert commit_spy.call_count == 1
+        assert db_session.query(GroundTruthObject).count() == 25
+
+
+class TestStreamingDetectionExtraction:
+    """Detections are produced incrementally, one sampled frame at a time"""
+
+    def test_iter_frame_detections_is_lazy(self, ml_service, synthetic_video):
+        with patch.object(settings, 'ground_truth_inference_batch_size', 1):
+            stream = ml_service._iter_frame_detections(synthetic_video)
+            assert ml_service.model.calls == 0
+
+            frame_number, detections = next(stream)
+            stream.close()
+
+        assert frame_number == 5
+        assert ml_service.model.frames_seen == 1
+        assert len(detections) == 1
+
+    def test_stream_reports_progress(self, ml_service, synthetic_video):
+        progress = {}
+        frames = list(ml_service._iter_frame_detections(synthetic_video, progress=progress))
+
+        assert [frame for frame, _ in frames] == [5, 10, 15, 20, 25, 30, 35, 40]
+        assert progress["total_frames"] == 40
+        assert progress["frames_processed"] == 40
+        assert progress["detections"] == 8
+
+    def test_extract_detections_filters_and_timestamps(self, ml_service, synthetic_video):
+        detections = ml_service._extract_detections(synthetic_video)
+
+        assert len(detections) == 8
+        assert detections[0]["class_label"] == "person"
+        assert detections[0]["timestamp"] == pytest.approx(4 / 30.0)
+        assert detections[0]["bounding_box"] == {"x": 10.0, "y": 20.0, "width": 20.0, "height": 40.0}
+
+    def test_process_video_streams_into_batches(self, ml_service, synthetic_video, db_session):
+        with patch('services.ground_truth_service.SessionLocal', return_value=db_session), \
+                patch.object(db_session, 'close'), \
+                patch.object(settings, 'ground_truth_batch_size', 3):
+            ml_service._process_video(db_session.video_id, synthetic_video)
+
+        video = db_session.query(Video).filter(Video.id == db_session.video_id).first()
+        assert video.status == "completed"
+        assert video.ground_truth_generated is True
+        assert db_session.query(GroundTruthObject).count() == 8
+        assert ml_service.get_progress(db_session.video_id) is None
+
+
+class TestBatchedInference:
+    """Sampled frames are sent to the model in batches"""
+
+    def test_frames_are_batched_per_model_call(self, ml_service, synthetic_video):
+        with patch.object(settings, 'ground_truth_inference_batch_size', 3):
+            frames = list(ml_service._iter_frame_detections(synthetic_video))
+
+        # 8 sampled frames -> batches of 3, 3 and 2
+        assert ml_service.model.calls == 3
+        assert ml_service.model.frames_seen == 8
+        assert [frame for frame, _ in frames] == [5, 10, 15, 20, 25, 30, 35, 40]
+
+    def test_batched_results_keep_frame_timestamps(self, ml_service, synthetic_video):
+        with patch.object(settings, 'ground_truth_inference_batch_size', 4):
+            detections = ml_service._extract_detections(synthetic_video)
+
+        timestamps = [detection["timestamp"] for detection in detections]
+        assert timestamps == pytest.approx([(frame - 1) / 30.0 for frame in range(5, 41, 5)])
+
+
+class TestVectorizedBoxPostProcessing:
+    """Box filtering works on whole-frame arrays"""
+
+    def test_filters_by_class_and_confidence(self, ml_service):
+        boxes = FakeBoxes([
+            (0, 0.9, [10, 20, 30, 60]),
+            (1, 0.51, [5, 5, 15, 25]),
+            (0, 0.5, [0, 0, 1, 1]),
+            (15, 0.99, [0, 0, 1, 1]),
+            (7, 0.8, [100, 100, 150, 130]),
+        ])
+
+        detections = ml_service._boxes_to_detections(boxes, 2.5)
+
+        assert [d["class_label"] for d in detections] == ["person", "bicycle", "truck"]
+        assert all(d["timestamp"] == 2.5 for d in detections)
+        assert detections[2]["bounding_box"] == {"x": 100.0, "y": 100.0, "width": 50.0, "height": 30.0}
+        assert detections[1]["confidence"] == pytest.approx(0.51)
+        assert all(isinstance(d["confidence"], float) for d in detections)
+
+    def test_empty_and_missing_boxes(self, ml_service):
+        assert ml_service._boxes_to_detections(None, 0.0) == []
+        assert ml_service._boxes_to_detections(FakeBoxes([]), 0.0) == []
+
+    def test_respects_confidence_threshold_setting(self, ml_service):
+        boxes = FakeBoxes([(0, 0.6, [0, 0, 1, 1]), (0, 0.8, [0, 0, 2, 2])])
+
+        with patch.object(settings, 'ground_truth_confidence_threshold', 0.7):
+            detections = ml_service._boxes_to_detections(boxes, 0.0)
+
+        assert len(detections) == 1
+        assert detections[0]["bounding_box"]["width"] == 2.0
+
+
+class TestFrameSampling:
+    """Frame sampling skips decode for frames that are never analysed"""
+
+    def sample(self, service, path):
+        cap = cv2.VideoCapture(path)
+        try:
+            return [
+                (frame_number, timestamp, float(frame.mean()))
+                for frame_number, timestamp, frame in service._iter_sampled_frames(cap, cap.get(cv2.CAP_PROP_FPS))
+            ]
+        finally:
+            cap.release()
+
+    def test_grab_mode_matches_previous_sampling(self, ml_service, synthetic_video):
+        samples = self.sample(ml_service, synthetic_video)
+
+        assert [frame for frame, _, _ in samples] == [5, 10, 15, 20, 25, 30, 35, 40]
+        assert samples[1][1] == pytest.approx(9 / 30.0)
+        # Frame content encodes its 0-based index, so the decoded frame must be the sampled one
+        for frame_number, _, mean in samples:
+            assert mean == pytest.approx((frame_number - 1) * 5, abs=2)
+
+    def test_seek_mode_returns_exact_frames(self, ml_service, synthetic_video):
+        with patch.object(settings, 'ground_truth_frame_stride', 10), \
+                patch.object(settings, 'ground_truth_seek_stride_threshold', 2):
+            samples = self.sample(ml_service, synthetic_video)
+
+        assert [frame for frame, _, _ in samples] == [10, 20, 30, 40]
+        for frame_number, timestamp, mean in samples:
+            assert timestamp == pytest.approx((frame_number - 1) / 30.0)
+            assert mean == pytest.approx((frame_number - 1) * 5, abs=2)
+
+    def test_stride_in_seconds(self, ml_service, synthetic_video):
+        with patch.object(settings, 'ground_truth_sample_interval_seconds', 0.5):
+            samples = self.sample(ml_service, synthetic_video)
+
+        assert [frame for frame, _, _ in samples] == [15, 30]
+        assert samples[1][1] == pytest.approx(29 / 30.0)
+
+
+class TestGroundTruthExecutors:
+    """Video jobs run on a thread pool, a process pool or inline"""
+
+    def test_executor_modes(self):
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        with patch.object(settings, 'ground_truth_workers', 3):
+            process_service = GroundTruthService(executor_mode="process")
+            thread_service = GroundTruthService(executor_mode="thread")
+            inline_service = GroundTruthService(executor_mode="inline")
+
+        try:
+            assert isinstance(process_service.executor, ProcessPoolExecutor)
+            assert process_service.executor._max_workers == 3
+            assert isinstance(thread_service.executor, ThreadPoolExecutor)
+            assert inline_service.executor is None
+        finally:
+            process_service.shutdown()
+            thread_service.shutdown()
+            inline_service.shutdown()
+
+    def test_worker_entry_point_reuses_worker_service(self):
+        import services.ground_truth_service as gt_module
+
+        worker_service = Mock()
+        with patch.object(gt_module, '_worker_service', worker_service):
+            gt_module._process_video_in_worker("video-1", "/tmp/a.mp4")
+            gt_module._process_video_in_worker("video-2", "/tmp/b.mp4")
+
+        assert worker_service._process_video.call_args_list == [
+            (("video-1", "/tmp/a.mp4"), {"job_id": None, "start_frame": 0}),
+            (("video-2", "/tmp/b.mp4"), {"job_id": None, "start_frame": 0}),
+        ]
+
+    def test_process_mode_does_not_warm_up_in_the_api(self):
+        service = GroundTruthService(executor_mode="inline")
+        service.executor_mode = "process"
+
+        with patch('services.ground_truth_service.model_registry') as registry:
+            assert service.warm_up(background=False) is None
+
+        registry.warm_up.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_mode_submits_worker_function(self):
+        import services.ground_truth_service as gt_module
+
+        service = GroundTruthService(executor_mode="inline")
+        service.executor_mode = "process"
+        loop = Mock()
+        loop.run_in_executor = Mock(return_value=_completed_future())
+
+        with patch('services.ground_truth_service.asyncio.get_event_loop', return_value=loop):
+            await service.process_video_async("video-1", "/tmp/a.mp4")
+
+        loop.run_in_executor.assert_called_once_with(
+            None, gt_module._process_video_in_worker, "video-1", "/tmp/a.mp4", None, 0
+        )
+
+
+def _completed_future():
+    import asyncio
+    future = asyncio.get_event_loop().create_future()
+    future.set_result(None)
+    return future
+
+
+class TestResumableProcessing:
+    """Checkpoints let an interrupted video resume after its last persisted frame"""
+
+    def test_resume_skips_checkpointed_frames(self, ml_service, synthetic_video):
+        frames = list(ml_service._iter_frame_detections(synthetic_video, start_frame=20))
+
+        assert [frame for frame, _ in frames] == [25, 30, 35, 40]
+        assert frames[0][1][0]["timestamp"] == pytest.approx(24 / 30.0)
+
+    def test_checkpoint_committed_with_each_batch(self, ml_service, synthetic_video, db_session):
+        from crud import enqueue_processing_job, get_processing_job
+
+        job = enqueue_processing_job(db_session, db_session.video_id)
+        checkpoints = []
+
+        def record_checkpoint(db, job_id, last_frame, commit=True):
+            checkpoints.append(last_frame)
+            update_checkpoint(db, job_id, last_frame, commit=commit)
+
+        import services.ground_truth_service as gt_module
+        update_checkpoint = gt_module.update_processing_job_checkpoint
+
+        with patch('services.ground_truth_service.SessionLocal', return_value=db_session), \
+                patch.object(db_session, 'close'), \
+                patch.object(gt_module, 'update_processing_job_checkpoint', side_effect=record_checkpoint), \
+                patch.object(settings, 'ground_truth_batch_size', 3):
+            assert ml_service._process_video(db_session.video_id, synthetic_video, job_id=job.id, start_frame=10)
+
+        assert checkpoints == [25, 40]
+        assert get_processing_job(db_session, job.id).last_frame == 40
+        assert db_session.query(GroundTruthObject).count() == 6
+
+    def test_partial_ground_truth_reports_checkpoint(self, session_factory, db_session):
+        from crud import enqueue_processing_job, update_processing_job_checkpoint, complete_processing_job
+
+        job = enqueue_processing_job(db_session, db_session.video_id)
+        bulk_create_ground_truth_objects(db_session, db_session.video_id, [
+            {"timestamp": 1.0, "class_label": "person", "bounding_box": None, "confidence": 0.9}
+        ])
+        update_processing_job_checkpoint(db_session, job.id, 30)
+        service = GroundTruthService(executor_mode="inline")
+
+        with patch('services.ground_truth_service.SessionLocal', session_factory):
+            partial = service.get_ground_truth(db_session.video_id)
+            complete_processing_job(db_session, job.id)
+            done = service.get_ground_truth(db_session.video_id)
+
+        assert (partial.status, partial.last_frame, partial.total_detections) == ("processing", 30, 1)
+        assert (done.status, done.last_frame, done.total_detections) == ("completed", None, 1)
+
+
+class TestInferenceResultCache:
+    """Per-frame detections are cached by content hash, model and sampling"""
+
+    def test_second_pass_replays_cache_without_inference(self, ml_service, synthetic_video):
+        first = list(ml_service._iter_frame_detections(synthetic_video))
+        calls = ml_service.model.calls
+
+        progress = {}
+        second = list(ml_service._iter_frame_detections(synthetic_video, progress=progress))
+
+        assert second == first
+        assert ml_service.model.calls == calls
+        assert progress["frames_processed"] == 40
+        assert progress["detections"] == 8
+
+    def test_cache_is_content_addressed(self, ml_service, synthetic_video, tmp_path):
+        import shutil
+
+        list(ml_service._iter_frame_detections(synthetic_video))
+        calls = ml_service.model.calls
+
+        copy_path = str(tmp_path / "same-clip-other-project.avi")
+        shutil.copyfile(synthetic_video, copy_path)
+        frames = list(ml_service._iter_frame_detections(copy_path, start_frame=20))
+
+        assert ml_service.model.calls == calls
+        assert [frame for frame, _ in frames] == [25, 30, 35, 40]
+
+    def test_sampling_change_misses_cache(self, ml_service, synthetic_video):
+        list(ml_service._iter_frame_detections(synthetic_video))
+        calls = ml_service.model.calls
+
+        with patch.object(settings, 'ground_truth_frame_stride', 10):
+            frames = list(ml_service._iter_frame_detections(synthetic_video))
+
+        assert ml_service.model.calls > calls
+        assert [frame for frame, _ in frames] == [10, 20, 30, 40]
+
+    def test_partial_pass_is_not_cached(self, ml_service, synthetic_video, inference_cache_dir):
+        with patch.object(settings, 'ground_truth_inference_batch_size', 1):
+            stream = ml_service._iter_frame_detections(synthetic_video)
+            next(stream)
+            stream.close()
+
+        list(ml_service._iter_frame_detections(synthetic_video, start_frame=20))
+
+        cached = [name for _, _, files in os.walk(inference_cache_dir) for name in files]
+        assert cached == []
+
+    def test_process_video_cache_hit_does_not_load_model(self, ml_service, synthetic_video, db_session):
+        list(ml_service._iter_frame_detections(synthetic_video))
+        ml_service.model = None  # Back to loading from the registry
+        registry = Mock()
+
+        with patch('services.ground_truth_service.SessionLocal', return_value=db_session), \
+                patch.object(db_session, 'close'), \
+                patch('services.ground_truth_service.model_registry', registry):
+            assert ml_service._process_video(db_session.video_id, synthetic_video)
+
+        registry.get.assert_not_called()
+        assert db_session.query(GroundTruthObject).count() == 8
+        assert db_session.get(Video, db_session.video_id).status == "completed"
+
+    def test_process_video_unloadable_model_on_miss(self, synthetic_video, db_session):
+        service = GroundTruthService(executor_mode="inline")
+        service.ml_available = True
+        registry = Mock()
+        registry.get.return_value = None
+
+        with patch('services.ground_truth_service.SessionLocal', return_value=db_session), \
+                patch.object(db_session, 'close'), \
+                patch('services.ground_truth_service.model_registry', registry):
+            assert service._process_video(db_session.video_id, synthetic_video)
+
+        assert db_session.get(Video, db_session.video_id).status == "ml_unavailable"
+
+    def test_disabled_cache_always_runs_model(self, ml_service, synthetic_video):
+        with patch.object(settings, 'inference_cache_enabled', False):
+            list(ml_service._iter_frame_detections(synthetic_video))
+            calls = ml_service.model.calls
+            list(ml_service._iter_frame_detections(synthetic_video))
+
+        assert ml_service.model.calls == 2 * calls
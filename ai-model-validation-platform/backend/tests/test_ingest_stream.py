@@ -0,0 +1,115 @@
+"""
+Streaming ingest namespace tests - credit window, per-message acks, error acks
+"""
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video, TestSession, DetectionEvent
+from crud import bulk_create_ground_truth_objects
+from services.ingest_stream import IngestNamespace
+
+pytestmark = pytest.mark.usefixtures("validation_caches")
+
+
+@pytest.fixture(autouse=True)
+def ingest_db(session_factory):
+    """The namespace stores events in the test database and emits nowhere"""
+    with patch('services.ingest_stream.SessionLocal', session_factory), \
+         patch('services.detection_ingest.sio.emit', new_callable=AsyncMock):
+        yield
+
+
+def add_session(db):
+    project = Project(name="Stream", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.flush()
+    bulk_create_ground_truth_objects(db, video.id, [
+        {"timestamp": 1.0, "class_label": "person", "bounding_box": None, "confidence": 0.9}
+    ])
+    test_session = TestSession(name="Run", project_id=project.id, video_id=video.id, tolerance_ms=100)
+    db.add(test_session)
+    db.commit()
+    return test_session
+
+
+class TestIngestNamespace:
+    """Events messages are stored and acknowledged with credit"""
+
+    def test_hello_and_ack(self, db):
+        test_session = add_session(db)
+        namespace = IngestNamespace(credits=4)
+
+        async def scenario():
+            await namespace.on_connect("sid", {})
+            hello = await namespace.on_hello("sid")
+            ack = await namespace.on_events("sid", {"seq": 7, "events": [
+                {"test_session_id": test_session.id, "timestamp": 1.0},
+                {"test_session_id": test_session.id, "timestamp": 9.0},
+            ]})
+            return hello, ack
+
+        hello, ack = asyncio.run(scenario())
+
+        assert hello["credit"] == 4
+        assert ack["seq"] == 7 and ack["credit"] == 1 and ack["count"] == 2
+        assert [d["validation_result"] for d in ack["detections"]] == ["TP", "FP"]
+        assert db.query(DetectionEvent).count() == 2
+
+    def test_error_acks(self, db):
+        test_session = add_session(db)
+        namespace = IngestNamespace(credits=4)
+
+        async def scenario():
+            await namespace.on_connect("sid", {})
+            malformed = await namespace.on_events("sid", {"seq": 1})
+            invalid = await namespace.on_events("sid", {"seq": 2, "events": [
+                {"test_session_id": test_session.id, "timestamp": -1.0}
+            ]})
+            return malformed, invalid
+
+        malformed, invalid = asyncio.run(scenario())
+
+        assert malformed["error"] and malformed["retry"] is False and malformed["credit"] == 1
+        assert "Event 0" in invalid["error"] and invalid["retry"] is False
+        assert db.query(DetectionEvent).count() == 0
+
+    def test_credit_window_is_enforced(self, db):
+        test_session = add_session(db)
+        namespace = IngestNamespace(credits=1)
+        message = {"seq": 1, "events": [{"test_session_id": test_session.id, "timestamp": 2.0}]}
+
+        async def scenario():
+            await namespace.on_connect("sid", {})
+            started = asyncio.Event()
+            release = asyncio.Event()
+            original = namespace._ingest
+
+            async def slow_ingest(data):
+                started.set()
+                await release.wait()
+                return await original(data)
+
+            with patch.object(namespace, '_ingest', side_effect=slow_ingest):
+                first = asyncio.create_task(namespace.on_events("sid", message))
+                await started.wait()
+                refused = await namespace.on_events("sid", {**message, "seq": 2})
+                release.set()
+                accepted = await first
+            again = await namespace.on_events("sid", {**message, "seq": 3})
+            await namespace.on_disconnect("sid")
+            return refused, accepted, again
+
+        refused, accepted, again = asyncio.run(scenario())
+
+        assert refused == {"seq": 2, "credit": 0, "error": "No credit available", "retry": True, "busy": True}
+        assert accepted["count"] == 1 and again["count"] == 1
+        assert namespace._available == {}
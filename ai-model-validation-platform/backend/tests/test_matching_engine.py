@@ -0,0 +1,127 @@
+"""
+Matching engine tests - class agreement, vectorized IoU, greedy and Hungarian assignment
+"""
+import itertools
+import random
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.matching_engine import MatchingEngine, pairwise_iou, boxes_to_array, _hungarian_assignment
+from services.temporal_matcher import TemporalMatcher, UNMATCHED
+from services.ground_truth_index import GroundTruthIndex
+from services.validation_service import ValidationService
+
+BOX = {"x": 0, "y": 0, "width": 10, "height": 10}
+
+
+class TestIoU:
+    """Vectorized IoU over x/y/width/height boxes"""
+
+    def test_pairwise_iou(self):
+        a = boxes_to_array([BOX, BOX, BOX, None])
+        b = boxes_to_array([BOX, {"x": 5, "y": 0, "width": 10, "height": 10},
+                            {"x": 20, "y": 20, "width": 5, "height": 5}, BOX])
+
+        iou = pairwise_iou(a, b)
+
+        assert iou[:3].tolist() == pytest.approx([1.0, 50 / 150, 0.0])
+        assert np.isnan(iou[3])
+
+
+class TestMatchingEngine:
+    """Class-aware and IoU-constrained matching"""
+
+    def test_unconstrained_greedy_is_temporal_matcher(self):
+        rng = random.Random(7)
+        gt = [rng.uniform(0, 10) for _ in range(200)]
+        detections = [rng.uniform(0, 10) for _ in range(200)]
+
+        engine = MatchingEngine(gt)
+
+        assert engine.match(detections, 0.1).tolist() == TemporalMatcher(gt).match(detections, 0.1).tolist()
+
+    def test_class_agreement(self):
+        engine = MatchingEngine([1.0, 1.02], ["person", "Cyclist"])
+
+        matches = engine.match([1.01, 1.01], 0.1, ["cyclist", "truck"], require_class=True)
+
+        # The cyclist skips the earlier person slot; the truck has no ground truth of its class
+        assert matches.tolist() == [1, UNMATCHED]
+
+    def test_greedy_prefers_highest_iou(self):
+        gt_boxes = boxes_to_array([{"x": 50, "y": 50, "width": 10, "height": 10}, BOX])
+        engine = MatchingEngine([1.0, 1.0], ["person", "person"], gt_boxes)
+
+        matches = engine.match([1.0, 1.0], 0.1, detection_boxes=boxes_to_array([BOX, BOX]), iou_threshold=0.5)
+
+        assert matches.tolist() == [1, UNMATCHED]
+
+    def test_hungarian_finds_more_matches_than_greedy(self):
+        # The first detection could take either object; greedy takes the one the second needs
+        engine = MatchingEngine([1.0, 1.25])
+        detections = [1.125, 1.0]
+
+        greedy = engine.match(detections, 0.15, mode="greedy")
+        optimal = engine.match(detections, 0.15, mode="hungarian")
+
+        assert (greedy != UNMATCHED).sum() == 1
+        assert optimal.tolist() == [1, 0]
+
+    def test_hungarian_respects_constraints(self):
+        engine = MatchingEngine([1.0, 1.0, 5.0], ["person", "cyclist", "person"])
+
+        matches = engine.match([1.0, 1.0, 1.0], 0.1, ["cyclist", "person", "person"],
+                               require_class=True, mode="hungarian")
+
+        assert matches.tolist() == [1, 0, UNMATCHED]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            MatchingEngine([1.0]).match([1.0], 0.1, mode="fastest")
+
+    @pytest.mark.parametrize("shape", [(3, 3), (2, 5), (5, 2), (4, 4)])
+    def test_hungarian_fallback_is_optimal(self, shape):
+        rng = np.random.default_rng(sum(shape))
+        cost = rng.random(shape)
+
+        rows, cols = _hungarian_assignment(cost)
+
+        n, m = shape
+        if n <= m:
+            best = min(sum(cost[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+        else:
+            best = min(sum(cost[p[j], j] for j in range(m)) for p in itertools.permutations(range(n), m))
+        assert len(rows) == min(shape)
+        assert cost[rows, cols].sum() == pytest.approx(best)
+
+
+class TestConstrainedValidation:
+    """ValidationService and the session index honour class and IoU settings"""
+
+    def test_calculate_metrics_with_class_agreement(self):
+        gt = [SimpleNamespace(timestamp=1.0, class_label="person", bounding_box=BOX)]
+        detections = [SimpleNamespace(timestamp=1.0, class_label="cyclist", bounding_box=BOX),
+                      SimpleNamespace(timestamp=1.0, class_label="person", bounding_box=BOX)]
+
+        time_only = ValidationService(require_class=False)._calculate_metrics(detections, gt, 100)
+        class_aware = ValidationService(require_class=True)._calculate_metrics(detections, gt, 100)
+
+        assert time_only.true_positives == 1 and time_only.false_positives == 1
+        assert class_aware.true_positives == 1
+        # With class agreement the person detection is the one that matched
+        engine = MatchingEngine.from_objects(gt)
+        assert engine.match([1.0, 1.0], 0.1, ["cyclist", "person"], require_class=True).tolist() == [UNMATCHED, 0]
+
+    def test_index_has_match_with_constraints(self):
+        index = GroundTruthIndex("session", "video", 100, [("a", 1.0, "person", BOX)])
+
+        assert index.has_match(1.0, "Person", require_class=True)
+        assert not index.has_match(1.0, "cyclist", require_class=True)
+        assert index.has_match(1.0, bounding_box={"x": 1, "y": 1, "width": 10, "height": 10}, iou_threshold=0.5)
+        assert not index.has_match(1.0, bounding_box={"x": 9, "y": 9, "width": 10, "height": 10}, iou_threshold=0.5)
+        assert not index.has_match(1.0, iou_threshold=0.5)
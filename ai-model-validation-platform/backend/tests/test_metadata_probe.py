@@ -0,0 +1,146 @@
+"""
+Metadata probe tests - background extraction, hash-keyed cache and pending state
+"""
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video
+from main import app
+from services import metadata_probe
+from services.metadata_probe import VideoMetadataProber
+
+
+pytestmark = pytest.mark.usefixtures("upload_dir")
+
+
+@pytest.fixture(autouse=True)
+def prober_db(session_factory):
+    """Probe results are stored in the test database"""
+    with patch('services.metadata_probe.SessionLocal', session_factory):
+        yield
+
+
+@pytest.fixture
+def synthetic_video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for index in range(30):
+        writer.write(np.full((48, 64, 3), index, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def add_video(db, file_path, file_hash="abc123"):
+    project = Project(name="Metadata", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+    video = Video(filename="clip.avi", file_path=file_path, file_hash=file_hash, project_id=project.id)
+    db.add(video)
+    db.commit()
+    return video
+
+
+class TestVideoMetadataProber:
+    """Metadata is probed in the background and cached by content hash"""
+
+    @pytest.mark.asyncio
+    async def test_scheduled_probe_fills_in_metadata(self, db, synthetic_video):
+        video = add_video(db, synthetic_video)
+        assert video.metadata_status == "pending"
+
+        prober = VideoMetadataProber(concurrency=1)
+        prober.schedule(video.id, synthetic_video, "abc123")
+        await prober.drain()
+
+        db.refresh(video)
+        assert video.metadata_status == "ready"
+        assert video.fps == pytest.approx(30.0)
+        assert video.duration == pytest.approx(1.0)
+        assert video.resolution == "64x48"
+
+    def test_probe_cache_is_keyed_by_hash(self, synthetic_video):
+        prober = VideoMetadataProber(concurrency=1, cache_size=1)
+
+        with patch.object(metadata_probe, 'extract_video_metadata',
+                          wraps=metadata_probe.extract_video_metadata) as extract:
+            first = prober.probe(synthetic_video, "hash-a")
+            second = prober.probe(synthetic_video, "hash-a")
+            prober.probe(synthetic_video, "hash-b")  # evicts hash-a
+            prober.probe(synthetic_video, "hash-a")
+
+        assert first == second
+        assert extract.call_count == 3
+        assert prober.cached("hash-b") is None
+
+    @pytest.mark.asyncio
+    async def test_unreadable_file_is_marked_failed(self, db, tmp_path):
+        bad_path = str(tmp_path / "broken.mp4")
+        with open(bad_path, "wb") as f:
+            f.write(b"not a video")
+        video = add_video(db, bad_path)
+
+        prober = VideoMetadataProber(concurrency=1)
+        prober.schedule(video.id, bad_path)
+        await prober.drain()
+
+        db.refresh(video)
+        assert video.metadata_status == "failed"
+        assert video.duration is None
+
+    @pytest.mark.asyncio
+    async def test_resume_pending_after_restart(self, db, synthetic_video):
+        video = add_video(db, synthetic_video)
+
+        prober = VideoMetadataProber(concurrency=1)
+        assert await prober.resume_pending() == 1
+        await prober.drain()
+
+        db.refresh(video)
+        assert video.metadata_status == "ready"
+
+
+class TestUploadMetadataState:
+    """Uploads return before metadata is probed"""
+
+    @pytest.fixture
+    def client(self, api_db):
+        return TestClient(app)
+
+    def test_upload_reports_metadata_pending(self, client, db):
+        project_id = add_video(db, "/tmp/unused.mp4").project_id
+
+        with patch('main.metadata_prober.schedule') as schedule:
+            response = client.post(f"/api/projects/{project_id}/videos",
+                                   files={"file": ("new.mp4", b"fresh bytes", "video/mp4")})
+
+        body = response.json()
+        assert body["metadata_status"] == "pending"
+        schedule.assert_called_once()
+        assert schedule.call_args[0][0] == body["video_id"]
+
+    def test_cached_metadata_is_applied_immediately(self, client, db):
+        import hashlib
+
+        project_id = add_video(db, "/tmp/unused.mp4").project_id
+        content = b"previously probed bytes"
+        cached = {"duration": 12.5, "fps": 25.0, "resolution": "1920x1080"}
+
+        with patch('main.metadata_prober.cached', return_value=cached) as lookup, \
+                patch('main.metadata_prober.schedule') as schedule:
+            response = client.post(f"/api/projects/{project_id}/videos",
+                                   files={"file": ("again.mp4", content, "video/mp4")})
+
+        assert lookup.call_args[0][0] == hashlib.sha256(content).hexdigest()
+        assert response.json()["metadata_status"] == "ready"
+        schedule.assert_not_called()
+        video = db.get(Video, response.json()["video_id"])
+        assert (video.duration, video.fps, video.resolution) == (12.5, 25.0, "1920x1080")
@@ -0,0 +1,130 @@
+"""
+Model registry tests - lazy loading, warm-up and LRU eviction under a memory budget
+"""
+from unittest.mock import patch
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def __call__(self, frames, verbose=False):
+        self.calls += 1
+        return []
+
+
+class FakeLoader:
+    def __init__(self, fail=()):
+        self.loaded = []
+        self.fail = set(fail)
+
+    def __call__(self, name):
+        if name in self.fail:
+            raise RuntimeError("weights not found")
+        self.loaded.append(name)
+        return FakeModel(name)
+
+
+SIZES = {"small.pt": 100, "medium.pt": 300, "large.pt": 600}
+
+
+def make_registry(budget=1000, loader=None):
+    return ModelRegistry(
+        memory_budget_mb=budget,
+        loader=loader or FakeLoader(),
+        size_estimator=lambda name, model: SIZES[name]
+    )
+
+
+class TestModelRegistry:
+    """Models load on first use and stay resident within the memory budget"""
+
+    def test_loads_lazily_once(self):
+        loader = FakeLoader()
+        registry = make_registry(loader=loader)
+        assert loader.loaded == []
+
+        first = registry.get("small.pt")
+        second = registry.get("small.pt")
+
+        assert first is second
+        assert loader.loaded == ["small.pt"]
+        assert registry.is_loaded("small.pt")
+
+    def test_keeps_several_variants_resident(self):
+        registry = make_registry(budget=1000)
+
+        registry.get("small.pt")
+        registry.get("medium.pt")
+        registry.get("large.pt")
+
+        assert registry.loaded_models() == ["small.pt", "medium.pt", "large.pt"]
+        assert registry.resident_mb() == 1000
+
+    def test_evicts_least_recently_used_over_budget(self):
+        loader = FakeLoader()
+        registry = make_registry(budget=700, loader=loader)
+
+        registry.get("small.pt")
+        registry.get("medium.pt")
+        registry.get("small.pt")  # small is now most recently used
+        registry.get("large.pt")
+
+        assert registry.loaded_models() == ["small.pt", "large.pt"]
+        assert registry.resident_mb() == 700
+
+        # An evicted model is reloaded on demand
+        registry.get("medium.pt")
+        assert loader.loaded.count("medium.pt") == 2
+
+    def test_failed_load_returns_none(self):
+        loader = FakeLoader(fail={"missing.pt"})
+        registry = make_registry(loader=loader)
+
+        assert registry.get("missing.pt") is None
+        assert registry.get("missing.pt") is None
+        assert registry.loaded_models() == []
+
+    def test_background_warm_up_runs_dummy_inference(self):
+        registry = make_registry()
+
+        thread = registry.warm_up("small.pt")
+        thread.join(timeout=5)
+
+        assert registry.is_loaded("small.pt")
+        assert registry.get("small.pt").calls == 1
+
+
+class TestGroundTruthServiceModelLoading:
+    """The ground truth service pulls its model from the registry on demand"""
+
+    def test_service_construction_does_not_load_model(self):
+        from services.ground_truth_service import GroundTruthService
+
+        registry = make_registry()
+        with patch('services.ground_truth_service.model_registry', registry):
+            service = GroundTruthService(executor_mode="inline", model_name="small.pt")
+            service.ml_available = True
+            assert registry.loaded_models() == []
+
+            model = service.model
+
+        assert isinstance(model, FakeModel)
+        assert registry.loaded_models() == ["small.pt"]
+
+    def test_unloadable_model_falls_back(self, tmp_path):
+        from services.ground_truth_service import GroundTruthService
+
+        registry = make_registry(loader=FakeLoader(fail={"small.pt"}))
+        with patch('services.ground_truth_service.model_registry', registry):
+            service = GroundTruthService(executor_mode="inline", model_name="small.pt")
+            service.ml_available = True
+
+            assert list(service._iter_frame_detections(str(tmp_path / "missing.mp4"))) == []
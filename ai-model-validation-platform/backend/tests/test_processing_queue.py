@@ -0,0 +1,236 @@
+"""
+Video processing queue tests - durable jobs, priorities, retries and resume
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video
+from crud import (
+    enqueue_processing_job, claim_next_processing_job, fail_processing_job,
+    requeue_running_processing_jobs, renew_processing_job_leases, count_pending_processing_jobs,
+    get_processing_job
+)
+from services.processing_queue import VideoProcessingQueue
+
+
+@pytest.fixture(autouse=True)
+def queue_db(session_factory):
+    """Jobs are claimed and recorded in the test database"""
+    with patch('services.processing_queue.SessionLocal', session_factory):
+        yield
+
+
+def add_video(db, name="clip.mp4"):
+    project = db.query(Project).first()
+    if not project:
+        project = Project(name="Queue Project", camera_model="Sony IMX390",
+                          camera_view="Front-facing VRU", signal_type="GPIO")
+        db.add(project)
+        db.commit()
+    video = Video(filename=name, file_path=f"/tmp/{name}", project_id=project.id)
+    db.add(video)
+    db.commit()
+    return video
+
+
+class FakeGroundTruthService:
+    def __init__(self, results=None, delay=0.0):
+        self.results = list(results or [])
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def process_video_async(self, video_id, video_file_path, job_id=None, start_frame=0):
+        self.calls.append((video_id, video_file_path, job_id, start_frame))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return self.results.pop(0) if self.results else True
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_event_loop().time() > deadline:
+            raise AssertionError("Condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+class TestProcessingJobCRUD:
+    """Jobs are claimed by priority and retried with backoff"""
+
+    def test_claim_prefers_priority_then_age(self, db):
+        low = enqueue_processing_job(db, add_video(db, "a.mp4").id, priority=0)
+        high = enqueue_processing_job(db, add_video(db, "b.mp4").id, priority=5)
+
+        first = claim_next_processing_job(db)
+        second = claim_next_processing_job(db)
+
+        assert (first.id, second.id) == (high.id, low.id)
+        assert first.status == "running"
+        assert first.attempts == 1
+        assert claim_next_processing_job(db) is None
+
+    def test_failure_requeues_with_backoff_until_exhausted(self, db):
+        job = enqueue_processing_job(db, add_video(db).id, max_attempts=2)
+
+        claim_next_processing_job(db)
+        job = fail_processing_job(db, job.id, "boom", retry_base_delay=60)
+        assert job.status == "queued"
+        assert job.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        # Backoff delay keeps it from being claimed right away
+        assert claim_next_processing_job(db) is None
+
+        job.next_attempt_at = datetime.now(timezone.utc)
+        db.commit()
+        claim_next_processing_job(db)
+        job = fail_processing_job(db, job.id, "boom again", retry_base_delay=60)
+        assert job.status == "failed"
+        assert job.error == "boom again"
+
+    def test_requeue_expired_lease_keeps_checkpoint(self, db):
+        job = enqueue_processing_job(db, add_video(db).id)
+        claim_next_processing_job(db, owner="dead-process")
+        job.last_frame = 120
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        assert requeue_running_processing_jobs(db) == 1
+        db.refresh(job)
+        assert (job.status, job.owner) == ("queued", None)
+        assert job.last_frame == 120
+        assert count_pending_processing_jobs(db) == 1
+
+    def test_live_lease_is_not_requeued(self, db):
+        job = enqueue_processing_job(db, add_video(db).id)
+        claim_next_processing_job(db, owner="other-process", lease_seconds=60)
+
+        assert renew_processing_job_leases(db, "other-process", [job.id], lease_seconds=60) == 1
+        assert renew_processing_job_leases(db, "someone-else", [job.id], lease_seconds=60) == 0
+        assert requeue_running_processing_jobs(db) == 0
+        db.refresh(job)
+        assert (job.status, job.owner) == ("running", "other-process")
+
+
+class TestVideoProcessingQueue:
+    """The dispatcher runs queued jobs with bounded concurrency"""
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_with_bounded_concurrency(self, db):
+        service = FakeGroundTruthService(delay=0.05)
+        queue = VideoProcessingQueue(service, concurrency=2, poll_interval=0.01)
+        job_ids = [queue.enqueue(db, add_video(db, f"{i}.mp4").id) for i in range(5)]
+
+        await queue.start()
+        try:
+            await wait_for(lambda: count_pending_processing_jobs(db) == 0)
+        finally:
+            await queue.stop()
+
+        assert len(service.calls) == 5
+        assert service.max_active == 2
+        db.expire_all()
+        assert all(get_processing_job(db, job_id).status == "completed" for job_id in job_ids)
+        assert queue.depth() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_job_is_retried(self, db):
+        service = FakeGroundTruthService(results=[False, True])
+        queue = VideoProcessingQueue(service, concurrency=1, poll_interval=0.01)
+        video = add_video(db)
+
+        with patch.object(settings, 'processing_retry_base_delay', 0):
+            job_id = queue.enqueue(db, video.id)
+            await queue.start()
+            try:
+                await wait_for(lambda: count_pending_processing_jobs(db) == 0)
+            finally:
+                await queue.stop()
+
+        db.expire_all()
+        job = get_processing_job(db, job_id)
+        assert job.status == "completed"
+        assert job.attempts == 2
+        assert len(service.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_restart_resumes_from_checkpoint(self, db):
+        video = add_video(db)
+        job = enqueue_processing_job(db, video.id)
+        claim_next_processing_job(db, owner="previous-process")
+        job.last_frame = 300
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        service = FakeGroundTruthService()
+        queue = VideoProcessingQueue(service, concurrency=1, poll_interval=0.01)
+        await queue.start()
+        try:
+            await wait_for(lambda: count_pending_processing_jobs(db) == 0)
+        finally:
+            await queue.stop()
+
+        assert service.calls == [(video.id, video.file_path, job.id, 300)]
+
+    @pytest.mark.asyncio
+    async def test_start_leaves_jobs_leased_by_live_process(self, db):
+        video = add_video(db)
+        job = enqueue_processing_job(db, video.id)
+        claim_next_processing_job(db, owner="live-process", lease_seconds=60)
+
+        service = FakeGroundTruthService()
+        queue = VideoProcessingQueue(service, concurrency=1, poll_interval=0.01)
+        await queue.start()
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            await queue.stop()
+
+        assert service.calls == []
+        db.expire_all()
+        assert get_processing_job(db, job.id).owner == "live-process"
+
+    @pytest.mark.asyncio
+    async def test_running_jobs_renew_their_lease(self, db):
+        video = add_video(db)
+        service = FakeGroundTruthService(delay=0.3)
+        queue = VideoProcessingQueue(service, concurrency=1, poll_interval=0.01)
+        queue.lease_seconds = 0.15
+        job_id = queue.enqueue(db, video.id)
+
+        await queue.start()
+        try:
+            await wait_for(lambda: count_pending_processing_jobs(db) == 0)
+        finally:
+            await queue.stop()
+
+        # The lease is shorter than the job, so without renewal it would have been requeued and rerun
+        assert len(service.calls) == 1
+        db.expire_all()
+        assert get_processing_job(db, job_id).attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_finished_job_invalidates_ground_truth_indexes(self, db):
+        video = add_video(db)
+        queue = VideoProcessingQueue(FakeGroundTruthService(), concurrency=1, poll_interval=0.01)
+        queue.enqueue(db, video.id)
+
+        with patch('services.processing_queue.ground_truth_indexes') as indexes:
+            await queue.start()
+            try:
+                await wait_for(lambda: count_pending_processing_jobs(db) == 0)
+            finally:
+                await queue.stop()
+
+        indexes.invalidate_video.assert_called_once_with(video.id)
@@ -0,0 +1,124 @@
+"""
+Resumable upload tests - sessions, out-of-order byte ranges, resume and finalize
+"""
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video
+from main import app
+from services.upload_sessions import merge_ranges, parse_content_range, InvalidUploadRange
+
+
+@pytest.fixture
+def client(api_db, upload_dir, background_uploads):
+    return TestClient(app)
+
+
+@pytest.fixture
+def project_id(db):
+    project = Project(name="Field recordings", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+def create_session(client, project_id, size=len(CONTENT), filename="drive.mp4"):
+    return client.post(f"/api/projects/{project_id}/uploads",
+                       json={"filename": filename, "total_size": size})
+
+
+def put_range(client, upload_id, start, end, total=len(CONTENT), body=None):
+    return client.put(
+        f"/api/uploads/{upload_id}",
+        content=CONTENT[start:end + 1] if body is None else body,
+        headers={"Content-Range": f"bytes {start}-{end}/{total}"}
+    )
+
+
+class TestRangeHelpers:
+    """Content-Range parsing and received range bookkeeping"""
+
+    def test_parse_content_range(self):
+        assert parse_content_range("bytes 0-99/1000") == (0, 99, 1000)
+        assert parse_content_range("bytes 100-199/*") == (100, 199, None)
+        with pytest.raises(InvalidUploadRange):
+            parse_content_range("bytes=0-99")
+        with pytest.raises(InvalidUploadRange):
+            parse_content_range("bytes 10-5/100")
+
+    def test_merge_ranges(self):
+        assert merge_ranges([(10, 19), (0, 9), (30, 39), (15, 25)]) == [(0, 25), (30, 39)]
+
+
+class TestResumableUploads:
+    """Large uploads arrive as byte ranges and are finalized into a video"""
+
+    def test_out_of_order_ranges_then_finalize(self, client, db, project_id):
+        upload_id = create_session(client, project_id).json()["upload_id"]
+
+        for start in (8192, 0, 4096):
+            end = min(start + 4095, len(CONTENT) - 1)
+            assert put_range(client, upload_id, start, end).status_code == 200
+
+        state = client.get(f"/api/uploads/{upload_id}").json()
+        assert state["complete"] is True
+        assert state["received_ranges"] == [[0, len(CONTENT) - 1]]
+
+        response = client.post(f"/api/uploads/{upload_id}/complete")
+        assert response.status_code == 200
+
+        video = db.get(Video, response.json()["video_id"])
+        assert video.file_size == len(CONTENT)
+        with open(video.file_path, "rb") as f:
+            assert f.read() == CONTENT
+        # The session is gone once finalized
+        assert client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+    def test_reports_missing_ranges_for_resume(self, client, project_id):
+        upload_id = create_session(client, project_id).json()["upload_id"]
+        put_range(client, upload_id, 0, 999)
+        put_range(client, upload_id, 5000, 5999)
+
+        state = client.get(f"/api/uploads/{upload_id}").json()
+
+        assert state["bytes_received"] == 2000
+        assert state["missing_ranges"] == [[1000, 4999], [6000, len(CONTENT) - 1]]
+        assert client.post(f"/api/uploads/{upload_id}/complete").status_code == 409
+
+    def test_short_body_is_not_recorded(self, client, project_id):
+        upload_id = create_session(client, project_id).json()["upload_id"]
+
+        response = put_range(client, upload_id, 0, 999, body=CONTENT[:500])
+
+        assert response.status_code == 416
+        assert client.get(f"/api/uploads/{upload_id}").json()["bytes_received"] == 0
+
+    def test_rejects_ranges_outside_upload(self, client, project_id):
+        upload_id = create_session(client, project_id).json()["upload_id"]
+
+        assert put_range(client, upload_id, 10000, 10300, body=b"x" * 301).status_code == 416
+        assert put_range(client, upload_id, 0, 9, total=99, body=b"x" * 10).status_code == 416
+
+    def test_session_validation(self, client, project_id):
+        assert create_session(client, project_id, filename="notes.txt").status_code == 400
+        assert create_session(client, "missing-project").status_code == 404
+        with patch.object(settings, 'resumable_upload_max_size', 1000):
+            assert create_session(client, project_id).status_code == 413
+        assert client.get("/api/uploads/not-a-session").status_code == 404
+
+    def test_abort_discards_session(self, client, project_id):
+        upload_id = create_session(client, project_id).json()["upload_id"]
+        put_range(client, upload_id, 0, 999)
+
+        assert client.delete(f"/api/uploads/{upload_id}").status_code == 200
+        assert client.get(f"/api/uploads/{upload_id}").status_code == 404
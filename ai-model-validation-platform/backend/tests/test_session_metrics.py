@@ -0,0 +1,167 @@
+"""
+Session metrics tests - incremental TP/FP counting, lazy FN, live results endpoint
+"""
+import asyncio
+import random
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video, TestSession, DetectionEvent
+from crud import bulk_create_ground_truth_objects
+from main import app
+from services import session_metrics as session_metrics_module
+from services.ground_truth_index import GroundTruthIndex, ground_truth_indexes
+from services.session_metrics import SessionMetricsAccumulator, session_metrics
+from services.temporal_matcher import TemporalMatcher, UNMATCHED
+
+BOX = {"x": 0, "y": 0, "width": 10, "height": 10}
+
+
+pytestmark = pytest.mark.usefixtures("validation_caches")
+
+
+@pytest.fixture
+def client(api_db):
+    with patch('main.sio.emit', new_callable=AsyncMock) as emit:
+        test_client = TestClient(app)
+        test_client.emit = emit
+        yield test_client
+
+
+def add_session(db, timestamps=(1.0, 2.0, 3.0)):
+    project = Project(name="Metrics", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path="/tmp/clip.mp4", project_id=project.id)
+    db.add(video)
+    db.flush()
+    bulk_create_ground_truth_objects(db, video.id, [
+        {"timestamp": t, "class_label": "person", "bounding_box": BOX, "confidence": 0.9}
+        for t in timestamps
+    ])
+    test_session = TestSession(name="Run", project_id=project.id, video_id=video.id, tolerance_ms=100)
+    db.add(test_session)
+    db.commit()
+    return test_session
+
+
+def make_index(timestamps, labels=None):
+    labels = labels or ["person"] * len(timestamps)
+    rows = [(f"gt{i}", t, label, BOX) for i, (t, label) in enumerate(zip(timestamps, labels))]
+    return GroundTruthIndex("session", "video", 100, rows)
+
+
+class TestSessionMetricsAccumulator:
+    """Counters update per event and agree with batch matching"""
+
+    def test_counts_and_lazy_false_negatives(self):
+        accumulator = SessionMetricsAccumulator(make_index([1.0, 2.0, 3.0]))
+
+        assert accumulator.record(1.05) == ("TP", "gt0")
+        assert accumulator.record(1.0) == ("FP", None)  # gt0 already claimed
+        assert accumulator.record(2.0)[0] == "TP"
+
+        running = accumulator.snapshot()
+        assert (running["true_positives"], running["false_positives"], running["false_negatives"]) == (2, 1, 1)
+        assert running["status"] == "running"
+        assert running["precision"] == pytest.approx(2 / 3)
+
+        accumulator.close()
+        accumulator.record(3.0)
+        final = accumulator.snapshot()
+        assert final["status"] == "completed"
+        assert final["false_negatives"] == 1  # Fixed at close
+
+    def test_matches_batch_greedy(self):
+        rng = random.Random(3)
+        gt = sorted(rng.uniform(0, 20) for _ in range(300))
+        detections = [rng.uniform(0, 20) for _ in range(300)]
+        accumulator = SessionMetricsAccumulator(make_index(gt))
+
+        for t in detections:
+            accumulator.record(t)
+
+        batch_tp = int((TemporalMatcher(gt).match(detections, 0.1) != UNMATCHED).sum())
+        assert accumulator.true_positives == batch_tp
+        assert accumulator.false_positives == len(detections) - batch_tp
+
+    def test_class_and_iou_constraints(self):
+        index = make_index([1.0, 1.0], ["person", "cyclist"])
+        accumulator = SessionMetricsAccumulator(index, require_class=True, iou_threshold=0.5)
+
+        assert accumulator.record(1.0, "Cyclist", BOX) == ("TP", "gt1")
+        assert accumulator.record(1.0, "cyclist", BOX) == ("FP", None)
+        assert accumulator.record(1.0, "person", {"x": 50, "y": 50, "width": 10, "height": 10})[0] == "FP"
+        assert accumulator.record(1.0, "person", BOX) == ("TP", "gt0")
+
+
+class TestLiveResults:
+    """Detection events update the results endpoint and the session room"""
+
+    def test_events_update_results_and_push_metrics(self, db, client):
+        test_session = add_session(db)
+
+        first = client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 1.02})
+        client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 7.0})
+
+        assert first.json()["validation_result"] == "TP"
+        stored = db.query(DetectionEvent).filter(DetectionEvent.timestamp == 1.02).one()
+        assert stored.validation_result == "TP" and stored.ground_truth_match_id is not None
+
+        results = client.get(f"/api/test-sessions/{test_session.id}/results").json()
+        assert results["true_positives"] == 1 and results["false_positives"] == 1
+        assert results["false_negatives"] == 2
+        assert results["precision"] == 50.0
+        assert results["status"] == "running"
+
+        pushed = [call for call in client.emit.call_args_list if call.args[0] == 'session_metrics']
+        assert len(pushed) == 2
+        assert pushed[-1].kwargs["room"] == f"test_session_{test_session.id}"
+        assert pushed[-1].args[1]["false_positives"] == 1
+
+    def test_complete_finalizes_and_rebuild_replays_events(self, db, client):
+        test_session = add_session(db)
+        client.post("/api/detection-events", json={"testSessionId": test_session.id, "timestamp": 2.0})
+
+        completed = client.post(f"/api/test-sessions/{test_session.id}/complete").json()
+        assert completed["status"] == "completed" and completed["false_negatives"] == 2
+
+        # A restarted process rebuilds the same numbers from stored events
+        session_metrics.clear()
+        ground_truth_indexes.clear()
+        with patch.object(session_metrics_module, 'get_detection_events',
+                          wraps=session_metrics_module.get_detection_events) as events:
+            rebuilt = client.get(f"/api/test-sessions/{test_session.id}/results").json()
+            client.get(f"/api/test-sessions/{test_session.id}/results")
+        assert events.call_count == 1
+        assert rebuilt == completed
+
+    def test_cold_rebuild_runs_once_off_the_event_loop(self, db):
+        test_session = add_session(db)
+        replay_threads = []
+        replay = session_metrics._replay
+
+        def tracked_replay(*args):
+            replay_threads.append(threading.get_ident())
+            return replay(*args)
+
+        async def scenario():
+            return await asyncio.gather(*(session_metrics.get_async(db, test_session.id) for _ in range(3)))
+
+        with patch.object(session_metrics, '_replay', side_effect=tracked_replay):
+            accumulators = asyncio.run(scenario())
+
+        assert replay_threads and replay_threads != [threading.get_ident()]
+        assert len(replay_threads) == 1
+        assert accumulators[0] is accumulators[1] is accumulators[2]
+
+    def test_unknown_session(self, db, client):
+        assert client.get("/api/test-sessions/missing/results").status_code == 404
+        assert client.post("/api/test-sessions/missing/complete").status_code == 404
@@ -0,0 +1,84 @@
+"""
+Temporal matcher tests - binary-search matching with the original greedy semantics
+"""
+import random
+import pytest
+from types import SimpleNamespace
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.temporal_matcher import TemporalMatcher, UNMATCHED
+from services.validation_service import ValidationService
+
+
+def nested_loop_matches(detections, ground_truth, tolerance):
+    """Reference: the nested loop ValidationService used before TemporalMatcher"""
+    claimed = set()
+    matches = []
+    for detection in detections:
+        match = UNMATCHED
+        for i, gt in enumerate(ground_truth):
+            if i not in claimed and abs(gt - detection) <= tolerance:
+                claimed.add(i)
+                match = i
+                break
+        matches.append(match)
+    return matches
+
+
+class TestTemporalMatcher:
+    """Same matches as the nested loop, in O((D + G) log G)"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_nested_loop_on_time_ordered_ground_truth(self, seed):
+        rng = random.Random(seed)
+        ground_truth = sorted(round(rng.uniform(0, 20), 1) for _ in range(300))  # Many exact ties
+        detections = [round(rng.uniform(0, 20), 2) for _ in range(300)]
+
+        matcher = TemporalMatcher(ground_truth)
+
+        assert matcher.in_time_order
+        assert matcher.match(detections, 0.1).tolist() == nested_loop_matches(detections, ground_truth, 0.1)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_nested_loop_on_unordered_ground_truth(self, seed):
+        rng = random.Random(seed)
+        ground_truth = [round(rng.uniform(0, 10), 1) for _ in range(200)]
+        detections = [rng.uniform(0, 10) for _ in range(250)]
+
+        matcher = TemporalMatcher(ground_truth)
+
+        assert not matcher.in_time_order
+        assert matcher.match(detections, 0.15).tolist() == nested_loop_matches(detections, ground_truth, 0.15)
+
+    def test_tolerance_boundary_uses_exact_difference(self):
+        # 1.1 - 1.0 rounds above 0.1 although 1.0 + 0.1 == 1.1, so these are not matches
+        ground_truth = [0.4, 1.1, 1.0]
+        detections = [0.3, 1.0, 1.1, 0.45]
+
+        matches = TemporalMatcher(ground_truth).match(detections, 0.1).tolist()
+
+        assert matches == nested_loop_matches(detections, ground_truth, 0.1)
+        assert matches == [UNMATCHED, 2, 1, 0]
+
+    def test_empty_inputs(self):
+        assert TemporalMatcher([]).match([1.0, 2.0], 0.1).tolist() == [UNMATCHED, UNMATCHED]
+        assert TemporalMatcher([1.0]).match([], 0.1).tolist() == []
+        assert TemporalMatcher([1.0]).has_match(1.05, 0.1)
+        assert not TemporalMatcher([1.0]).has_match(1.5, 0.1)
+
+
+class TestCalculateMetrics:
+    """ValidationService metrics are computed with the temporal matcher"""
+
+    def test_greedy_metrics(self):
+        ground_truth = [SimpleNamespace(timestamp=t) for t in (1.0, 1.05, 3.0, 5.0)]
+        detections = [SimpleNamespace(timestamp=t) for t in (1.02, 1.03, 1.04, 4.0)]
+
+        metrics = ValidationService()._calculate_metrics(detections, ground_truth, tolerance_ms=100)
+
+        assert (metrics.true_positives, metrics.false_positives, metrics.false_negatives) == (2, 2, 2)
+        assert metrics.precision == pytest.approx(0.5)
+        assert metrics.recall == pytest.approx(0.5)
@@ -0,0 +1,164 @@
+"""
+Thumbnail tests - poster frame, keyframe sprite sheet, content-keyed cache and endpoints
+"""
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video
+from main import app
+from services import thumbnails
+from services.thumbnails import VideoThumbnailer, UndecodableVideo, POSTER_FILENAME, SPRITE_FILENAME
+
+
+pytestmark = pytest.mark.usefixtures("upload_dir")
+
+
+@pytest.fixture(autouse=True)
+def small_sprites():
+    with patch.object(settings, 'thumbnail_sprite_tiles', 6), \
+            patch.object(settings, 'thumbnail_sprite_columns', 3), \
+            patch.object(settings, 'thumbnail_sprite_tile_width', 32):
+        yield
+
+
+@pytest.fixture
+def client(api_db):
+    return TestClient(app)
+
+
+@pytest.fixture
+def synthetic_video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for index in range(60):
+        writer.write(np.full((48, 64, 3), index * 4, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def add_video(db, file_path, file_hash="feed" * 16):
+    project = Project(name="Thumbnails", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+    video = Video(filename="clip.avi", file_path=file_path, file_hash=file_hash, project_id=project.id)
+    db.add(video)
+    db.commit()
+    return video
+
+
+class TestVideoThumbnailer:
+    """Posters and sprites are rendered once per content hash"""
+
+    def test_generates_poster_and_sprite(self, synthetic_video):
+        thumbnailer = VideoThumbnailer(concurrency=1)
+
+        manifest = thumbnailer.generate("feed", synthetic_video)
+
+        assert (manifest["columns"], manifest["rows"]) == (3, 2)
+        assert manifest["timestamps"] == [0.0, 0.333, 0.667, 1.0, 1.333, 1.667]
+        sprite = cv2.imread(thumbnailer.path("feed", SPRITE_FILENAME))
+        assert sprite.shape[:2] == (2 * manifest["tile_height"], 3 * 32)
+        poster = cv2.imread(thumbnailer.path("feed", POSTER_FILENAME))
+        assert poster.shape[:2] == (48, 64)
+        assert thumbnailer.thumbnail_dir("feed").startswith(settings.upload_directory)
+
+    def test_existing_thumbnails_are_reused(self, synthetic_video):
+        thumbnailer = VideoThumbnailer(concurrency=1)
+        thumbnailer.generate("feed", synthetic_video)
+
+        with patch.object(thumbnails, 'generate_thumbnails') as generate:
+            assert thumbnailer.generate("feed", synthetic_video) is not None
+        generate.assert_not_called()
+
+    def test_undecodable_video_is_not_retried(self, tmp_path):
+        thumbnailer = VideoThumbnailer(concurrency=1)
+
+        with patch.object(thumbnails, 'generate_thumbnails', side_effect=UndecodableVideo("no frames")):
+            assert thumbnailer.generate("bad", "/videos/bad.mp4") is None
+        assert thumbnailer.has_failed("bad")
+        with patch.object(thumbnails, 'generate_thumbnails') as generate:
+            thumbnailer.generate("bad", "/videos/bad.mp4")
+        generate.assert_not_called()
+
+    def test_transient_failures_are_retried(self, synthetic_video, tmp_path):
+        thumbnailer = VideoThumbnailer(concurrency=1)
+        missing = str(tmp_path / "missing.mp4")
+
+        with patch.object(thumbnails, 'generate_thumbnails', return_value=None):
+            assert thumbnailer.generate("feed", synthetic_video) is None
+        with patch.object(thumbnails, '_write_atomic', side_effect=OSError("disk full")), \
+                pytest.raises(OSError):
+            thumbnailer.generate("feed", synthetic_video)
+        assert thumbnailer.generate("feed", missing) is None
+        assert not thumbnailer.has_failed("feed")
+
+        assert thumbnailer.generate("feed", synthetic_video) is not None
+
+    def test_concurrent_writers_never_tear_a_file(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        path = str(tmp_path / POSTER_FILENAME)
+        payloads = [bytes([i]) * (256 * 1024) for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda data: thumbnails._write_atomic(path, data), payloads))
+
+        with open(path, "rb") as f:
+            assert f.read() in payloads
+        assert os.listdir(tmp_path) == [POSTER_FILENAME]
+
+    @pytest.mark.asyncio
+    async def test_scheduled_generation(self, synthetic_video):
+        thumbnailer = VideoThumbnailer(concurrency=1)
+
+        thumbnailer.schedule("feed", synthetic_video)
+        await thumbnailer.drain()
+
+        assert thumbnailer.manifest("feed") is not None
+
+
+class TestThumbnailEndpoints:
+    """Poster, sprite and manifest endpoints with cache headers"""
+
+    def test_manifest_and_images(self, client, db, synthetic_video):
+        video = add_video(db, synthetic_video)
+
+        manifest = client.get(f"/api/videos/{video.id}/thumbnails")
+        assert manifest.status_code == 200
+        assert manifest.json()["sprite"]["columns"] == 3
+
+        poster = client.get(manifest.json()["poster_url"])
+        assert poster.status_code == 200
+        assert poster.headers["content-type"] == "image/jpeg"
+        assert poster.headers["cache-control"] == f"public, max-age={settings.thumbnail_cache_max_age}"
+        assert poster.content[:2] == b"\xff\xd8"
+
+        sprite = client.get(manifest.json()["sprite_url"])
+        assert sprite.status_code == 200
+        assert sprite.headers["etag"] != poster.headers["etag"]
+
+        cached = client.get(manifest.json()["poster_url"], headers={"If-None-Match": poster.headers["etag"]})
+        assert cached.status_code == 304
+
+    def test_missing_video_or_thumbnails(self, client, db, tmp_path):
+        assert client.get("/api/videos/missing/poster").status_code == 404
+
+        broken = tmp_path / "broken.mp4"
+        broken.write_bytes(b"not a video")
+        video = add_video(db, str(broken), file_hash="0" * 64)
+        assert client.get(f"/api/videos/{video.id}/sprite").status_code == 404
+
+    def test_project_listing_links_poster(self, client, db, synthetic_video):
+        video = add_video(db, synthetic_video)
+
+        videos = client.get(f"/api/projects/{video.project_id}/videos").json()
+
+        assert videos[0]["poster_url"] == f"/api/videos/{video.id}/poster"
@@ -0,0 +1,105 @@
+"""
+Upload deduplication tests - identical content shares one file and its ground truth
+"""
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project, Video, GroundTruthObject, VideoProcessingJob
+from crud import bulk_create_ground_truth_objects
+from main import app
+
+
+@pytest.fixture
+def client(api_db, upload_dir, background_uploads):
+    # Duplicate ground truth is copied in a worker thread with its own session
+    with patch('main.SessionLocal', api_db):
+        yield TestClient(app)
+
+
+def add_project(db, name):
+    project = Project(name=name, camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+    return project.id
+
+
+def upload(client, project_id, content, filename="clip.mp4"):
+    return client.post(
+        f"/api/projects/{project_id}/videos",
+        files={"file": (filename, content, "video/mp4")}
+    )
+
+
+class TestUploadDeduplication:
+    """Byte-identical uploads reuse the stored file, metadata and ground truth"""
+
+    def test_duplicate_shares_file_and_skips_processing(self, client, db):
+        first_project = add_project(db, "First")
+        second_project = add_project(db, "Second")
+
+        first = upload(client, first_project, b"same video bytes").json()
+        second = upload(client, second_project, b"same video bytes", filename="copy.mp4").json()
+
+        assert first["duplicate_of"] is None
+        assert second["duplicate_of"] == first["video_id"]
+
+        original = db.get(Video, first["video_id"])
+        duplicate = db.get(Video, second["video_id"])
+        assert duplicate.file_path == original.file_path
+        assert duplicate.file_hash == original.file_hash
+        assert len(os.listdir(settings.upload_directory)) == 1
+
+    def test_duplicate_copies_existing_ground_truth(self, client, db):
+        project_id = add_project(db, "GT")
+        first = upload(client, project_id, b"annotated clip").json()
+
+        original = db.get(Video, first["video_id"])
+        bulk_create_ground_truth_objects(db, original.id, [
+            {"timestamp": t, "class_label": "person",
+             "bounding_box": {"x": 1, "y": 2, "width": 3, "height": 4}, "confidence": 0.9}
+            for t in (0.5, 1.0, 1.5)
+        ])
+        original.ground_truth_generated = True
+        original.status = "completed"
+        original.duration, original.fps, original.resolution = 3.0, 30.0, "1280x720"
+        original.metadata_status = "ready"
+        db.commit()
+
+        second = upload(client, project_id, b"annotated clip").json()
+
+        duplicate = db.get(Video, second["video_id"])
+        assert duplicate.ground_truth_generated is True
+        assert duplicate.status == "completed"
+        assert (duplicate.duration, duplicate.resolution, duplicate.metadata_status) == (3.0, "1280x720", "ready")
+        copied = db.query(GroundTruthObject).filter(GroundTruthObject.video_id == duplicate.id).all()
+        assert sorted(obj.timestamp for obj in copied) == [0.5, 1.0, 1.5]
+        # No processing job is queued for the duplicate
+        assert db.query(VideoProcessingJob).filter(VideoProcessingJob.video_id == duplicate.id).count() == 0
+
+    def test_different_content_is_stored_separately(self, client, db):
+        project_id = add_project(db, "Distinct")
+
+        upload(client, project_id, b"clip one")
+        second = upload(client, project_id, b"clip two").json()
+
+        assert second["duplicate_of"] is None
+        assert len(os.listdir(settings.upload_directory)) == 2
+
+    def test_shared_file_kept_until_last_reference_deleted(self, client, db):
+        project_id = add_project(db, "Delete")
+        first = upload(client, project_id, b"shared bytes").json()
+        second = upload(client, project_id, b"shared bytes").json()
+        shared_path = db.get(Video, first["video_id"]).file_path
+
+        assert client.delete(f"/api/videos/{first['video_id']}").status_code == 200
+        assert os.path.exists(shared_path)
+
+        assert client.delete(f"/api/videos/{second['video_id']}").status_code == 200
+        assert not os.path.exists(shared_path)
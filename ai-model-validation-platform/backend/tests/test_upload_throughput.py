@@ -0,0 +1,131 @@
+"""
+Upload pipeline tests - settings-driven limits, adaptive chunk sizes and throughput metrics
+"""
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import Project
+from main import app
+from services.upload_throughput import AdaptiveChunkSizer, UploadStats, UploadMetrics
+
+KB = 1024
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def client(api_db, db, upload_dir, background_uploads):
+    project = Project(name="Limits", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.commit()
+
+    test_client = TestClient(app)
+    test_client.project_id = project.id
+    return test_client
+
+
+def upload(client, content, filename="clip.mp4"):
+    return client.post(f"/api/projects/{client.project_id}/videos",
+                       files={"file": (filename, content, "video/mp4")})
+
+
+class TestAdaptiveChunkSizer:
+    """Chunk size follows client throughput within configured bounds"""
+
+    def test_fast_client_grows_to_max(self):
+        sizer = AdaptiveChunkSizer(min_size=64 * KB, max_size=8 * MB, target_seconds=0.05)
+
+        for _ in range(10):
+            size = sizer.record(sizer.chunk_size, 0.001)  # ~GB/s
+
+        assert size == 8 * MB
+
+    def test_slow_client_keeps_small_chunks(self):
+        sizer = AdaptiveChunkSizer(min_size=64 * KB, max_size=8 * MB, target_seconds=0.05)
+
+        for _ in range(5):
+            size = sizer.record(64 * KB, 0.5)  # 128KB/s
+
+        assert size == 64 * KB
+
+    def test_sizes_are_powers_of_two_and_shrink_when_throughput_drops(self):
+        sizer = AdaptiveChunkSizer(min_size=64 * KB, max_size=8 * MB, target_seconds=0.05,
+                                   smoothing=1.0)
+
+        assert sizer.record(MB, 0.01) == 4 * MB  # 100MB/s -> 5MB ideal
+        assert sizer.record(MB, 0.2) == 256 * KB  # 5MB/s -> 250KB ideal
+
+
+class TestUploadMetrics:
+    """Each upload records bytes, chunks and throughput"""
+
+    def test_stats_and_summary(self):
+        metrics = UploadMetrics(history=2)
+        for name in ("a.mp4", "b.mp4", "c.mp4"):
+            stats = UploadStats(name)
+            stats.add_chunk(64 * KB, 0.01)
+            stats.add_chunk(256 * KB, 0.01)
+            metrics.record(stats)
+
+        recent = metrics.recent()
+        assert [entry["filename"] for entry in recent] == ["b.mp4", "c.mp4"]
+        assert recent[0]["bytes"] == 320 * KB
+        assert recent[0]["chunks"] == 2
+        assert recent[0]["max_chunk_size"] == 256 * KB
+        assert metrics.summary()["uploads"] == 2
+
+
+class TestConfiguredUploadLimits:
+    """Size limit and extensions come from Settings"""
+
+    def test_max_file_size_from_settings(self, client):
+        with patch.object(settings, 'max_file_size', 1 * MB):
+            response = upload(client, b"x" * (MB + 1))
+
+        assert response.status_code == 413
+        assert "1MB" in response.json()["detail"]
+        assert upload(client, b"x" * (MB + 1)).status_code == 200
+
+    def test_declared_oversize_is_refused_before_the_body_is_read(self, client, upload_dir):
+        with patch.object(settings, 'max_file_size', 1 * MB), \
+                patch('main.get_project') as get_project:
+            response = upload(client, b"x" * (2 * MB))
+
+        assert response.status_code == 413
+        assert "1MB" in response.json()["detail"]
+        get_project.assert_not_called()
+        assert not os.path.exists(upload_dir) or os.listdir(upload_dir) == []
+
+    def test_allowed_extensions_from_settings(self, client):
+        with patch.object(settings, 'allowed_video_extensions', [".mov"]):
+            assert upload(client, b"abc", filename="clip.mp4").status_code == 400
+            assert upload(client, b"abc", filename="CLIP.MOV").status_code == 200
+
+    def test_upload_is_recorded_in_metrics(self, client):
+        upload(client, os.urandom(3 * MB), filename="metrics.mp4")
+
+        metrics = client.get("/api/uploads/metrics").json()
+
+        latest = metrics["recent"][-1]
+        assert latest["filename"] == "metrics.mp4"
+        assert latest["bytes"] == 3 * MB
+        assert metrics["summary"]["uploads"] >= 1
+        # Copied from the spooled body, so it is labelled as a local copy, not client throughput
+        assert latest["kind"] == "local_copy"
+
+    def test_local_copies_are_left_out_of_throughput(self):
+        metrics = UploadMetrics(history=10)
+        copy = UploadStats("direct.mp4", kind="local_copy")
+        copy.add_chunk(8 * MB, 0.001)
+        metrics.record(copy)
+
+        summary = metrics.summary()
+
+        assert summary["uploads"] == 1 and summary["total_bytes"] == 8 * MB
+        assert summary["avg_throughput_mbps"] == 0.0 and summary["max_throughput_mbps"] == 0.0
@@ -0,0 +1,147 @@
+"""
+Video streaming tests - HTTP Range, conditional requests and zero-copy transfer
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Project, Video
+from main import app
+from services.video_streaming import (
+    parse_range_header, RangeNotSatisfiable, VideoFileResponse, ZEROCOPY_EXTENSION
+)
+
+CONTENT = bytes(range(256)) * 16  # 4096 bytes
+
+
+@pytest.fixture
+def client(api_db, db, tmp_path):
+    video_path = tmp_path / "clip.mp4"
+    video_path.write_bytes(CONTENT)
+
+    project = Project(name="Review", camera_model="Sony IMX390",
+                      camera_view="Front-facing VRU", signal_type="GPIO")
+    db.add(project)
+    db.flush()
+    video = Video(filename="clip.mp4", file_path=str(video_path), file_size=len(CONTENT),
+                  file_hash="ab" * 32, project_id=project.id)
+    db.add(video)
+    db.commit()
+
+    test_client = TestClient(app)
+    test_client.stream_url = f"/api/videos/{video.id}/stream"
+    test_client.video_path = str(video_path)
+    return test_client
+
+
+class TestRangeParsing:
+    """Range header parsing per RFC 9110"""
+
+    def test_ranges(self):
+        assert parse_range_header(None, 100) is None
+        assert parse_range_header("bytes=0-9", 100) == [(0, 9)]
+        assert parse_range_header("bytes=90-", 100) == [(90, 99)]
+        assert parse_range_header("bytes=-10", 100) == [(90, 99)]
+        assert parse_range_header("bytes=50-500", 100) == [(50, 99)]
+        assert parse_range_header("bytes=0-9,5-19,40-49", 100) == [(0, 19), (40, 49)]
+
+    def test_unsatisfiable_and_malformed(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=100-200", 100)
+        assert parse_range_header("bytes=9-0", 100) is None
+        assert parse_range_header("items=0-9", 100) is None
+
+
+class TestVideoStreamEndpoint:
+    """GET /api/videos/{id}/stream"""
+
+    def test_full_file(self, client):
+        response = client.get(client.stream_url)
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-type"] == "video/mp4"
+        assert response.headers["etag"] == '"' + "ab" * 32 + '"'
+
+    def test_single_range(self, client):
+        response = client.get(client.stream_url, headers={"Range": "bytes=1000-1999"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[1000:2000]
+        assert response.headers["content-range"] == f"bytes 1000-1999/{len(CONTENT)}"
+        assert response.headers["content-length"] == "1000"
+
+    def test_suffix_range(self, client):
+        response = client.get(client.stream_url, headers={"Range": "bytes=-96"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[-96:]
+
+    def test_multiple_ranges_are_multipart(self, client):
+        response = client.get(client.stream_url, headers={"Range": "bytes=0-9,100-109"})
+
+        assert response.status_code == 206
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        assert int(response.headers["content-length"]) == len(response.content)
+        body = response.content
+        assert CONTENT[0:10] in body and CONTENT[100:110] in body
+        assert f"Content-Range: bytes 100-109/{len(CONTENT)}".encode() in body
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get(client.stream_url, headers={"Range": "bytes=5000-6000"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_conditional_requests(self, client):
+        etag = client.get(client.stream_url).headers["etag"]
+
+        not_modified = client.get(client.stream_url, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        # A stale If-Range validator means the client gets the whole file
+        stale = client.get(client.stream_url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+        assert stale.status_code == 200
+        assert stale.content == CONTENT
+
+    def test_head_and_missing(self, client):
+        head = client.head(client.stream_url, headers={"Range": "bytes=0-99"})
+        assert head.status_code == 206
+        assert head.headers["content-length"] == "100"
+        assert head.content == b""
+
+        assert client.get("/api/videos/missing/stream").status_code == 404
+        os.remove(client.video_path)
+        assert client.get(client.stream_url).status_code == 404
+
+
+class TestZeroCopy:
+    """The open file is handed to the server when it supports zero-copy send"""
+
+    def test_uses_zerocopy_extension(self, tmp_path):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(CONTENT)
+        response = VideoFileResponse(str(path), {"range": "bytes=2048-"}, '"etag"')
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "extensions": {ZEROCOPY_EXTENSION: {}}}
+        asyncio.run(response(scope, None, send))
+
+        zerocopy = [m for m in messages if m["type"] == ZEROCOPY_EXTENSION]
+        assert len(zerocopy) == 1
+        assert (zerocopy[0]["offset"], zerocopy[0]["count"]) == (2048, 2048)
+        # The extension takes a file object, not a bare descriptor
+        assert not isinstance(zerocopy[0]["file"], int)
+        assert zerocopy[0]["file"].name == str(path)
+        # No file bytes went through Python
+        assert all(not m.get("body") for m in messages if m["type"] == "http.response.body")
@@ -1,2 +1,808 @@
 #!/usr/bin/env python3
-\"\"\"\nRaspberry Pi Client for AI Model Validation Platform\n\nThis script runs on the Raspberry Pi connected to the Camera Under Test (CUT).\nIt monitors GPIO pins or network packets for detection signals and forwards\nthem to the validation platform API.\n\nUsage:\n    python raspberry-pi-client.py --api-url http://your-server:8000 --session-id your-session-id\n\"\"\"\n\nimport time\nimport json\nimport argparse\nimport logging\nimport requests\nfrom datetime import datetime\nfrom typing import Optional\n\ntry:\n    import RPi.GPIO as GPIO\n    HAS_GPIO = True\nexcept ImportError:\n    HAS_GPIO = False\n    print(\"Warning: RPi.GPIO not available. GPIO monitoring disabled.\")\n\nclass VRUDetectionClient:\n    def __init__(self, api_url: str, session_id: str, gpio_pin: int = 18):\n        self.api_url = api_url.rstrip('/')\n        self.session_id = session_id\n        self.gpio_pin = gpio_pin\n        self.running = False\n        \n        # Setup logging\n        logging.basicConfig(\n            level=logging.INFO,\n            format='%(asctime)s - %(levelname)s - %(message)s'\n        )\n        self.logger = logging.getLogger(__name__)\n        \n        # Setup GPIO if available\n        if HAS_GPIO:\n            self.setup_gpio()\n        \n        self.logger.info(f\"VRU Detection Client initialized\")\n        self.logger.info(f\"API URL: {self.api_url}\")\n        self.logger.info(f\"Session ID: {self.session_id}\")\n        self.logger.info(f\"GPIO Pin: {self.gpio_pin} (available: {HAS_GPIO})\")\n    \n    def setup_gpio(self):\n        \"\"\"Setup GPIO pin for detection signal monitoring\"\"\"\n        try:\n            GPIO.setmode(GPIO.BCM)\n            GPIO.setup(self.gpio_pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)\n            GPIO.add_event_detect(\n                self.gpio_pin,\n                GPIO.RISING,\n                callback=self.gpio_callback,\n                bouncetime=200  # Debounce time in ms\n            )\n            self.logger.info(f\"GPIO pin {self.gpio_pin} configured for detection signals\")\n        except Exception as e:\n            self.logger.error(f\"Failed to setup GPIO: {e}\")\n            raise\n    \n    def gpio_callback(self, channel):\n        \"\"\"Callback function for GPIO detection signal\"\"\"\n        timestamp = time.time()\n        self.logger.info(f\"Detection signal received on GPIO pin {channel} at {timestamp}\")\n        self.send_detection_event(timestamp)\n    \n    def send_detection_event(self, timestamp: float, confidence: Optional[float] = None, \n                           class_label: Optional[str] = None):\n        \"\"\"Send detection event to the validation platform API\"\"\"\n        try:\n            payload = {\n                \"test_session_id\": self.session_id,\n                \"timestamp\": timestamp,\n                \"confidence\": confidence,\n                \"class_label\": class_label\n            }\n            \n            response = requests.post(\n                f\"{self.api_url}/api/detection-events\",\n                json=payload,\n                timeout=5\n            )\n            \n            if response.status_code == 200:\n                result = response.json()\n                validation_result = result.get('validation_result', 'Unknown')\n                self.logger.info(\n                    f\"Detection event sent successfully. \"\n                    f\"Validation result: {validation_result}\"\n                )\n            else:\n                self.logger.error(\n                    f\"Failed to send detection event. \"\n                    f\"Status: {response.status_code}, Response: {response.text}\"\n                )\n                \n        except requests.exceptions.RequestException as e:\n            self.logger.error(f\"Network error sending detection event: {e}\")\n        except Exception as e:\n            self.logger.error(f\"Error sending detection event: {e}\")\n    \n    def monitor_network_packets(self):\n        \"\"\"Monitor network packets for detection signals (placeholder)\"\"\"\n        # This would implement packet monitoring logic\n        # For example, listening for UDP packets on a specific port\n        self.logger.info(\"Network packet monitoring not implemented yet\")\n        pass\n    \n    def simulate_detections(self, interval: float = 5.0):\n        \"\"\"Simulate detection events for testing purposes\"\"\"\n        self.logger.info(f\"Starting detection simulation (interval: {interval}s)\")\n        \n        import random\n        classes = ['pedestrian', 'cyclist', 'motorcycle']\n        \n        while self.running:\n            try:\n                timestamp = time.time()\n                confidence = random.uniform(0.5, 0.95)\n                class_label = random.choice(classes)\n                \n                self.logger.info(\n                    f\"Simulating detection: {class_label} \"\n                    f\"(confidence: {confidence:.2f}) at {timestamp}\"\n                )\n                \n                self.send_detection_event(timestamp, confidence, class_label)\n                time.sleep(interval)\n                \n            except KeyboardInterrupt:\n                self.logger.info(\"Simulation interrupted by user\")\n                break\n            except Exception as e:\n                self.logger.error(f\"Error in simulation: {e}\")\n                time.sleep(1)\n    \n    def start_monitoring(self, mode: str = 'gpio'):\n        \"\"\"Start monitoring for detection signals\"\"\"\n        self.running = True\n        \n        try:\n            if mode == 'gpio' and HAS_GPIO:\n                self.logger.info(\"Starting GPIO monitoring...\")\n                self.logger.info(\"Press Ctrl+C to stop\")\n                \n                # Keep the main thread alive\n                while self.running:\n                    time.sleep(0.1)\n                    \n            elif mode == 'network':\n                self.logger.info(\"Starting network packet monitoring...\")\n                self.monitor_network_packets()\n                \n            elif mode == 'simulate':\n                self.simulate_detections()\n                \n            else:\n                self.logger.error(f\"Unknown monitoring mode: {mode}\")\n                \n        except KeyboardInterrupt:\n            self.logger.info(\"Monitoring stopped by user\")\n        finally:\n            self.stop_monitoring()\n    \n    def stop_monitoring(self):\n        \"\"\"Stop monitoring and cleanup resources\"\"\"\n        self.running = False\n        \n        if HAS_GPIO:\n            GPIO.cleanup()\n            \n        self.logger.info(\"Monitoring stopped and resources cleaned up\")\n    \n    def test_connection(self) -> bool:\n        \"\"\"Test connection to the validation platform API\"\"\"\n        try:\n            response = requests.get(f\"{self.api_url}/health\", timeout=5)\n            if response.status_code == 200:\n                self.logger.info(\"✅ API connection test successful\")\n                return True\n            else:\n                self.logger.error(f\"❌ API connection test failed: {response.status_code}\")\n                return False\n        except Exception as e:\n            self.logger.error(f\"❌ API connection test failed: {e}\")\n            return False\n\ndef main():\n    parser = argparse.ArgumentParser(\n        description=\"Raspberry Pi Client for AI Model Validation Platform\"\n    )\n    parser.add_argument(\n        '--api-url',\n        required=True,\n        help='URL of the validation platform API (e.g., http://192.168.1.100:8000)'\n    )\n    parser.add_argument(\n        '--session-id',\n        required=True,\n        help='Test session ID from the validation platform'\n    )\n    parser.add_argument(\n        '--gpio-pin',\n        type=int,\n        default=18,\n        help='GPIO pin number for detection signals (default: 18)'\n    )\n    parser.add_argument(\n        '--mode',\n        choices=['gpio', 'network', 'simulate'],\n        default='gpio',\n        help='Monitoring mode (default: gpio)'\n    )\n    parser.add_argument(\n        '--test-connection',\n        action='store_true',\n        help='Test API connection and exit'\n    )\n    \n    args = parser.parse_args()\n    \n    # Create client instance\n    client = VRUDetectionClient(\n        api_url=args.api_url,\n        session_id=args.session_id,\n        gpio_pin=args.gpio_pin\n    )\n    \n    # Test connection if requested\n    if args.test_connection:\n        client.test_connection()\n        return\n    \n    # Start monitoring\n    try:\n        client.start_monitoring(args.mode)\n    except Exception as e:\n        logging.error(f\"Fatal error: {e}\")\n        return 1\n    \n    return 0\n\nif __name__ == \"__main__\":\n    exit(main())
\ No newline at end of file
+"""
+Raspberry Pi Client for AI Model Validation Platform
+
+This script runs on the Raspberry Pi connected to the Camera Under Test (CUT).
+It monitors GPIO pins or network packets for detection signals and forwards
+them to the validation platform API.
+
+Detection events are written to a local spool first and sent in batches by a
+background thread, so capture never waits on the network and events captured
+while the server is unreachable are sent once it is back.
+
+Usage:
+    python raspberry-pi-client.py --api-url http://your-server:8000 --session-id your-session-id
+
+    # Stream events over one persistent connection instead of HTTP requests
+    python raspberry-pi-client.py --api-url http://your-server:8000 --session-id your-session-id --transport stream
+
+    # Receive detection datagrams on UDP port 5005 (see scripts/udp_detection_generator.py)
+    python raspberry-pi-client.py --api-url http://your-server:8000 --session-id your-session-id --mode network --udp-port 5005
+"""
+
+import time
+import json
+import math
+import random
+import select
+import socket
+import sqlite3
+import struct
+import argparse
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import RPi.GPIO as GPIO
+    HAS_GPIO = True
+except ImportError:
+    HAS_GPIO = False
+    print("Warning: RPi.GPIO not available. GPIO monitoring disabled.")
+
+try:
+    import socketio
+    HAS_SOCKETIO = True
+except ImportError:
+    HAS_SOCKETIO = False
+
+class EventSpool:
+    """
+    Durable FIFO of detection events in a local SQLite file.
+
+    Appending is a short local write, so capture callbacks never wait on the network,
+    and events survive Wi-Fi dropouts and client restarts until a sender removes them
+    after the server has acknowledged them. Ids only ever increase, so senders can
+    track what they have handed out with a simple cursor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + NORMAL: appends survive a process crash without an fsync per event
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)"
+        )
+        # Events the server will never accept, kept for inspection instead of blocking the spool
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters "
+            "(id INTEGER PRIMARY KEY, payload TEXT NOT NULL, reason TEXT NOT NULL)"
+        )
+
+    def append(self, event: dict):
+        with self._lock:
+            self._db.execute("INSERT INTO events (payload) VALUES (?)", (json.dumps(event),))
+
+    def append_many(self, events: List[dict]):
+        """Append several events in one transaction"""
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO events (payload) VALUES (?)", [(json.dumps(event),) for event in events]
+                )
+
+    def peek(self, after_id: int = 0, limit: int = 100) -> List[Tuple[int, dict]]:
+        """Oldest events with id > after_id, as (id, event) pairs"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload FROM events WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def delete(self, ids: List[int]):
+        if not ids:
+            return
+        with self._lock:
+            self._db.execute(f"DELETE FROM events WHERE id IN ({','.join('?' * len(ids))})", ids)
+
+    def dead_letter(self, row_id: int, reason: str):
+        """Move an event out of the spool into the dead_letters table"""
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO dead_letters (id, payload, reason) "
+                    "SELECT id, payload, ? FROM events WHERE id = ?", (reason, row_id)
+                )
+                self._db.execute("DELETE FROM events WHERE id = ?", (row_id,))
+
+    def dead_letter_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class Backoff:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, base: float = 0.5, maximum: float = 30.0):
+        self.base = base
+        self.maximum = maximum
+        self.attempts = 0
+
+    def next(self) -> float:
+        delay = min(self.maximum, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return random.uniform(0, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+class BatchSender:
+    """
+    Drains the spool to POST /api/detection-events/batch from a background thread.
+
+    Requests go over one pooled keep-alive requests.Session. While the server is unreachable
+    or busy (network errors, 429, 502-504, a full server buffer) sends are retried with
+    exponential backoff for as long as it takes, and the spool keeps events in order, so
+    everything captured during an outage is replayed once the server is back.
+
+    A batch the server rejects as invalid is split so only the offending events are
+    dead-lettered. Any other error (e.g. a 500 caused by one bad row) is retried up to
+    `max_attempts` times; after that the batch is sent one event at a time, and an event
+    that still fails `max_attempts` times on its own is dead-lettered, so one poison event
+    cannot hold back everything spooled behind it.
+    """
+
+    def __init__(self, api_url: str, spool: EventSpool, logger: logging.Logger,
+                 max_batch: int = 100, timeout: float = 5.0, max_attempts: int = 5):
+        self.url = f"{api_url}/api/detection-events/batch"
+        self.spool = spool
+        self.logger = logger
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._batch_failures = 0  # Consecutive 'failed' sends of the batch at the head of the spool
+        self._event_failures: Dict[int, int] = {}  # spool id -> 'failed' sends on its own
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.backoff = Backoff()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="batch-sender", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 10.0):
+        """Give the sender up to `timeout` seconds to drain the spool, then stop it"""
+        if self._thread is None:
+            return
+        deadline = time.time() + timeout
+        while len(self.spool) and time.time() < deadline and self._thread.is_alive():
+            time.sleep(0.1)
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.timeout + 1)
+        self.http.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            rows = self.spool.peek(limit=self.max_batch)
+            if not rows:
+                self._wakeup.wait(timeout=0.5)
+                self._wakeup.clear()
+                continue
+
+            if self._batch_failures >= self.max_attempts:
+                outcome = self._send_individually(rows)
+            else:
+                outcome = self._post([event for _, event in rows])
+                if outcome == "sent":
+                    self.spool.delete([row_id for row_id, _ in rows])
+                    self._batch_failures = 0
+                elif outcome == "failed":
+                    self._batch_failures += 1
+                elif outcome == "rejected":
+                    outcome = self._send_individually(rows)
+
+            if outcome in ("unavailable", "failed"):
+                delay = self.backoff.next()
+                self.logger.warning(f"Send failed; {len(self.spool)} events spooled, retrying in {delay:.1f}s")
+                self._stopping.wait(delay)
+            else:
+                self.backoff.reset()
+
+    def _send_individually(self, rows: List[Tuple[int, dict]]) -> str:
+        """
+        Send events one at a time, dead-lettering those that are rejected or keep failing.
+        Returns 'sent' once every row is handled, or the outcome that stopped the pass.
+        """
+        for row_id, event in rows:
+            outcome = self._post([event])
+            if outcome == "unavailable":
+                return outcome
+            if outcome == "failed":
+                failures = self._event_failures.get(row_id, 0) + 1
+                self._event_failures[row_id] = failures
+                if failures < self.max_attempts:
+                    return outcome
+            self._event_failures.pop(row_id, None)
+            if outcome == "sent":
+                self.spool.delete([row_id])
+            else:
+                self.logger.error(f"Dead-lettering detection event ({outcome}): {event}")
+                self.spool.dead_letter(row_id, outcome)
+        self._batch_failures = 0
+        return "sent"
+
+    def _post(self, events: List[dict]) -> str:
+        """
+        'sent', 'rejected' (invalid, do not resend), 'unavailable' (server unreachable or
+        busy, retry indefinitely) or 'failed' (any other error, retried a limited number of times)
+        """
+        try:
+            response = self.http.post(self.url, json={"events": events}, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self.logger.debug(f"Network error sending detection events: {e}")
+            return "unavailable"
+        if response.status_code == 200:
+            results = Counter(detection.get("validation_result") for detection in response.json()["detections"])
+            self.logger.info(f"Sent {len(events)} detection events. Validation results: {dict(results)}")
+            return "sent"
+        if response.status_code in (400, 413, 422):
+            self.logger.error(f"Detection events rejected. Status: {response.status_code}, Response: {response.text}")
+            return "rejected"
+        if response.status_code in (429, 502, 503, 504):
+            return "unavailable"
+        self.logger.error(f"Detection events failed. Status: {response.status_code}, Response: {response.text}")
+        return "failed"
+
+class StreamingIngestSender:
+    """
+    Drains the spool over one persistent Socket.IO connection to the server's /ingest
+    namespace instead of opening an HTTP request per batch.
+
+    The server grants a window of unacknowledged messages on `hello` and returns one credit
+    with each ack, so at most that many batches are in flight. Acknowledged events are
+    removed from the spool. After a disconnect, or a batch deferred with retry=true, sending
+    restarts from the oldest spooled event.
+
+    Failures follow the same rules as BatchSender: a batch deferred because the server is
+    busy is retried indefinitely, any other retryable error up to `max_attempts` times. A
+    batch that is rejected, or runs out of attempts, is resent one event per message, and
+    only the events that fail on their own are dead-lettered.
+    """
+
+    NAMESPACE = '/ingest'
+
+    def __init__(self, api_url: str, spool: EventSpool, logger: logging.Logger, max_batch: int = 100,
+                 max_attempts: int = 5):
+        if not HAS_SOCKETIO:
+            raise RuntimeError("Streaming transport requires python-socketio[client]")
+        self.api_url = api_url
+        self.spool = spool
+        self.logger = logger
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        # Not a browser: send no Origin header so the server's browser CORS allow-list doesn't apply
+        self.sio = socketio.Client(reconnection=True, websocket_extra_options={'suppress_origin': True})
+        self.sio.on('connect', self._on_connect, namespace=self.NAMESPACE)
+        self.sio.on('disconnect', self._on_disconnect, namespace=self.NAMESPACE)
+        self.backoff = Backoff()
+
+        self._condition = threading.Condition()
+        self._in_flight: Dict[int, List[int]] = {}  # seq -> spool ids
+        self._cursor = 0  # Highest spool id handed to a message
+        self._rewind = False
+        self._isolate_through = 0  # Spool ids up to this one are sent one event per message
+        self._failures: Dict[Tuple[int, bool], int] = {}  # (first spool id, single event) -> failed attempts
+        self._credit = 0
+        self._seq = 0
+        self._connected = False
+        self._handshake_needed = True
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ingest-sender", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify()
+
+    def stop(self, timeout: float = 10.0):
+        """Wait up to `timeout` seconds for spooled events to be acknowledged, then disconnect"""
+        deadline = time.time() + timeout
+        while (len(self.spool) or self._in_flight) and self._connected and time.time() < deadline:
+            time.sleep(0.1)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.sio.disconnect()
+
+    def _on_connect(self):
+        with self._condition:
+            self._connected = True
+            self._handshake_needed = True
+            self._condition.notify()
+        self.logger.info("Streaming ingest connected")
+
+    def _on_disconnect(self):
+        with self._condition:
+            self._connected = False
+            self._credit = 0
+            # Nothing in flight will be acknowledged now; resend from the oldest spooled event
+            self._in_flight.clear()
+            self._cursor = 0
+            self._condition.notify_all()
+        if self._running:
+            self.logger.warning(f"Streaming ingest disconnected; {len(self.spool)} events spooled")
+
+    def _connect(self):
+        # Auto-reconnection only covers drops after a first successful connection
+        while self._running and not self.sio.connected:
+            try:
+                self.sio.connect(self.api_url, namespaces=[self.NAMESPACE], transports=['websocket'])
+            except Exception as e:
+                delay = self.backoff.next()
+                self.logger.warning(f"Streaming ingest connection failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _run(self):
+        self._connect()
+        while True:
+            with self._condition:
+                while self._running and not (
+                    self._connected and (self._handshake_needed or self._credit > 0)
+                    and not (self._rewind and self._in_flight)
+                ):
+                    self._condition.wait(timeout=0.5)
+                if not self._running:
+                    return
+                rewind = self._rewind
+                if rewind:
+                    self._rewind = False
+                    self._cursor = 0
+                handshake = self._handshake_needed
+                cursor = self._cursor
+
+            try:
+                if rewind:
+                    time.sleep(self.backoff.next())
+                elif handshake:
+                    self._handshake()
+                else:
+                    self._send_next(cursor)
+            except Exception as e:
+                # Disconnected mid-send; the disconnect handler resets the cursor
+                self.logger.error(f"Streaming ingest send failed: {e}")
+                time.sleep(0.5)
+
+    def _handshake(self):
+        window = self.sio.call('hello', {}, namespace=self.NAMESPACE, timeout=10)
+        with self._condition:
+            self._credit = window["credit"]
+            self.max_batch = min(self.max_batch, window["max_events"])
+            self._handshake_needed = False
+            self._condition.notify()
+        self.logger.info(f"Streaming ingest ready (window: {window['credit']} messages)")
+
+    def _send_next(self, cursor: int):
+        rows = self.spool.peek(after_id=cursor, limit=self.max_batch)
+        with self._condition:
+            if not rows:
+                self._condition.wait(timeout=0.5)
+                return
+            if cursor != self._cursor:
+                return  # Rewound by a disconnect while reading
+            if rows[0][0] <= self._isolate_through:
+                rows = rows[:1]
+            self._seq += 1
+            seq = self._seq
+            self._credit -= 1
+            self._in_flight[seq] = [row_id for row_id, _ in rows]
+            self._cursor = rows[-1][0]
+        self.sio.emit('events', {"seq": seq, "events": [event for _, event in rows]},
+                      namespace=self.NAMESPACE, callback=self._on_ack)
+
+    def _on_ack(self, ack: dict):
+        error = ack.get("error")
+        dead_letter = None
+        with self._condition:
+            self._credit += ack.get("credit", 0)
+            ids = self._in_flight.pop(ack.get("seq"), None)
+            if ids is not None and error:
+                key = (ids[0], len(ids) == 1)
+                if ack.get("retry"):
+                    failures = self._failures.get(key, 0) + (0 if ack.get("busy") else 1)
+                    self._failures[key] = failures
+                    failed = failures >= self.max_attempts
+                else:
+                    failed = True
+                if failed:
+                    self._failures.pop(key, None)
+                    if len(ids) == 1:
+                        dead_letter = ("failed" if ack.get("retry") else "rejected", ids[0])
+                    else:
+                        # Resend these events one per message to find the offenders
+                        self._isolate_through = max(self._isolate_through, ids[-1])
+                if dead_letter is None:
+                    # Keep the events spooled and resend from the oldest once in-flight acks are in
+                    self._rewind = True
+                    ids = None
+            elif ids is not None:
+                self._failures.pop((ids[0], len(ids) == 1), None)
+            self._condition.notify_all()
+
+        if dead_letter is not None:
+            reason, row_id = dead_letter
+            self.logger.error(f"Dead-lettering detection event {row_id} ({reason}): {error}")
+            self.spool.dead_letter(row_id, reason)
+            return
+        if ids is None:
+            if error:
+                self.logger.warning(f"Detection batch deferred by server: {error}")
+            return
+        self.spool.delete(ids)
+        self.backoff.reset()
+        results = Counter(detection.get("validation_result") for detection in ack.get("detections", []))
+        self.logger.info(f"Streamed {len(ids)} detection events. Validation results: {dict(results)}")
+
+# Detection datagram: magic, version, class code, sender sequence number, confidence (NaN = none).
+# 12 bytes, network byte order. scripts/udp_detection_generator.py sends the same format.
+PACKET = struct.Struct('!2sBBIf')
+PACKET_MAGIC = b'VD'
+PACKET_VERSION = 1
+PACKET_CLASSES = {0: None, 1: 'pedestrian', 2: 'cyclist', 3: 'motorcycle', 4: 'vehicle'}
+
+class UdpDetectionListener:
+    """
+    Receives detection datagrams on a UDP port and hands them on in batches.
+
+    Each event is timestamped when its datagram is read, not when it is sent on.
+    Once the socket is readable it is drained without blocking, up to `max_batch`
+    datagrams, and the whole batch is parsed and passed
+    to `on_batch` at once, so per-packet overhead is one recv call. This is the
+    portable equivalent of a recvmmsg loop. A large receive buffer absorbs bursts
+    while a batch is being spooled. Sequence gaps from each sender are counted as
+    lost packets.
+    """
+
+    def __init__(self, host: str, port: int, on_batch, logger: logging.Logger,
+                 max_batch: int = 256, receive_buffer: int = 4 * 1024 * 1024):
+        self.on_batch = on_batch
+        self.logger = logger
+        self.max_batch = max_batch
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.received = 0
+        self.malformed = 0
+        self.lost = 0
+        self._next_seq: Dict[tuple, int] = {}
+
+    @property
+    def address(self) -> tuple:
+        return self.sock.getsockname()
+
+    def serve(self, running):
+        """Receive until running() returns False"""
+        while running():
+            readable, _, _ = select.select([self.sock], [], [], 0.5)
+            if not readable:
+                continue
+            datagrams = []
+            while len(datagrams) < self.max_batch:
+                try:
+                    data, sender = self.sock.recvfrom(64)
+                except BlockingIOError:
+                    break
+                datagrams.append((time.time(), data, sender))
+            events = [event for event in map(self._parse, datagrams) if event is not None]
+            if events:
+                self.on_batch(events)
+
+    def close(self):
+        self.sock.close()
+        self.logger.info(
+            f"UDP listener received {self.received} packets "
+            f"({self.malformed} malformed, {self.lost} lost in transit)"
+        )
+
+    def _parse(self, datagram: Tuple[float, bytes, tuple]) -> Optional[dict]:
+        received_at, data, sender = datagram
+        self.received += 1
+        try:
+            magic, version, class_code, seq, confidence = PACKET.unpack(data)
+        except struct.error:
+            magic = None
+        if magic != PACKET_MAGIC or version != PACKET_VERSION or class_code not in PACKET_CLASSES:
+            self.malformed += 1
+            return None
+
+        expected = self._next_seq.get(sender)
+        if expected is None or seq >= expected:  # Late (reordered) packets don't move the cursor back
+            if expected is not None:
+                self.lost += seq - expected
+            self._next_seq[sender] = seq + 1
+        return {
+            "timestamp": received_at,
+            "confidence": None if math.isnan(confidence) else round(confidence, 4),
+            "class_label": PACKET_CLASSES[class_code]
+        }
+
+class VRUDetectionClient:
+    def __init__(self, api_url: str, session_id: str, gpio_pin: int = 18, transport: str = 'http',
+                 spool_path: str = 'vru-detection-spool.db', batch_size: int = 100):
+        self.api_url = api_url.rstrip('/')
+        self.session_id = session_id
+        self.gpio_pin = gpio_pin
+        self.transport = transport
+        self.running = False
+        
+        # Setup logging
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        self.logger = logging.getLogger(__name__)
+        
+        # Events are spooled locally and drained by a sender thread
+        self.spool = EventSpool(spool_path)
+        if transport == 'stream':
+            self.sender = StreamingIngestSender(self.api_url, self.spool, self.logger, max_batch=batch_size)
+        else:
+            self.sender = BatchSender(self.api_url, self.spool, self.logger, max_batch=batch_size)
+        
+        # Setup GPIO if available
+        if HAS_GPIO:
+            self.setup_gpio()
+        
+        self.logger.info("VRU Detection Client initialized")
+        self.logger.info(f"API URL: {self.api_url}")
+        self.logger.info(f"Session ID: {self.session_id}")
+        self.logger.info(f"GPIO Pin: {self.gpio_pin} (available: {HAS_GPIO})")
+        self.logger.info(f"Transport: {self.transport}")
+        self.logger.info(f"Spool: {spool_path} ({len(self.spool)} events pending)")
+    
+    def setup_gpio(self):
+        """Setup GPIO pin for detection signal monitoring"""
+        try:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.gpio_pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+            GPIO.add_event_detect(
+                self.gpio_pin,
+                GPIO.RISING,
+                callback=self.gpio_callback,
+                bouncetime=200  # Debounce time in ms
+            )
+            self.logger.info(f"GPIO pin {self.gpio_pin} configured for detection signals")
+        except Exception as e:
+            self.logger.error(f"Failed to setup GPIO: {e}")
+            raise
+    
+    def gpio_callback(self, channel):
+        """Callback function for GPIO detection signal"""
+        timestamp = time.time()
+        self.logger.info(f"Detection signal received on GPIO pin {channel} at {timestamp}")
+        self.send_detection_event(timestamp)
+    
+    def send_detection_event(self, timestamp: float, confidence: Optional[float] = None, 
+                           class_label: Optional[str] = None):
+        """Spool a detection event for the sender thread; never blocks on the network"""
+        try:
+            payload = {
+                "test_session_id": self.session_id,
+                "timestamp": timestamp,
+                "confidence": confidence,
+                "class_label": class_label
+            }
+            
+            self.spool.append(payload)
+            self.sender.wake()
+                
+        except Exception as e:
+            self.logger.error(f"Error spooling detection event: {e}")
+    
+    def spool_detection_events(self, events: List[dict]):
+        """Spool a batch of detection events (timestamp, confidence, class_label) at once"""
+        try:
+            self.spool.append_many([{"test_session_id": self.session_id, **event} for event in events])
+            self.sender.wake()
+        except Exception as e:
+            self.logger.error(f"Error spooling {len(events)} detection events: {e}")
+    
+    def monitor_network_packets(self, host: str = '0.0.0.0', port: int = 5005):
+        """Listen for detection datagrams on a UDP port"""
+        listener = UdpDetectionListener(host, port, self.spool_detection_events, self.logger)
+        self.logger.info(f"Listening for detection packets on udp://{host}:{port}")
+        try:
+            listener.serve(lambda: self.running)
+        finally:
+            listener.close()
+    
+    def simulate_detections(self, interval: float = 5.0):
+        """Simulate detection events for testing purposes"""
+        self.logger.info(f"Starting detection simulation (interval: {interval}s)")
+        
+        classes = ['pedestrian', 'cyclist', 'motorcycle']
+        
+        while self.running:
+            try:
+                timestamp = time.time()
+                confidence = random.uniform(0.5, 0.95)
+                class_label = random.choice(classes)
+                
+                self.logger.info(
+                    f"Simulating detection: {class_label} "
+                    f"(confidence: {confidence:.2f}) at {timestamp}"
+                )
+                
+                self.send_detection_event(timestamp, confidence, class_label)
+                time.sleep(interval)
+                
+            except KeyboardInterrupt:
+                self.logger.info("Simulation interrupted by user")
+                break
+            except Exception as e:
+                self.logger.error(f"Error in simulation: {e}")
+                time.sleep(1)
+    
+    def start_monitoring(self, mode: str = 'gpio', udp_host: str = '0.0.0.0', udp_port: int = 5005):
+        """Start monitoring for detection signals"""
+        self.running = True
+        
+        try:
+            self.sender.start()
+            
+            if mode == 'gpio' and HAS_GPIO:
+                self.logger.info("Starting GPIO monitoring...")
+                self.logger.info("Press Ctrl+C to stop")
+                
+                # Keep the main thread alive
+                while self.running:
+                    time.sleep(0.1)
+                    
+            elif mode == 'network':
+                self.logger.info("Starting network packet monitoring...")
+                self.monitor_network_packets(udp_host, udp_port)
+                
+            elif mode == 'simulate':
+                self.simulate_detections()
+                
+            else:
+                self.logger.error(f"Unknown monitoring mode: {mode}")
+                
+        except KeyboardInterrupt:
+            self.logger.info("Monitoring stopped by user")
+        finally:
+            self.stop_monitoring()
+    
+    def stop_monitoring(self):
+        """Stop monitoring and cleanup resources"""
+        self.running = False
+        
+        if HAS_GPIO:
+            GPIO.cleanup()
+        
+        self.sender.stop()
+        pending = len(self.spool)
+        self.spool.close()
+        if pending:
+            self.logger.warning(f"{pending} detection events remain spooled and will be sent on next start")
+            
+        self.logger.info("Monitoring stopped and resources cleaned up")
+    
+    def test_connection(self) -> bool:
+        """Test connection to the validation platform API"""
+        try:
+            response = requests.get(f"{self.api_url}/health", timeout=5)
+            if response.status_code == 200:
+                self.logger.info("✅ API connection test successful")
+                return True
+            else:
+                self.logger.error(f"❌ API connection test failed: {response.status_code}")
+                return False
+        except Exception as e:
+            self.logger.error(f"❌ API connection test failed: {e}")
+            return False
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Raspberry Pi Client for AI Model Validation Platform"
+    )
+    parser.add_argument(
+        '--api-url',
+        required=True,
+        help='URL of the validation platform API (e.g., http://192.168.1.100:8000)'
+    )
+    parser.add_argument(
+        '--session-id',
+        required=True,
+        help='Test session ID from the validation platform'
+    )
+    parser.add_argument(
+        '--gpio-pin',
+        type=int,
+        default=18,
+        help='GPIO pin number for detection signals (default: 18)'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['gpio', 'network', 'simulate'],
+        default='gpio',
+        help='Monitoring mode (default: gpio)'
+    )
+    parser.add_argument(
+        '--transport',
+        choices=['http', 'stream'],
+        default='http',
+        help='http: batched POSTs; stream: persistent Socket.IO connection (default: http)'
+    )
+    parser.add_argument(
+        '--udp-host',
+        default='0.0.0.0',
+        help='Address to listen on for detection packets in network mode (default: 0.0.0.0)'
+    )
+    parser.add_argument(
+        '--udp-port',
+        type=int,
+        default=5005,
+        help='UDP port to listen on for detection packets in network mode (default: 5005)'
+    )
+    parser.add_argument(
+        '--spool-path',
+        default='vru-detection-spool.db',
+        help='Local SQLite file holding events until the server acknowledges them'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=100,
+        help='Most events sent per request or message (default: 100)'
+    )
+    parser.add_argument(
+        '--test-connection',
+        action='store_true',
+        help='Test API connection and exit'
+    )
+    
+    args = parser.parse_args()
+    
+    # Create client instance
+    client = VRUDetectionClient(
+        api_url=args.api_url,
+        session_id=args.session_id,
+        gpio_pin=args.gpio_pin,
+        transport=args.transport,
+        spool_path=args.spool_path,
+        batch_size=args.batch_size
+    )
+    
+    # Test connection if requested
+    if args.test_connection:
+        client.test_connection()
+        return
+    
+    # Start monitoring
+    try:
+        client.start_monitoring(args.mode, udp_host=args.udp_host, udp_port=args.udp_port)
+    except Exception as e:
+        logging.error(f"Fatal error: {e}")
+        return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Detection Ingest Benchmark
+Compares detection event throughput of one-event-per-request POST /api/detection-events
+with POST /api/detection-events/batch at several batch sizes, against a running API
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+import aiohttp
+
+@dataclass
+class IngestResult:
+    mode: str
+    batch_size: int
+    events: int
+    errors: int
+    seconds: float
+    events_per_second: float
+    p50_request_ms: float
+
+class DetectionIngestBenchmark:
+    def __init__(self, base_url: str, events: int, concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.events = events
+        self.concurrency = concurrency
+        self.test_session_id = None
+
+    async def setup(self, http: aiohttp.ClientSession):
+        """Create a project, a small video and a test session to post detection events against"""
+        async with http.post(f"{self.base_url}/api/projects", json={
+            "name": f"Ingest benchmark {int(time.time())}",
+            "description": "Created by detection_ingest_benchmark.py",
+            "cameraModel": "Benchmark",
+            "cameraView": "Front-facing VRU",
+            "signalType": "Network Packet"
+        }) as response:
+            response.raise_for_status()
+            project_id = (await response.json())["id"]
+
+        form = aiohttp.FormData()
+        form.add_field("file", os.urandom(64 * 1024), filename="setup.mp4", content_type="video/mp4")
+        async with http.post(f"{self.base_url}/api/projects/{project_id}/videos", data=form) as response:
+            response.raise_for_status()
+            video_id = (await response.json())["video_id"]
+
+        async with http.post(f"{self.base_url}/api/test-sessions", json={
+            "name": "Ingest benchmark session",
+            "project_id": project_id,
+            "video_id": video_id
+        }) as response:
+            response.raise_for_status()
+            self.test_session_id = (await response.json())["id"]
+
+    def event(self, index: int) -> Dict:
+        return {
+            "test_session_id": self.test_session_id,
+            "timestamp": index / 30.0,
+            "confidence": 0.9,
+            "class_label": "pedestrian"
+        }
+
+    async def run_mode(self, http: aiohttp.ClientSession, batch_size: int) -> IngestResult:
+        """Send all events as requests of `batch_size` (1 = single-event endpoint), `concurrency` at a time"""
+        if batch_size == 1:
+            url = f"{self.base_url}/api/detection-events"
+            bodies = [self.event(i) for i in range(self.events)]
+        else:
+            url = f"{self.base_url}/api/detection-events/batch"
+            bodies = [{"events": [self.event(i) for i in range(start, min(start + batch_size, self.events))]}
+                      for start in range(0, self.events, batch_size)]
+
+        latencies: List[float] = []
+        errors = [0]
+        queue: asyncio.Queue = asyncio.Queue()
+        for body in bodies:
+            queue.put_nowait(body)
+
+        async def worker():
+            while not queue.empty():
+                body = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    async with http.post(url, json=body) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors[0] += 1
+                        else:
+                            latencies.append((time.perf_counter() - start) * 1000)
+                except aiohttp.ClientError:
+                    errors[0] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+        seconds = time.perf_counter() - start
+
+        return IngestResult(
+            mode="single" if batch_size == 1 else "batch",
+            batch_size=batch_size,
+            events=self.events,
+            errors=errors[0],
+            seconds=round(seconds, 3),
+            events_per_second=round(self.events / seconds, 1),
+            p50_request_ms=round(statistics.median(latencies), 2) if latencies else 0.0
+        )
+
+    async def run(self, batch_sizes: List[int]) -> Dict:
+        timeout = aiohttp.ClientTimeout(total=600)
+        connector = aiohttp.TCPConnector(limit=self.concurrency + 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+            await self.setup(http)
+            results = []
+            for batch_size in [1] + batch_sizes:
+                result = await self.run_mode(http, batch_size)
+                results.append(result)
+                print(f"{result.mode:>6} x{result.batch_size:<5} {result.events} events in {result.seconds:7.2f}s "
+                      f"= {result.events_per_second:9.1f} events/s  p50 request {result.p50_request_ms:7.2f}ms "
+                      f"errors={result.errors}")
+
+        baseline = results[0].events_per_second
+        for result in results[1:]:
+            print(f"batch x{result.batch_size}: {result.events_per_second / baseline:.1f}x single-event throughput")
+        return {"session_id": self.test_session_id, "results": [asdict(result) for result in results]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs batch detection event ingestion throughput")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--events", type=int, default=3000, help="Events sent per mode")
+    parser.add_argument("--batch-sizes", default="30,300", help="Comma-separated batch sizes to compare")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    benchmark = DetectionIngestBenchmark(args.base_url, args.events, args.concurrency)
+    report = asyncio.run(benchmark.run([int(size) for size in args.batch_sizes.split(",")]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
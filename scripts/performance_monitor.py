@@ -146,14 +146,21 @@ class PerformanceMonitor:
             return 0.0
 
     def get_video_processing_queue(self) -> int:
-        """Get number of videos in processing queue"""
+        """Get number of queued or running jobs in the video processing queue"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT COUNT(*) FROM videos 
-                    WHERE status IN ('uploaded', 'processing')
-                """)
+                try:
+                    cursor.execute("""
+                        SELECT COUNT(*) FROM video_processing_jobs 
+                        WHERE status IN ('queued', 'running')
+                    """)
+                except sqlite3.OperationalError:
+                    # Database predates the jobs table - fall back to video status
+                    cursor.execute("""
+                        SELECT COUNT(*) FROM videos 
+                        WHERE status IN ('uploaded', 'processing')
+                    """)
                 result = cursor.fetchone()
                 return result[0] if result else 0
                 
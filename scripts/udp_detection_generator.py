@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+UDP Detection Packet Generator
+Sends detection datagrams to a Raspberry Pi client running in network mode
+(docs/raspberry-pi-client.py --mode network) at a fixed rate, for testing the
+packet listener without a camera
+"""
+
+import argparse
+import random
+import socket
+import struct
+import time
+
+# Must match PACKET in docs/raspberry-pi-client.py: magic, version, class code, sequence, confidence
+PACKET = struct.Struct("!2sBBIf")
+PACKET_MAGIC = b"VD"
+PACKET_VERSION = 1
+CLASS_CODES = {"pedestrian": 1, "cyclist": 2, "motorcycle": 3, "vehicle": 4}
+
+def generate(host: str, port: int, rate: float, count: int, burst: int = 50) -> float:
+    """Send `count` packets at about `rate` per second in bursts; returns the achieved rate"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    codes = list(CLASS_CODES.values())
+    start = time.perf_counter()
+    for seq in range(count):
+        sock.sendto(PACKET.pack(PACKET_MAGIC, PACKET_VERSION, random.choice(codes), seq,
+                                random.uniform(0.5, 0.99)), (host, port))
+        if (seq + 1) % burst == 0:
+            # Pace bursts rather than single packets; sleep granularity is too coarse for kHz rates
+            ahead = (seq + 1) / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    sock.close()
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Send detection datagrams to a network-mode Pi client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--rate", type=float, default=2000, help="Packets per second")
+    parser.add_argument("--count", type=int, default=10000, help="Packets to send")
+    args = parser.parse_args()
+
+    achieved = generate(args.host, args.port, args.rate, args.count)
+    print(f"Sent {args.count} packets to udp://{args.host}:{args.port} at {achieved:.0f} packets/s")
+
+if __name__ == "__main__":
+    main()
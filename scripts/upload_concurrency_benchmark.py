@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Upload Concurrency Benchmark
+Measures /health and /api/detection-events latency while parallel video uploads are in flight,
+to check that upload disk I/O does not stall the API event loop
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+import aiohttp
+
+@dataclass
+class LatencySummary:
+    endpoint: str
+    phase: str
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(endpoint: str, phase: str, latencies: List[float], errors: int) -> LatencySummary:
+    return LatencySummary(
+        endpoint=endpoint,
+        phase=phase,
+        requests=len(latencies),
+        errors=errors,
+        p50_ms=statistics.median(latencies) if latencies else 0.0,
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        max_ms=max(latencies) if latencies else 0.0
+    )
+
+class UploadConcurrencyBenchmark:
+    def __init__(self, base_url: str, uploads: int, upload_size_mb: int, probe_interval: float):
+        self.base_url = base_url.rstrip("/")
+        self.uploads = uploads
+        self.upload_size = upload_size_mb * 1024 * 1024
+        self.probe_interval = probe_interval
+        self.project_id = None
+        self.test_session_id = None
+
+    async def setup(self, http: aiohttp.ClientSession):
+        """Create a project, a small video and a test session to post detection events against"""
+        async with http.post(f"{self.base_url}/api/projects", json={
+            "name": f"Upload benchmark {int(time.time())}",
+            "description": "Created by upload_concurrency_benchmark.py",
+            "cameraModel": "Benchmark",
+            "cameraView": "Front-facing VRU",
+            "signalType": "Network Packet"
+        }) as response:
+            response.raise_for_status()
+            self.project_id = (await response.json())["id"]
+
+        video_id = await self.upload(http, os.urandom(64 * 1024), "setup.mp4")
+        async with http.post(f"{self.base_url}/api/test-sessions", json={
+            "name": "Upload benchmark session",
+            "project_id": self.project_id,
+            "video_id": video_id
+        }) as response:
+            response.raise_for_status()
+            self.test_session_id = (await response.json())["id"]
+
+    async def upload(self, http: aiohttp.ClientSession, payload: bytes, filename: str) -> str:
+        form = aiohttp.FormData()
+        form.add_field("file", payload, filename=filename, content_type="video/mp4")
+        async with http.post(f"{self.base_url}/api/projects/{self.project_id}/videos", data=form) as response:
+            response.raise_for_status()
+            return (await response.json())["video_id"]
+
+    async def probe(self, http: aiohttp.ClientSession, endpoint: str, stop: asyncio.Event,
+                    latencies: List[float], errors: List[int]):
+        """Hit one endpoint on a fixed interval until stopped, recording latency in ms"""
+        detection = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if endpoint == "/health":
+                    request = http.get(f"{self.base_url}/health")
+                else:
+                    detection += 1
+                    request = http.post(f"{self.base_url}/api/detection-events", json={
+                        "test_session_id": self.test_session_id,
+                        "timestamp": detection * 0.1,
+                        "confidence": 0.9,
+                        "class_label": "pedestrian"
+                    })
+                async with request as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors[0] += 1
+                    else:
+                        latencies.append((time.perf_counter() - start) * 1000)
+            except aiohttp.ClientError:
+                errors[0] += 1
+            await asyncio.sleep(self.probe_interval)
+
+    async def measure(self, http: aiohttp.ClientSession, phase: str, load) -> List[LatencySummary]:
+        """Probe both endpoints while `load` runs (or for a fixed window if load is None)"""
+        stop = asyncio.Event()
+        results: Dict[str, List[float]] = {"/health": [], "/api/detection-events": []}
+        errors: Dict[str, List[int]] = {endpoint: [0] for endpoint in results}
+        probes = [
+            asyncio.create_task(self.probe(http, endpoint, stop, results[endpoint], errors[endpoint]))
+            for endpoint in results
+        ]
+
+        if load is None:
+            await asyncio.sleep(5)
+        else:
+            await load
+        stop.set()
+        await asyncio.gather(*probes)
+
+        return [summarize(endpoint, phase, latencies, errors[endpoint][0])
+                for endpoint, latencies in results.items()]
+
+    async def parallel_uploads(self, http: aiohttp.ClientSession) -> float:
+        # Distinct payloads so content-hash deduplication doesn't short-circuit the writes
+        payloads = [os.urandom(self.upload_size) for _ in range(self.uploads)]
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            self.upload(http, payload, f"bench-{index}.mp4") for index, payload in enumerate(payloads)
+        ])
+        return time.perf_counter() - start
+
+    async def run(self) -> Dict:
+        timeout = aiohttp.ClientTimeout(total=600)
+        connector = aiohttp.TCPConnector(limit=self.uploads + 10)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+            await self.setup(http)
+
+            print("=== IDLE BASELINE ===")
+            summaries = await self.measure(http, "idle", None)
+
+            print(f"=== {self.uploads} PARALLEL UPLOADS ({self.upload_size // (1024 * 1024)}MB each) ===")
+            upload_task = asyncio.create_task(self.parallel_uploads(http))
+            summaries += await self.measure(http, "uploading", upload_task)
+            upload_seconds = upload_task.result()
+
+        for summary in summaries:
+            print(f"{summary.phase:>9} {summary.endpoint:<24} n={summary.requests:<5} "
+                  f"p50={summary.p50_ms:7.1f}ms p95={summary.p95_ms:7.1f}ms "
+                  f"p99={summary.p99_ms:7.1f}ms max={summary.max_ms:7.1f}ms errors={summary.errors}")
+        total_mb = self.uploads * self.upload_size / (1024 * 1024)
+        print(f"Uploaded {total_mb:.0f}MB in {upload_seconds:.1f}s ({total_mb / upload_seconds:.1f}MB/s)")
+
+        return {
+            "uploads": self.uploads,
+            "upload_size_bytes": self.upload_size,
+            "upload_seconds": upload_seconds,
+            "latency": [asdict(summary) for summary in summaries]
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency during parallel video uploads")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=20, help="Number of parallel uploads")
+    parser.add_argument("--size-mb", type=int, default=50, help="Size of each upload in MB")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="Seconds between probe requests")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    benchmark = UploadConcurrencyBenchmark(args.base_url, args.uploads, args.size_mb, args.probe_interval)
+    report = asyncio.run(benchmark.run())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
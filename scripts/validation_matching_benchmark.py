@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Validation Matching Benchmark
+Compares the original O(D x G) nested-loop matcher from ValidationService with the
+searchsorted-based TemporalMatcher, and checks that both produce identical TP/FP/FN.
+Also times the class-aware / IoU matching modes of MatchingEngine on a large session.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "ai-model-validation-platform", "backend"))
+
+import numpy as np  # noqa: E402
+
+from services.temporal_matcher import TemporalMatcher, UNMATCHED  # noqa: E402
+from services.matching_engine import MatchingEngine  # noqa: E402
+
+@dataclass
+class MatchingResult:
+    detections: int
+    ground_truth: int
+    true_positives: int
+    false_positives: int
+    false_negatives: int
+    temporal_matcher_ms: float
+    nested_loop_ms: Optional[float]
+    speedup: Optional[float]
+
+def nested_loop_counts(detections: List[float], ground_truth: List[float], tolerance: float) -> Dict[str, int]:
+    """The matching loop ValidationService._calculate_metrics used before TemporalMatcher"""
+    true_positives = 0
+    false_positives = 0
+    detected = set()
+    for detection in detections:
+        is_match = False
+        for i, gt in enumerate(ground_truth):
+            if i in detected:
+                continue
+            if abs(gt - detection) <= tolerance:
+                true_positives += 1
+                detected.add(i)
+                is_match = True
+                break
+        if not is_match:
+            false_positives += 1
+    return {"tp": true_positives, "fp": false_positives, "fn": len(ground_truth) - len(detected)}
+
+def temporal_matcher_counts(detections: List[float], ground_truth: List[float], tolerance: float) -> Dict[str, int]:
+    matches = TemporalMatcher(ground_truth).match(detections, tolerance)
+    true_positives = int((matches != UNMATCHED).sum())
+    return {"tp": true_positives, "fp": len(detections) - true_positives, "fn": len(ground_truth) - true_positives}
+
+def synthetic_session(size: int, duration: float, seed: int):
+    """Ground truth spread over `duration` seconds and detections near most of it, plus noise"""
+    rng = random.Random(seed)
+    ground_truth = sorted(rng.uniform(0, duration) for _ in range(size))
+    detections = [gt + rng.gauss(0, 0.05) for gt in ground_truth if rng.random() < 0.8]
+    detections += [rng.uniform(0, duration) for _ in range(size // 5)]
+    detections.sort()
+    return detections, ground_truth
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def run(sizes: List[int], tolerance: float, legacy_max: int, seed: int) -> List[MatchingResult]:
+    results = []
+    for size in sizes:
+        detections, ground_truth = synthetic_session(size, duration=size / 10, seed=seed)
+        fast, fast_ms = timed(temporal_matcher_counts, detections, ground_truth, tolerance)
+
+        legacy_ms = None
+        if size <= legacy_max:
+            legacy, legacy_ms = timed(nested_loop_counts, detections, ground_truth, tolerance)
+            if legacy != fast:
+                raise AssertionError(f"Mismatch at size {size}: nested loop {legacy} vs matcher {fast}")
+
+        results.append(MatchingResult(
+            detections=len(detections),
+            ground_truth=len(ground_truth),
+            true_positives=fast["tp"],
+            false_positives=fast["fp"],
+            false_negatives=fast["fn"],
+            temporal_matcher_ms=round(fast_ms, 2),
+            nested_loop_ms=round(legacy_ms, 2) if legacy_ms is not None else None,
+            speedup=round(legacy_ms / fast_ms, 1) if legacy_ms else None
+        ))
+        result = results[-1]
+        legacy_text = f"{result.nested_loop_ms:10.1f}ms" if legacy_ms is not None else "   skipped"
+        print(f"D={result.detections:<7} G={result.ground_truth:<7} "
+              f"TP={result.true_positives:<7} FP={result.false_positives:<6} FN={result.false_negatives:<6} "
+              f"matcher={result.temporal_matcher_ms:8.1f}ms nested={legacy_text}"
+              + (f" ({result.speedup}x)" if result.speedup else ""))
+    return results
+
+CLASSES = ["person", "cyclist", "car", "truck"]
+
+def engine_modes(size: int, tolerance: float, seed: int) -> List[Dict]:
+    """Time each MatchingEngine mode on a session of `size` detections with classes and boxes"""
+    rng = np.random.default_rng(seed)
+    gt_times = np.sort(rng.uniform(0, size / 10, size))
+    gt_classes = rng.choice(CLASSES, size)
+    gt_boxes = np.column_stack([rng.uniform(0, 1800, size), rng.uniform(0, 1000, size),
+                                rng.uniform(20, 120, size), rng.uniform(20, 120, size)])
+    # Detections jitter ground truth in time and space; some are mislabelled
+    det_times = gt_times + rng.normal(0, 0.03, size)
+    det_classes = np.where(rng.random(size) < 0.9, gt_classes, rng.choice(CLASSES, size))
+    det_boxes = gt_boxes + rng.normal(0, 5, (size, 4))
+
+    modes = [
+        ("time-only greedy", {}),
+        ("class greedy", {"require_class": True}),
+        ("class+IoU greedy", {"require_class": True, "iou_threshold": 0.5}),
+        ("class+IoU hungarian", {"require_class": True, "iou_threshold": 0.5, "mode": "hungarian"}),
+    ]
+    results = []
+    for name, options in modes:
+        start = time.perf_counter()
+        engine = MatchingEngine(gt_times, gt_classes.tolist(), gt_boxes)
+        matches = engine.match(det_times, tolerance, det_classes.tolist(), det_boxes, **options)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        true_positives = int((matches != UNMATCHED).sum())
+        results.append({"mode": name, "detections": size, "true_positives": true_positives,
+                        "milliseconds": round(elapsed_ms, 1)})
+        print(f"{name:<22} D=G={size:<8} TP={true_positives:<8} {elapsed_ms:8.1f}ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Temporal matcher vs nested-loop validation benchmark")
+    parser.add_argument("--sizes", default="1000,5000,20000,50000",
+                        help="Comma-separated ground truth counts")
+    parser.add_argument("--tolerance-ms", type=int, default=100)
+    parser.add_argument("--legacy-max", type=int, default=20000,
+                        help="Largest size to run the quadratic nested loop on")
+    parser.add_argument("--engine-size", type=int, default=100000,
+                        help="Session size for timing class/IoU matching modes (0 to skip)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.tolerance_ms / 1000.0, args.legacy_max, args.seed)
+    modes = engine_modes(args.engine_size, args.tolerance_ms / 1000.0, args.seed) if args.engine_size else []
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"temporal": [asdict(result) for result in results], "engine_modes": modes}, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()